@@ -0,0 +1,78 @@
+'''
+Benchmarks for taskr.
+
+Run them from the project directory, e.g.
+
+    python -m benchmarks.multi_get
+
+Each benchmark builds its fixtures in a throwaway test database.
+'''
+import contextlib
+import os
+import time
+
+
+def setup(settings_module='config.settings'):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database(name=None):
+    '''
+    Create the test database and a test environment for the duration
+    of the block.
+
+    SQLite test databases live in memory unless a file `name` is given,
+    which is needed to share the database between threads.
+    '''
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment
+    )
+
+    if name:
+        connection.settings_dict['TEST']['NAME'] = name
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5):
+    '''
+    Run `func` `repeat` times and return the best wall time in seconds.
+    '''
+    timings = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        timings.append(time.time() - start)
+    return min(timings)
+
+
+def count_queries(func):
+    '''
+    Run `func` once and return the number of queries it executed.
+    '''
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    return len(queries)
+
+
+def report(title, rows):
+    '''
+    Print `(label, seconds)` rows as a table.
+    '''
+    print(title)
+    for label, seconds in rows:
+        print('  {:<40} {:>10.2f} ms'.format(label, seconds * 1000))
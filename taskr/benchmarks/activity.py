@@ -0,0 +1,106 @@
+'''
+Page through the activity feed of a user with many tasks and check the
+p99 page latency against a budget, next to merging the events of the
+user's tasks at read time.
+'''
+import time
+
+from . import report, setup, test_database
+
+# p99 latency a feed page must stay under, in seconds.
+BUDGET = 0.05
+
+
+def percentile(timings, percent):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * percent / 100))]
+
+
+def run(tasks_count=10000, events_per_task=3, other_tasks_count=10000):
+    from django.contrib.auth import get_user_model
+    from django.core.urlresolvers import reverse
+    from django.db.models import Q
+    from django.test import Client
+
+    from tasks import enums
+    from tasks.models import (
+        ActivityFeedItem, Task, TaskCategory, TaskEventLog
+    )
+
+    User = get_user_model()
+    category = TaskCategory.objects.get(name='General')
+    user = User.objects.create_user('bench', password='bench')
+    other_user = User.objects.create_user('other', password='other')
+
+    Task.objects.bulk_create(
+        [
+            Task(name='task {}'.format(i), category=category, reporter=user)
+            for i in range(tasks_count)
+        ] + [
+            Task(
+                name='other {}'.format(i), category=category,
+                reporter=other_user
+            )
+            for i in range(other_tasks_count)
+        ]
+    )
+    tasks = list(Task.objects.values_list('pk', 'reporter_id'))
+    TaskEventLog.objects.bulk_create([
+        TaskEventLog(
+            task_id=pk, user_id=reporter_id, event=enums.EVENT_EDITED
+        )
+        for _ in range(events_per_task)
+        for pk, reporter_id in tasks
+    ])
+    ActivityFeedItem.objects.bulk_create([
+        ActivityFeedItem(user_id=user_id, event_id=pk)
+        for pk, user_id in TaskEventLog.objects.values_list(
+            'pk', 'task__reporter'
+        ).order_by('pk')
+    ])
+
+    client = Client(
+        HTTP_AUTHORIZATION='Token {}'.format(user.auth_token.key)
+    )
+
+    timings = []
+    for _ in range(5):
+        url = reverse('activity-feed')
+        for _ in range(50):
+            start = time.time()
+            response = client.get(url)
+            timings.append(time.time() - start)
+            url = response.json()['next']
+
+    def merge():
+        list(TaskEventLog.objects.filter(
+            Q(task__reporter=user) | Q(task__assignee=user)
+        ).order_by('-created_on')[:50])
+
+    merge_timings = []
+    for _ in range(20):
+        start = time.time()
+        merge()
+        merge_timings.append(time.time() - start)
+
+    p99 = percentile(timings, 99)
+    report(
+        '{} tasks, {} events in the feed'.format(
+            tasks_count, tasks_count * events_per_task
+        ),
+        [
+            ('feed page p50', percentile(timings, 50)),
+            ('feed page p99', p99),
+            ('merge at read time p50 (query only)',
+             percentile(merge_timings, 50)),
+        ]
+    )
+    print('p99 {} the {:.0f} ms budget.'.format(
+        'within' if p99 <= BUDGET else 'OVER', BUDGET * 1000
+    ))
+
+
+if __name__ == '__main__':
+    setup()
+    with test_database():
+        run()
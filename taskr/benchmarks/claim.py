@@ -0,0 +1,90 @@
+'''
+Claim tasks from many concurrent workers and check that every task is
+claimed exactly once.
+'''
+import os
+import tempfile
+import threading
+import time
+
+from . import report, setup, test_database
+
+
+def run(workers=50, tasks_count=2000):
+    from django.contrib.auth import get_user_model
+    from django.core.urlresolvers import reverse
+    from django.db import connection, connections
+    from django.test import Client
+
+    from tasks import enums
+    from tasks.models import Task, TaskCategory
+
+    User = get_user_model()
+    category = TaskCategory.objects.get(name='General')
+    reporter = User.objects.create_user('reporter', password='reporter')
+    Task.objects.bulk_create([
+        Task(
+            name='task {}'.format(i), category=category, reporter=reporter,
+            priority=i % 5 + 1
+        )
+        for i in range(tasks_count)
+    ])
+    users = [
+        User.objects.create_user('worker{}'.format(i), password='worker')
+        for i in range(workers)
+    ]
+
+    sql, params = Task.objects.claimable(
+        category.pk
+    ).claim_order()[:1].query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        print('Claim query plan: {}'.format(cursor.fetchall()))
+
+    claims = []
+    conflicts = []
+
+    def work(user):
+        client = Client(
+            HTTP_AUTHORIZATION='Token {}'.format(user.auth_token.key)
+        )
+        while True:
+            response = client.post(
+                reverse('task-claim'), {'category': category.pk}
+            )
+            if response.status_code == 204:
+                break
+            if response.status_code == 409:
+                conflicts.append(user.pk)
+                continue
+            claims.append(response.data['id'])
+        connections.close_all()
+
+    threads = [threading.Thread(target=work, args=(u,)) for u in users]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    report('{} workers claiming {} tasks'.format(workers, tasks_count), [
+        ('total', elapsed),
+        ('per claim', elapsed / max(len(claims), 1)),
+    ])
+    print('  claims: {}, unique: {}, conflicts: {}'.format(
+        len(claims), len(set(claims)), len(conflicts)
+    ))
+    assert len(claims) == len(set(claims)) == tasks_count
+    assert not Task.objects.filter(status=enums.STATUS_TODO).exists()
+
+
+if __name__ == '__main__':
+    setup()
+
+    # Let claimers wait on the SQLite write lock instead of failing.
+    from django.db import connection
+    connection.settings_dict['OPTIONS']['timeout'] = 60
+
+    with test_database(os.path.join(tempfile.mkdtemp(), 'claim.sqlite3')):
+        run()
@@ -0,0 +1,62 @@
+'''
+Compare a 100 task page including event counts and last activity to a
+page followed by one event log request per task.
+'''
+from . import count_queries, measure, report, setup, test_database
+
+
+def run(tasks_count=1000, events_per_task=20, page_size=100):
+    from django.contrib.auth import get_user_model
+    from django.core.urlresolvers import reverse
+    from django.test import Client
+    from django.utils import timezone
+
+    from tasks import enums
+    from tasks.models import Task, TaskCategory, TaskEventLog
+
+    user = get_user_model().objects.create_user('bench', password='bench')
+    category = TaskCategory.objects.get(name='General')
+    Task.objects.bulk_create([
+        Task(name='task {}'.format(i), category=category, reporter=user)
+        for i in range(tasks_count)
+    ])
+    ids = list(Task.objects.values_list('pk', flat=True))
+    TaskEventLog.objects.bulk_create([
+        TaskEventLog(task_id=pk, user=user, event=enums.EVENT_EDITED)
+        for _ in range(events_per_task)
+        for pk in ids
+    ])
+    # bulk_create does not send post_save.
+    Task.objects.add_events(events_per_task, timezone.now())
+
+    client = Client(
+        HTTP_AUTHORIZATION='Token {}'.format(user.auth_token.key)
+    )
+    url = reverse('task-list')
+    query = {'page_size': page_size}
+
+    def per_task():
+        response = client.get(url, query)
+        for task in response.json()['results']:
+            client.get(reverse('task-event-log', kwargs={'pk': task['id']}))
+
+    def included():
+        client.get(url, dict(query, include='event_count,last_event_at'))
+
+    report(
+        '{} task page, {} events per task'.format(page_size, events_per_task),
+        [
+            ('page + event logs x{} ({} queries)'.format(
+                page_size, count_queries(per_task)
+            ), measure(per_task)),
+            ('page with include ({} queries)'.format(
+                count_queries(included)
+            ), measure(included)),
+        ]
+    )
+
+
+if __name__ == '__main__':
+    setup()
+    with test_database():
+        run()
@@ -0,0 +1,137 @@
+'''
+Compare subtree listing, rollups and cycle checks on 10 level deep task
+hierarchies read from the closure table to walking them level by level
+through `Task.parent`.
+'''
+from . import count_queries, measure, report, setup, test_database
+
+
+def run(trees=10, levels=10, branching=2):
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+
+    from tasks import enums
+    from tasks.models import Task, TaskCategory, TaskDependency, TaskTreePath
+
+    user = get_user_model().objects.create_user('bench', password='bench')
+    category = TaskCategory.objects.get(name='General')
+
+    # Build the trees a level at a time, with their paths.
+    ancestors = {}
+    level = [None] * trees
+    for depth in range(levels):
+        last_pk = Task.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        Task.objects.bulk_create([
+            Task(
+                name='task {} {}'.format(depth, i), category=category,
+                reporter=user, parent_id=parent_id,
+                status=enums.STATUS_DONE if i % 3 else enums.STATUS_TODO
+            )
+            for i, parent_id in enumerate(
+                parent_id for parent_id in level
+                for _ in range(1 if parent_id is None else branching)
+            )
+        ])
+        tasks = list(Task.objects.filter(pk__gt=last_pk).order_by(
+            'pk'
+        ).values_list('pk', 'parent_id'))
+        for pk, parent_id in tasks:
+            ancestors[pk] = [] if parent_id is None else [(parent_id, 1)] + [
+                (ancestor_id, ancestor_depth + 1)
+                for ancestor_id, ancestor_depth in ancestors[parent_id]
+            ]
+        level = [pk for pk, _ in tasks]
+    TaskTreePath.objects.bulk_create([
+        TaskTreePath(ancestor_id=ancestor_id, descendant_id=pk, depth=depth)
+        for pk, paths in ancestors.items()
+        for ancestor_id, depth in paths
+    ], batch_size=500)
+
+    root = Task.objects.filter(parent=None).order_by('pk').first()
+    leaf = Task.objects.filter(
+        ancestor_paths__ancestor=root, ancestor_paths__depth=levels - 1
+    ).first()
+
+    # A chain of blockers as deep as the trees.
+    chain = list(Task.objects.filter(
+        descendant_paths__descendant=leaf
+    ).order_by('pk')) + [leaf]
+    TaskDependency.objects.bulk_create([
+        TaskDependency(blocker=blocker, blocked=blocked)
+        for blocker, blocked in zip(chain, chain[1:])
+    ])
+
+    def walk(pks):
+        found = []
+        while pks:
+            pks = list(Task.objects.filter(parent__in=pks).values_list(
+                'pk', flat=True
+            ))
+            found.extend(pks)
+        return found
+
+    def subtree_closure():
+        list(Task.objects.filter(ancestor_paths__ancestor=root))
+
+    def subtree_walk():
+        list(Task.objects.filter(pk__in=walk([root.pk])))
+
+    def rollup_closure():
+        dict(TaskTreePath.objects.filter(ancestor=root).order_by(
+        ).values_list('descendant__status').annotate(count=Count('pk')))
+
+    def rollup_walk():
+        statuses = {}
+        for pk in walk([root.pk]):
+            task = Task.objects.get(pk=pk)
+            statuses[task.status] = statuses.get(task.status, 0) + 1
+
+    def cycle_closure():
+        TaskTreePath.objects.creates_cycle(root, leaf)
+
+    def cycle_walk():
+        task = leaf
+        while task is not None and task.pk != root.pk:
+            task = Task.objects.filter(pk=task.parent_id).first()
+
+    def move_subtree():
+        subtree = Task.objects.get(pk=leaf.pk)
+        for _ in range(levels // 2):
+            subtree = Task.objects.get(pk=subtree.parent_id)
+        parent_id = subtree.parent_id
+        subtree.parent_id = None
+        TaskTreePath.objects.move(subtree)
+        subtree.parent_id = parent_id
+        TaskTreePath.objects.move(subtree)
+
+    def dependency_cycle():
+        TaskDependency.objects.creates_cycle(leaf, chain[0])
+
+    report(
+        '{} trees of {} levels, {} tasks, {} paths'.format(
+            trees, levels, Task.objects.count(),
+            TaskTreePath.objects.count()
+        ),
+        [
+            ('{} ({} queries)'.format(label, count_queries(func)),
+             measure(func))
+            for label, func in (
+                ('subtree, closure', subtree_closure),
+                ('subtree, walk', subtree_walk),
+                ('rollup, closure', rollup_closure),
+                ('rollup, walk', rollup_walk),
+                ('cycle check, closure', cycle_closure),
+                ('cycle check, walk', cycle_walk),
+                ('move a subtree out and back', move_subtree),
+                ('blocker cycle check, recursive', dependency_cycle),
+            )
+        ]
+    )
+
+
+if __name__ == '__main__':
+    setup()
+    with test_database():
+        run()
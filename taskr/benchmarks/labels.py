@@ -0,0 +1,100 @@
+'''
+Compare finding the tasks with all of 3 labels through the label
+bitmaps to a chain of joins and to grouping the label rows of tasks.
+'''
+import random
+
+from . import count_queries, measure, report, setup, test_database
+
+
+def run(tasks_count=200000, labels_count=20, labels_per_task=4):
+    from django.contrib.auth import get_user_model
+    from django.core.urlresolvers import reverse
+    from django.db.models import Count
+    from django.test import Client
+
+    from tasks.models import Label, LabelBitmap, Task, TaskCategory
+
+    user = get_user_model().objects.create_user('bench', password='bench')
+    category = TaskCategory.objects.get(name='General')
+    Task.objects.bulk_create([
+        Task(name='task {}'.format(i), category=category, reporter=user)
+        for i in range(tasks_count)
+    ])
+    Label.objects.bulk_create([
+        Label(name='label {}'.format(i)) for i in range(labels_count)
+    ])
+    labels = list(Label.objects.values_list('pk', flat=True))
+
+    TaskLabel = Task.labels.through
+    rng = random.Random(0)
+    TaskLabel.objects.bulk_create([
+        TaskLabel(task_id=task_id, label_id=label_id)
+        for task_id in Task.objects.values_list('pk', flat=True).iterator()
+        for label_id in rng.sample(labels, labels_per_task)
+    ])
+    rebuild = measure(LabelBitmap.objects.rebuild, repeat=1)
+
+    some_labels = labels[:3]
+
+    def bitmaps():
+        LabelBitmap.objects.matching(all_of=some_labels)
+
+    def joins():
+        tasks = Task.objects.all()
+        for label_id in some_labels:
+            tasks = tasks.filter(labels=label_id)
+        list(tasks.values_list('pk', flat=True))
+
+    def group_by():
+        list(TaskLabel.objects.filter(label__in=some_labels).values(
+            'task_id'
+        ).annotate(labels=Count('label_id')).filter(
+            labels=len(some_labels)
+        ).values_list('task_id', flat=True))
+
+    client = Client(
+        HTTP_AUTHORIZATION='Token {}'.format(user.auth_token.key)
+    )
+
+    def page():
+        client.get(reverse('task-list'), {
+            'labels_all': ','.join(str(pk) for pk in some_labels),
+            'page_size': 100,
+        })
+
+    def unfiltered_page():
+        client.get(reverse('task-list'), {'page_size': 100})
+
+    task = Task.objects.first()
+
+    def relabel():
+        task.labels.add(labels[-1])
+        task.labels.remove(labels[-1])
+
+    report(
+        '{} tasks with {} of {} labels, {} with all of 3'.format(
+            tasks_count, labels_per_task, labels_count,
+            len(LabelBitmap.objects.matching(all_of=some_labels))
+        ),
+        [
+            ('rebuild all bitmaps', rebuild),
+        ] + [
+            ('{} ({} queries)'.format(label, count_queries(func)),
+             measure(func))
+            for label, func in (
+                ('all of 3, bitmaps', bitmaps),
+                ('all of 3, joins', joins),
+                ('all of 3, group by', group_by),
+                ('task page, bitmaps', page),
+                ('task page, unfiltered', unfiltered_page),
+                ('add and remove a label', relabel),
+            )
+        ]
+    )
+
+
+if __name__ == '__main__':
+    setup()
+    with test_database():
+        run()
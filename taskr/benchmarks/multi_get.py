@@ -0,0 +1,52 @@
+'''
+Compare fetching tasks with N single GET requests to one multi-get.
+'''
+from . import count_queries, measure, report, setup, test_database
+
+
+def run(counts=(10, 100, 300)):
+    from django.contrib.auth import get_user_model
+    from django.core.urlresolvers import reverse
+    from django.test import Client
+
+    from tasks.models import Task, TaskCategory
+
+    user = get_user_model().objects.create_user('bench', password='bench')
+    category = TaskCategory.objects.get(name='General')
+    Task.objects.bulk_create([
+        Task(name='task {}'.format(i), category=category, reporter=user)
+        for i in range(max(counts))
+    ])
+    ids = list(Task.objects.values_list('pk', flat=True))
+
+    client = Client(
+        HTTP_AUTHORIZATION='Token {}'.format(user.auth_token.key)
+    )
+
+    for count in counts:
+        some_ids = ids[:count]
+
+        def single():
+            for pk in some_ids:
+                client.get(reverse('task-detail', kwargs={'pk': pk}))
+
+        def multi():
+            client.get(
+                reverse('task-multi-get'),
+                {'ids': ','.join(str(pk) for pk in some_ids)}
+            )
+
+        report('{} tasks'.format(count), [
+            ('single GET x{} ({} queries)'.format(
+                count, count_queries(single)
+            ), measure(single)),
+            ('multi-get ({} queries)'.format(
+                count_queries(multi)
+            ), measure(multi)),
+        ])
+
+
+if __name__ == '__main__':
+    setup()
+    with test_database():
+        run()
@@ -0,0 +1,111 @@
+'''
+Change the status of a task with many watchers, queuing the event to the
+notification outbox next to notifying the watchers in the request, then
+time the processnotifications worker draining the outbox in this process
+and across a pool.
+'''
+import os
+import tempfile
+import time
+
+from . import measure, report, setup, test_database
+
+
+def run(watchers_count=10000, events_count=20, processes=2):
+    from django.contrib.auth import get_user_model
+    from django.core.urlresolvers import reverse
+    from django.test import Client
+
+    from tasks import enums
+    from tasks.models import (
+        Notification, NotificationOutboxItem, Task, TaskCategory,
+        TaskEventLog, TaskWatcher
+    )
+    from tasks.notifications import (
+        create_notifications, notification_pool, process_outbox
+    )
+
+    User = get_user_model()
+    category = TaskCategory.objects.get(name='General')
+    user = User.objects.create_user('bench', password='bench')
+    User.objects.bulk_create([
+        User(username='watcher{}'.format(i)) for i in range(watchers_count)
+    ])
+    task = Task.objects.create(
+        name='popular', category=category, reporter=user
+    )
+    TaskWatcher.objects.bulk_create([
+        TaskWatcher(task=task, user_id=pk)
+        for pk in User.objects.exclude(pk=user.pk).values_list('pk', flat=True)
+    ])
+
+    client = Client(
+        HTTP_AUTHORIZATION='Token {}'.format(user.auth_token.key)
+    )
+    statuses = [enums.STATUS_IN_PROGRESS, enums.STATUS_TODO]
+
+    def change_status():
+        statuses.reverse()
+        client.post(
+            reverse('task-change-status', kwargs={'pk': task.pk}),
+            {'status': statuses[0]}
+        )
+
+    def change_status_and_notify():
+        change_status()
+        event_id = task.events.last().pk
+        create_notifications([
+            (user_id, event_id)
+            for user_id in task.watchers.values_list('user_id', flat=True)
+        ])
+
+    queued = measure(change_status)
+    inline = measure(change_status_and_notify)
+
+    TaskEventLog.objects.bulk_create([
+        TaskEventLog(task=task, user=user, event=enums.EVENT_EDITED)
+        for _ in range(events_count)
+    ])
+    events = list(task.events.order_by('-pk')[:events_count])
+
+    def drain(processes):
+        Notification.objects.all().delete()
+        NotificationOutboxItem.objects.all().delete()
+        NotificationOutboxItem.objects.queue(events)
+        with notification_pool(processes) as pool:
+            start = time.time()
+            process_outbox(pool=pool)
+            elapsed = time.time() - start
+        assert not NotificationOutboxItem.objects.exists()
+        assert Notification.objects.count() == \
+            events_count * watchers_count
+        return elapsed
+
+    in_process = drain(1)
+    pooled = drain(processes)
+
+    report(
+        'Task with {} watchers, outbox of {} events'.format(
+            watchers_count, events_count
+        ),
+        [
+            ('status change, queued', queued),
+            ('status change, notified in request', inline),
+            ('drain outbox, 1 process', in_process),
+            ('drain outbox, {} processes'.format(processes), pooled),
+        ]
+    )
+    print('{:.0f} notifications/s in process, {:.0f}/s pooled.'.format(
+        events_count * watchers_count / in_process,
+        events_count * watchers_count / pooled
+    ))
+
+
+if __name__ == '__main__':
+    setup()
+
+    # The pool processes share the database, it cannot be in memory.
+    with test_database(
+        os.path.join(tempfile.mkdtemp(), 'notifications.sqlite3')
+    ):
+        run()
@@ -0,0 +1,78 @@
+'''
+Compare the full and API-only settings profiles: cold start of
+`get_wsgi_application()`, and the per-request cost of a trivial view
+through the whole middleware stack.
+
+Each measurement runs in a fresh interpreter.
+'''
+import os
+import subprocess
+import sys
+import time
+
+from . import report
+
+PROFILES = ('config.settings', 'config.settings_api')
+
+
+def cold_start():
+    start = time.time()
+
+    from django.core.wsgi import get_wsgi_application
+    get_wsgi_application()
+
+    return time.time() - start
+
+
+def request_overhead(requests=2000):
+    from wsgiref.util import setup_testing_defaults
+
+    from django.core.wsgi import get_wsgi_application
+    application = get_wsgi_application()
+
+    def start_response(status, headers):
+        assert status.startswith('200'), status
+
+    def get():
+        environ = {'PATH_INFO': '/check/', 'REQUEST_METHOD': 'GET'}
+        setup_testing_defaults(environ)
+        for _ in application(environ, start_response):
+            pass
+
+    # Warm up lazy imports and URL resolver caches.
+    get()
+
+    start = time.time()
+    for _ in range(requests):
+        get()
+    return (time.time() - start) / requests
+
+
+def child(profile, measurement):
+    os.environ['DJANGO_SETTINGS_MODULE'] = profile
+    print(globals()[measurement]())
+
+
+def measure_in_child(profile, measurement, repeat):
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.startup', profile, measurement]
+        )
+        timings.append(float(output))
+    return min(timings)
+
+
+def run(repeat=5):
+    for measurement in ('cold_start', 'request_overhead'):
+        report(measurement, [
+            (profile, measure_in_child(profile, measurement, repeat))
+            for profile in PROFILES
+        ])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        child(*sys.argv[1:])
+    else:
+        run()
@@ -0,0 +1,75 @@
+'''
+Deliver webhook events to a local stand-in receiver taking a few
+milliseconds per request, with and without keep-alive connections,
+batching and concurrent requests.
+'''
+import time
+
+from . import setup, test_database
+
+
+def run(events_count=2000, latency=0.002):
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+
+    from tasks import enums
+    from tasks.models import Task, TaskCategory, TaskEventLog
+    from webhooks import enums as webhook_enums
+    from webhooks.delivery import Deliverer
+    from webhooks.models import Webhook, WebhookDelivery
+    from webhooks.testing import StandInServer
+
+    User = get_user_model()
+    user = User.objects.create_user('bench', password='bench')
+    task = Task.objects.create(
+        name='task', category=TaskCategory.objects.get(name='General'),
+        reporter=user
+    )
+    TaskEventLog.objects.bulk_create([
+        TaskEventLog(task=task, user=user, event=enums.EVENT_EDITED)
+        for _ in range(events_count)
+    ])
+
+    print('{} events, receiver taking {:.0f} ms per request'.format(
+        events_count, latency * 1000
+    ))
+    for keep_alive, batch_size, max_in_flight in (
+        (False, 1, 1),
+        (True, 1, 1),
+        (True, 1, 8),
+        (True, 50, 1),
+        (True, 50, 4),
+    ):
+        # The stand-in receiver listens on the loopback address.
+        with StandInServer(latency=latency, keep_alive=keep_alive) as server, \
+                override_settings(WEBHOOKS_ALLOW_PRIVATE_ADDRESSES=True):
+            Webhook.objects.all().delete()
+            Webhook.objects.create(
+                owner=user, url=server.url, batch_size=batch_size,
+                max_in_flight=max_in_flight
+            )
+            WebhookDelivery.objects.queue(TaskEventLog.objects.all())
+
+            deliverer = Deliverer()
+            start = time.time()
+            while deliverer.deliver_due()[0]:
+                pass
+            elapsed = time.time() - start
+            deliverer.close()
+
+        assert not WebhookDelivery.objects.exclude(
+            status=webhook_enums.DELIVERY_DELIVERED
+        ).exists()
+        print('  {:<44} {:>8.0f} events/s {:>5} connection(s)'.format(
+            '{}, {} per request, {} in flight'.format(
+                'keep-alive' if keep_alive else 'new connections',
+                batch_size, max_in_flight
+            ),
+            events_count / elapsed, server.connections
+        ))
+
+
+if __name__ == '__main__':
+    setup()
+    with test_database():
+        run()
@@ -0,0 +1,241 @@
+import json
+import logging
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.urlresolvers import (
+    NoReverseMatch, Resolver404, resolve, reverse
+)
+from django.db import transaction
+from django.utils.six import string_types
+from django.utils.six.moves.urllib.parse import urlencode, urlsplit
+
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+logger = logging.getLogger('django.request')
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# The value of {"$ref": "<operation index>.<key>[.<key>...]"}.
+REFERENCE = re.compile(r'^(\d+)\.(.+)$')
+
+
+class OperationError(Exception):
+    pass
+
+
+def dereference(value, results):
+    '''
+    Replace references to the response data of earlier operations.
+    '''
+    if isinstance(value, dict) and list(value) == ['$ref']:
+        return lookup(value['$ref'], results)
+    if isinstance(value, dict):
+        return {
+            key: dereference(item, results) for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [dereference(item, results) for item in value]
+    return value
+
+
+def lookup(reference, results):
+    '''
+    The response data of an earlier operation `reference` refers to.
+    '''
+    match = REFERENCE.match(reference) \
+        if isinstance(reference, string_types) else None
+    if match is None:
+        raise OperationError(
+            '{} is not a reference, references look like "0.id".'.format(
+                json.dumps(reference)
+            )
+        )
+
+    index = int(match.group(1))
+    if index >= len(results) or results[index]['status'] >= 400:
+        raise OperationError(
+            '{} refers to an operation that did not succeed.'.format(
+                reference
+            )
+        )
+    data = results[index]['body']
+    for key in match.group(2).split('.'):
+        try:
+            data = data[int(key) if isinstance(data, list) else key]
+        except (IndexError, KeyError, TypeError, ValueError):
+            raise OperationError('{} does not exist.'.format(reference))
+    return data
+
+
+def build_request(request, method, path, query, body):
+    '''
+    A request for `path` carrying the headers of `request`, the batch
+    request.
+    '''
+    payload = b'' if body is None else json.dumps(body).encode('utf-8')
+    environ = dict(request.META)
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.input': BytesIO(payload),
+    })
+    return WSGIRequest(environ)
+
+
+class Batch(APIView):
+    '''
+    Run several API operations in one request.
+
+    Takes a list of `operations`, each with a `method`, either a `url`
+    or a `view` name and its `kwargs`, and optionally a `query` and a
+    JSON `body`. References of the form {"$ref": "<n>.<key>"} in
+    kwargs, query and body are replaced by that key of the response of
+    operation n, so a task can be created and assigned in one batch:
+
+        {"operations": [
+            {"method": "POST", "view": "task-list", "body": {...}},
+            {"method": "POST", "view": "task-assign",
+             "kwargs": {"pk": {"$ref": "0.id"}}, "body": {"user": 2}}
+        ]}
+
+    Operations run in order, in process, as the authenticated user,
+    without the middleware of a request. Only API views can be run. With
+    `atomic` they run in one transaction that is rolled back as soon as
+    one fails, the remaining ones are not run. An operation raising an
+    error fails with a 500 status.
+
+    Returns the `status` and `body` of each operation in order, and
+    whether the batch was `rolled_back`.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        operations = request.data.get('operations') \
+            if isinstance(request.data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            raise ValidationError({'operations': 'A list is required.'})
+        if len(operations) > settings.BATCH_MAX_OPERATIONS:
+            raise ValidationError({
+                'operations': 'At most {} operations are allowed.'.format(
+                    settings.BATCH_MAX_OPERATIONS
+                )
+            })
+        for operation in operations:
+            if not isinstance(operation, dict) or \
+                    operation.get('method') not in METHODS or \
+                    ('url' in operation) == ('view' in operation):
+                raise ValidationError({'operations': (
+                    'Each operation needs a method of {} and a url or '
+                    'view.'.format(', '.join(METHODS))
+                )})
+
+        results = []
+        rolled_back = False
+        if request.data.get('atomic'):
+            with transaction.atomic():
+                for operation in operations:
+                    results.append(self.run(request, operation, results))
+                    if results[-1]['status'] >= 400:
+                        transaction.set_rollback(True)
+                        rolled_back = True
+                        break
+            results.extend([error(
+                status.HTTP_424_FAILED_DEPENDENCY,
+                'Not run, an earlier operation failed.'
+            )] * (len(operations) - len(results)))
+        else:
+            for operation in operations:
+                results.append(self.run(request, operation, results))
+
+        # Create response object.
+        response = {}
+        response['responses'] = results
+        response['rolled_back'] = rolled_back
+
+        return Response(response, status=status.HTTP_200_OK)
+
+    def run(self, request, operation, results):
+        try:
+            path, query, body = self.resolve_operation(operation, results)
+            match = resolve(path)
+        except OperationError as e:
+            return error(status.HTTP_400_BAD_REQUEST, '{}'.format(e))
+        except (NoReverseMatch, Resolver404):
+            return error(status.HTTP_404_NOT_FOUND, 'Not found.')
+        view_class = getattr(match.func, 'view_class', None)
+        if view_class is Batch:
+            return error(
+                status.HTTP_400_BAD_REQUEST, 'Batches cannot be nested.'
+            )
+        # Other views may depend on middleware batches do not run.
+        if not isinstance(view_class, type) or \
+                not issubclass(view_class, APIView):
+            return error(
+                status.HTTP_400_BAD_REQUEST,
+                'Only API operations can be batched.'
+            )
+
+        sub_request = build_request(
+            request._request, operation['method'], path, query, body
+        )
+        sub_request.resolver_match = match
+        # Authenticated once, for the whole batch.
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+
+        try:
+            sub_response = match.func(
+                sub_request, *match.args, **match.kwargs
+            )
+        except Exception:
+            # Fails this operation only, as a request would.
+            logger.exception(
+                'Internal Server Error: %s', path,
+                extra={'status_code': 500, 'request': sub_request}
+            )
+            return error(
+                status.HTTP_500_INTERNAL_SERVER_ERROR,
+                'A server error occurred.'
+            )
+        if hasattr(sub_response, 'data'):
+            body = sub_response.data
+        elif sub_response.get('Content-Type', '').startswith(
+            'application/json'
+        ):
+            body = json.loads(sub_response.content.decode('utf-8'))
+        else:
+            body = sub_response.content.decode('utf-8')
+        return {'status': sub_response.status_code, 'body': body}
+
+    def resolve_operation(self, operation, results):
+        query = urlencode(
+            dereference(operation.get('query') or {}, results), doseq=True
+        )
+        body = dereference(operation.get('body'), results)
+        if 'view' in operation:
+            path = reverse(
+                operation['view'],
+                kwargs=dereference(operation.get('kwargs') or {}, results)
+            )
+        else:
+            url = urlsplit(operation['url'])
+            path = url.path
+            query = '&'.join(part for part in (url.query, query) if part)
+        return path, query, body
+
+
+def error(status_code, detail):
+    return {'status': status_code, 'body': {'detail': detail}}
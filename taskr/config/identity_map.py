@@ -0,0 +1,143 @@
+import threading
+
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+from rest_framework.relations import PrimaryKeyRelatedField
+
+
+_local = threading.local()
+
+
+class IdentityMap(object):
+    '''
+    Model instances by (model, pk), so a row is fetched once however
+    many times it is looked up.
+
+    An instance is only returned for the querysets it was found in, so
+    a task loaded through `Task.all_objects` is not found through the
+    default manager once soft-deleted. Every instance is in the table,
+    unfiltered querysets return any instance held.
+
+    Writes done through querysets (`update()`, `delete()`) bypass the
+    instances held here, `discard` them or `add` the fresh rows.
+    '''
+    def __init__(self):
+        self.instances = {}
+        # Filtered querysets each instance was found in, by key.
+        self.scopes = {}
+
+    def key(self, model, pk):
+        try:
+            return (model._meta.concrete_model, model._meta.pk.to_python(pk))
+        except ValidationError:
+            return None
+
+    def scope(self, queryset):
+        '''
+        The SQL of `queryset`, None if it is not filtered.
+        '''
+        if not queryset.query.where:
+            return None
+        sql, params = queryset.query.sql_with_params()
+        return sql, tuple(params)
+
+    def add(self, *instances):
+        '''
+        Hold instances as found through their default manager.
+        '''
+        for instance in instances:
+            model = type(instance)
+            key = self.key(model, instance.pk)
+            self.instances[key] = instance
+            self.scopes[key] = {self.scope(model._default_manager.all())}
+
+    def discard(self, model, *pks):
+        for pk in pks:
+            self.instances.pop(self.key(model, pk), None)
+            self.scopes.pop(self.key(model, pk), None)
+
+    def get(self, model, pk, queryset=None):
+        '''
+        The instance of `model` with `pk`, from `queryset` (the default
+        manager by default) if it was not found in it yet.
+        '''
+        if queryset is None:
+            queryset = model._default_manager.all()
+        key = self.key(model, pk)
+        scope = self.scope(queryset)
+        if key in self.instances and (
+            scope is None or scope in self.scopes[key]
+        ):
+            return self.instances[key]
+
+        instance = queryset.get(pk=pk)
+        if key is None or key not in self.instances:
+            key = self.key(model, instance.pk)
+            self.instances[key] = instance
+            self.scopes[key] = set()
+        self.scopes[key].add(scope)
+        return self.instances[key]
+
+    def get_object_or_404(self, model, pk, queryset=None):
+        try:
+            return self.get(model, pk, queryset)
+        except model.DoesNotExist:
+            raise Http404('No {} matches the given query.'.format(
+                model._meta.object_name
+            ))
+
+    def get_related(self, instance, name):
+        '''
+        The instance a foreign key of `instance` points to, found like
+        Django does through the base manager of the related model.
+        '''
+        field = instance._meta.get_field(name)
+        if hasattr(instance, field.get_cache_name()):
+            return getattr(instance, name)
+
+        pk = getattr(instance, field.attname)
+        model = field.related_model
+        related = None if pk is None else self.get(
+            model, pk, model._base_manager.all()
+        )
+        setattr(instance, name, related)
+        return related
+
+
+def current():
+    '''
+    Identity map of the current request, or an empty one outside of
+    requests.
+    '''
+    identity_map = getattr(_local, 'identity_map', None)
+    return identity_map if identity_map is not None else IdentityMap()
+
+
+class IdentityMapMiddleware(object):
+    '''
+    Give each request its own identity map, dropped when it ends.
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.identity_map = IdentityMap()
+        try:
+            return self.get_response(request)
+        finally:
+            _local.identity_map = None
+
+
+class IdentityMapRelatedField(PrimaryKeyRelatedField):
+    '''
+    Primary key related field resolved through the identity map.
+    '''
+    def to_internal_value(self, data):
+        queryset = self.get_queryset()
+        try:
+            return current().get(queryset.model, data, queryset)
+        except queryset.model.DoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
@@ -1,5 +1,204 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.paginator import (
+    EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator
+)
+from django.db import connections
+from django.utils import six
+from django.utils.encoding import force_bytes
+from django.utils.functional import cached_property
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from ops import metrics
+
+
+def cached_count(queryset, max_age=60):
+    '''
+    Count of `queryset`, served from the cache.
+
+    Counts older than `max_age` seconds are still returned while a
+    background thread refreshes them, so only the very first request
+    for a given query waits on COUNT(*).
+    '''
+    key = 'count:{}:{}'.format(
+        queryset.db,
+        hashlib.md5(force_bytes(str(queryset.query))).hexdigest()
+    )
+
+    cached = cache.get(key)
+    metrics.inc(
+        'taskr_cache_requests_total', cache='count',
+        result='miss' if cached is None else 'hit'
+    )
+    if cached is None:
+        count = queryset.count()
+        cache.set(key, (count, time.time()), None)
+        return count
+
+    count, counted_at = cached
+    if time.time() - counted_at > max_age and cache.add(
+        key + ':refreshing', True, max_age
+    ):
+        thread = threading.Thread(target=refresh_count, args=(queryset, key))
+        thread.daemon = True
+        thread.start()
+
+    return count
+
+
+def refresh_count(queryset, key):
+    try:
+        cache.set(key, (queryset.count(), time.time()), None)
+    finally:
+        cache.delete(key + ':refreshing')
+        connections[queryset.db].close()
+
+
+class CachedCountPaginator(Paginator):
+    '''
+    Paginator whose count comes from `cached_count`.
+    '''
+    max_age = 60
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return len(self.object_list)
+        return cached_count(self.object_list, self.max_age)
+
+
+class CountlessPage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super(CountlessPage, self).__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CountlessPaginator(Paginator):
+    '''
+    Paginator that never counts. Each page is fetched with one extra row
+    to tell whether there is a next page.
+    '''
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage('That page contains no results')
+        return CountlessPage(
+            object_list[:self.per_page], number, self,
+            has_next=len(object_list) > self.per_page
+        )
 
 
 class CustomPagination(PageNumberPagination):
+    '''
+    Page number pagination with a client selectable page size, up to
+    `max_page_size`.
+
+    The `count` query parameter selects how the total is computed:
+      - exact: COUNT(*) for every page
+      - cached: from `cached_count`, refreshed in the background
+      - none: not computed, and left out of the response
+    '''
     page_size = 3
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    count_query_param = 'count'
+    count_mode = 'exact'
+    paginator_classes = {
+        'exact': Paginator,
+        'cached': CachedCountPaginator,
+        'none': CountlessPaginator,
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = self.get_count_mode(request)
+        self.django_paginator_class = self.paginator_classes[self.count_mode]
+
+        if self.count_mode != 'none':
+            return super(CustomPagination, self).paginate_queryset(
+                queryset, request, view
+            )
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = request.query_params.get(self.page_query_param, 1)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=six.text_type(exc)
+            )
+            raise NotFound(msg)
+
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.count_mode != 'none':
+            return super(CustomPagination, self).get_paginated_response(data)
+
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_count_mode(self, request):
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode in self.paginator_classes:
+            return count_mode
+        return self.count_mode
+
+    def get_fields(self, view):
+        return super(CustomPagination, self).get_fields(view) + [
+            self.count_query_param
+        ]
+
+
+class FeedPagination(CursorPagination):
+    '''
+    Cursor pagination, newest first by id, with a client selectable
+    page size up to `max_page_size`.
+
+    Pages cost the same however deep a client reads, and rows added
+    while it reads do not shift them.
+    '''
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
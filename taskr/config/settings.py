@@ -41,16 +41,23 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'users',
     'tasks',
+    'ops',
+    'webhooks',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ops.context.ViewContextMiddleware',
+    'ops.metrics.MetricsMiddleware',
+    'config.identity_map.IdentityMapMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ops.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -79,7 +86,7 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'ops.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
@@ -132,6 +139,136 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.TokenAuthentication',
     ),
-    # 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    # 'PAGE_SIZE': 2
+    'DEFAULT_PAGINATION_CLASS': 'config.paginators.CustomPagination',
+}
+
+# Most operations run by one batch request.
+BATCH_MAX_OPERATIONS = 20
+
+
+# Users Settings
+
+# Most users provisioned in one request.
+USERS_BULK_MAX_USERS = 1000
+
+
+# Tasks Settings
+
+# Change feed page size, and the longest a client may long poll for
+# changes (in seconds) along with how often the database is polled.
+TASKS_CHANGES_PAGE_SIZE = 100
+TASKS_CHANGES_MAX_PAGE_SIZE = 500
+TASKS_CHANGES_MAX_WAIT = 30
+TASKS_CHANGES_POLL_INTERVAL = 0.5
+
+# Seconds after which a background job purges a deleted task, None to
+# leave deleted tasks to the purgetasks command.
+TASKS_PURGE_DELAY = 24 * 60 * 60
+
+# Most tasks that can be fetched in one multi-get request.
+TASKS_MULTI_GET_MAX_IDS = 300
+
+# Tasks a claimer tries before giving up when others keep winning.
+TASKS_CLAIM_ATTEMPTS = 10
+
+# Edits of a task by the same user are merged into one event log while
+# they come within this many seconds of each other (0 to log them all).
+TASKS_EVENT_COALESCE_WINDOW = 60
+
+# Versions of a task between full snapshots in its history, the most
+# rows read to rebuild the task as of any time.
+TASKS_VERSION_SNAPSHOT_INTERVAL = 20
+
+# Times a version is numbered again when a concurrent writer of the task
+# took its number.
+TASKS_VERSION_ATTEMPTS = 3
+
+# Processes of the processnotifications worker creating notifications
+# (None for one per CPU).
+TASKS_NOTIFICATION_PROCESSES = None
+
+
+# Webhooks Settings
+
+# Seconds a webhook request may take, and the most attempts at delivering
+# an event, retried after WEBHOOKS_RETRY_BACKOFF seconds doubled after
+# each failed attempt up to WEBHOOKS_RETRY_MAX_BACKOFF.
+WEBHOOKS_TIMEOUT = 10
+WEBHOOKS_MAX_ATTEMPTS = 10
+WEBHOOKS_RETRY_BACKOFF = 30
+WEBHOOKS_RETRY_MAX_BACKOFF = 3600
+
+# Seconds a deliverer holds the deliveries it claimed, sent again by
+# another deliverer if their outcome was not recorded by then.
+WEBHOOKS_LEASE = 600
+
+# Whether webhooks may point at loopback, private, link-local and other
+# non-public addresses, which users could otherwise probe the internal
+# network with.
+WEBHOOKS_ALLOW_PRIVATE_ADDRESSES = False
+
+
+# Jobs Settings
+
+# Jobs a runjobs worker runs at a time, and the seconds it leases them
+# for (renewed while they run, taken over by other workers once
+# expired). Queued jobs are polled for every JOBS_POLL_INTERVAL seconds.
+JOBS_CONCURRENCY = 4
+JOBS_LEASE = 60
+JOBS_POLL_INTERVAL = 1
+
+# Most times a job is started, by default, and the seconds before the
+# first retry of a failed job, doubled for each further retry.
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_BACKOFF = 10
+
+
+# Ops Settings
+
+# Where request profiles are stored, and how many are kept.
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_MAX_FILES = 500
+
+# Profile 1 in N requests to the views of these modules, 0 to disable.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_MODULES = ('tasks.views', 'users.views')
+
+# Where each worker process writes its metrics, and how often (in
+# seconds) it does so.
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+METRICS_FLUSH_INTERVAL = 5
+
+# Token scrapers send as "Authorization: Bearer <token>" to read the
+# metrics, None to only let staff users read them.
+METRICS_SCRAPE_TOKEN = None
+
+# Log statements slower than this many milliseconds, None to disable,
+# with their parameters (or only their types when redacted) and the
+# query plan of SELECTs.
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_REDACT_PARAMS = True
+SLOW_QUERY_EXPLAIN = True
+
+# Slow queries go to a rotating log of at most 5 x 10MB.
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slowqueries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slowqueries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'taskr.slowqueries': {
+            'handlers': ['slowqueries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
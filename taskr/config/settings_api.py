@@ -0,0 +1,53 @@
+"""
+API-only settings for taskr.
+
+Token authenticated API workers never use the admin, sessions, messages,
+static files, CSRF or clickjacking protection, so this profile leaves
+them out of INSTALLED_APPS and MIDDLEWARE. Only JSON is rendered, so no
+templates are configured either.
+
+Select it with DJANGO_SETTINGS_MODULE=config.settings_api. The admin is
+served by config.wsgi_admin with the full config.settings.
+"""
+
+from .settings import *  # noqa
+
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'rest_framework.authtoken',
+    'users',
+    'tasks',
+    'ops',
+    'webhooks',
+    'jobs',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'ops.context.ViewContextMiddleware',
+    'ops.metrics.MetricsMiddleware',
+    'config.identity_map.IdentityMapMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'ops.profiling.ProfilingMiddleware',
+]
+
+ROOT_URLCONF = 'config.urls_api'
+
+TEMPLATES = []
+
+
+# Rest Framework Settings
+
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,
+    DEFAULT_AUTHENTICATION_CLASSES=(
+        'rest_framework.authentication.BasicAuthentication',
+        'rest_framework.authentication.TokenAuthentication',
+    ),
+    DEFAULT_RENDERER_CLASSES=(
+        'rest_framework.renderers.JSONRenderer',
+    ),
+)
@@ -16,6 +16,8 @@ Including another URLconf
 from django.conf.urls import url, include
 from django.contrib import admin
 
+from .batch import Batch
+
 urlpatterns = [
     url(r'^admin/', admin.site.urls),
 
@@ -28,4 +30,12 @@ urlpatterns = [
 
     url(r'', include('users.urls')),
 
+    url(r'', include('ops.urls')),
+
+    url(r'', include('webhooks.urls')),
+
+    url(r'', include('jobs.urls')),
+
+    url(r'^batch/$', Batch.as_view(), name='batch'),
+
 ]
@@ -0,0 +1,23 @@
+"""taskr API-only URL Configuration
+
+Used by config.settings_api, the admin and the browsable API login views
+are left out. See config.urls for the full configuration.
+"""
+from django.conf.urls import url, include
+
+from .batch import Batch
+
+urlpatterns = [
+    url(r'', include('tasks.urls')),
+
+    url(r'', include('users.urls')),
+
+    url(r'', include('ops.urls')),
+
+    url(r'', include('webhooks.urls')),
+
+    url(r'', include('jobs.urls')),
+
+    url(r'^batch/$', Batch.as_view(), name='batch'),
+
+]
@@ -3,6 +3,9 @@ WSGI config for taskr project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+Set DJANGO_SETTINGS_MODULE=config.settings_api for API-only workers, the
+admin is then served by config.wsgi_admin.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/1.10/howto/deployment/wsgi/
 """
@@ -11,6 +14,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from ops import metrics
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# Only web workers write their metrics, for the metrics endpoint.
+metrics.enable()
@@ -0,0 +1,23 @@
+"""
+WSGI config for the taskr admin.
+
+Always uses the full config.settings, so that API workers can run
+config.wsgi with config.settings_api while the admin is served
+separately.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/1.10/howto/deployment/wsgi/
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+from ops import metrics
+
+os.environ["DJANGO_SETTINGS_MODULE"] = "config.settings"
+
+application = get_wsgi_application()
+
+# Only web workers write their metrics, for the metrics endpoint.
+metrics.enable()
@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from config.paginators import CachedCountPaginator
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'name', 'owner', 'status', 'attempts', 'run_after',
+        'started_on', 'finished_on', 'worker'
+    )
+    list_select_related = ('owner',)
+    list_filter = ('status', 'name')
+    raw_id_fields = ('owner',)
+    date_hierarchy = 'created_on'
+
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+
+admin.site.register(Job, JobAdmin)
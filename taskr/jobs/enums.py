@@ -0,0 +1,14 @@
+
+# Job Status
+
+JOB_QUEUED = 1
+JOB_RUNNING = 2
+JOB_SUCCEEDED = 3
+JOB_FAILED = 4
+
+JOB_STATUS_CHOICES = (
+    (JOB_QUEUED, 'Queued'),
+    (JOB_RUNNING, 'Running'),
+    (JOB_SUCCEEDED, 'Succeeded'),
+    (JOB_FAILED, 'Failed'),
+)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.worker import POOLS, Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pool', choices=POOLS, default='thread',
+            help='Run jobs on threads, processes, or one at a time in '
+                 'this thread.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOBS_CONCURRENCY,
+            help='Number of jobs run at the same time.'
+        )
+        parser.add_argument(
+            '--lease', type=int, default=settings.JOBS_LEASE,
+            help='Seconds a job is leased to this worker, renewed while '
+                 'it runs.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Stop once no jobs are due nor running.'
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            pool=options['pool'],
+            concurrency=options['concurrency'],
+            lease=options['lease'],
+            log=self.stdout.write if options['verbosity'] > 1 else None
+        )
+        counts = worker.run(once=options['once'])
+
+        self.stdout.write(
+            '{succeeded} job(s) succeeded, {retried} retried, {failed} '
+            'failed, {lost} lost.'.format(**counts)
+        )
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 22:57
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('name', models.CharField(help_text='Name the job function is registered under', max_length=100, verbose_name='Name')),
+                ('kwargs', models.TextField(default='{}', help_text='Keyword arguments of the job function, as JSON', verbose_name='Keyword arguments')),
+                ('status', models.PositiveIntegerField(choices=[(1, 'Queued'), (2, 'Running'), (3, 'Succeeded'), (4, 'Failed')], default=1, help_text='The job status', verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of times the job was started', verbose_name='Attempts')),
+                ('max_attempts', models.PositiveIntegerField(default=1, help_text='Number of times the job is started before it fails', verbose_name='Max attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='When the job is started next, while queued', verbose_name='Run after')),
+                ('worker', models.CharField(blank=True, help_text='The worker that last started the job', max_length=100, verbose_name='Worker')),
+                ('lease', models.CharField(blank=True, db_index=True, help_text='Token of the current claim of the job', max_length=32, verbose_name='Lease')),
+                ('lease_expires_on', models.DateTimeField(blank=True, help_text='When the job can be taken over, unless renewed', null=True, verbose_name='Lease expires on')),
+                ('started_on', models.DateTimeField(blank=True, help_text='When the job was last started', null=True, verbose_name='Started on')),
+                ('finished_on', models.DateTimeField(blank=True, help_text='When the job succeeded or failed for good', null=True, verbose_name='Finished on')),
+                ('result', models.TextField(blank=True, help_text='Return value of the job function, as JSON', verbose_name='Result')),
+                ('error', models.TextField(blank=True, help_text='Traceback of the last failed attempt', verbose_name='Error')),
+                ('owner', models.ForeignKey(blank=True, help_text='The user who started the job, if any', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name='Owner')),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='job',
+            index_together=set([('status', 'lease_expires_on'), ('status', 'run_after')]),
+        ),
+    ]
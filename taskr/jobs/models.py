@@ -0,0 +1,224 @@
+from __future__ import unicode_literals
+
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .enums import (
+    JOB_STATUS_CHOICES, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED
+)
+
+
+class JobManager(models.Manager):
+
+    def due(self, now=None):
+        '''
+        Jobs to run: queued ones whose time has come, and running ones
+        whose worker let the lease expire, presumably as it died.
+        '''
+        now = now or timezone.now()
+        return self.filter(
+            Q(status=JOB_QUEUED, run_after__lte=now) |
+            Q(status=JOB_RUNNING, lease_expires_on__lt=now)
+        )
+
+    def claim(self, worker, limit, lease=None):
+        '''
+        Lease up to `limit` due jobs to `worker` for `lease` seconds
+        (JOBS_LEASE by default), oldest first.
+
+        The jobs are taken with one UPDATE conditioned on them still
+        being due, so of several workers claiming the same job only one
+        gets it. Each claim gets a new lease token, which the worker
+        renews and finishes the job with; a worker whose lease expired
+        cannot finish a job another worker took over.
+        '''
+        now = timezone.now()
+        candidates = list(self.due(now).order_by(
+            'run_after', 'pk'
+        ).values_list('pk', flat=True)[:limit])
+        if not candidates:
+            return []
+
+        token = uuid.uuid4().hex
+        self.due(now).filter(pk__in=candidates).update(
+            status=JOB_RUNNING,
+            worker=worker,
+            lease=token,
+            lease_expires_on=now + timedelta(
+                seconds=lease or settings.JOBS_LEASE
+            ),
+            attempts=F('attempts') + 1,
+            started_on=now
+        )
+        return list(self.filter(lease=token).order_by('run_after', 'pk'))
+
+    def renew(self, jobs, lease=None):
+        '''
+        Extend the leases of running `jobs`, returns the jobs whose
+        lease was lost.
+        '''
+        expires_on = timezone.now() + timedelta(
+            seconds=lease or settings.JOBS_LEASE
+        )
+        lost = []
+        for job in jobs:
+            if not self.filter(pk=job.pk, lease=job.lease).update(
+                lease_expires_on=expires_on
+            ):
+                lost.append(job)
+        return lost
+
+
+class Job(models.Model):
+    '''
+    A call of a registered job function with JSON keyword arguments,
+    run by the `runjobs` worker.
+
+    See `jobs.registry` to register and enqueue jobs.
+    '''
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    name = models.CharField(
+        max_length=100,
+        verbose_name='Name',
+        help_text='Name the job function is registered under'
+    )
+
+    kwargs = models.TextField(
+        default='{}',
+        verbose_name='Keyword arguments',
+        help_text='Keyword arguments of the job function, as JSON'
+    )
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='jobs',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        verbose_name='Owner',
+        help_text='The user who started the job, if any'
+    )
+
+    status = models.PositiveIntegerField(
+        choices=JOB_STATUS_CHOICES,
+        default=JOB_QUEUED,
+        verbose_name='Status',
+        help_text='The job status'
+    )
+
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Attempts',
+        help_text='Number of times the job was started'
+    )
+
+    max_attempts = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Max attempts',
+        help_text='Number of times the job is started before it fails'
+    )
+
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Run after',
+        help_text='When the job is started next, while queued'
+    )
+
+    worker = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Worker',
+        help_text='The worker that last started the job'
+    )
+
+    lease = models.CharField(
+        max_length=32,
+        blank=True,
+        db_index=True,
+        verbose_name='Lease',
+        help_text='Token of the current claim of the job'
+    )
+
+    lease_expires_on = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Lease expires on',
+        help_text='When the job can be taken over, unless renewed'
+    )
+
+    started_on = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Started on',
+        help_text='When the job was last started'
+    )
+
+    finished_on = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Finished on',
+        help_text='When the job succeeded or failed for good'
+    )
+
+    result = models.TextField(
+        blank=True,
+        verbose_name='Result',
+        help_text='Return value of the job function, as JSON'
+    )
+
+    error = models.TextField(
+        blank=True,
+        verbose_name='Error',
+        help_text='Traceback of the last failed attempt'
+    )
+
+    objects = JobManager()
+
+    class Meta:
+        ordering = ['-id']
+        # Due jobs are found with range scans.
+        index_together = [
+            ('status', 'run_after'),
+            ('status', 'lease_expires_on'),
+        ]
+
+    def __str__(self):
+        return '{}-{}'.format(self.name, self.pk)
+
+    def finish(self, result=None, error=None, retry_after=None):
+        '''
+        Record the outcome of the current attempt, unless the lease was
+        lost to another worker. Failed attempts are retried after
+        `retry_after` seconds while attempts are left.
+
+        Returns whether the outcome was recorded.
+        '''
+        now = timezone.now()
+        fields = {'lease': '', 'lease_expires_on': None}
+        if error is None:
+            fields.update(
+                status=JOB_SUCCEEDED, finished_on=now,
+                result=json.dumps(result), error=''
+            )
+        elif self.attempts < self.max_attempts:
+            fields.update(
+                status=JOB_QUEUED, error=error,
+                run_after=now + timedelta(seconds=retry_after or 0)
+            )
+        else:
+            fields.update(status=JOB_FAILED, finished_on=now, error=error)
+
+        if not Job.objects.filter(pk=self.pk, lease=self.lease).update(
+            **fields
+        ):
+            return False
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
@@ -0,0 +1,50 @@
+import json
+
+from django.conf import settings
+
+from .models import Job
+
+
+# name: (function, max attempts)
+JOBS = {}
+
+
+def job(name, max_attempts=None):
+    '''
+    Register a function as the job `name`, started at most
+    `max_attempts` times (JOBS_MAX_ATTEMPTS by default) before it fails.
+
+    Jobs are registered in the `jobs` module of apps, found when the
+    jobs app is ready. Their functions take JSON serializable keyword
+    arguments and return a JSON serializable result. As failed attempts
+    are retried, and a job whose worker died is run again, they should
+    be safe to run more than once.
+
+        @job('tasks.purge_task')
+        def purge_task(task_id):
+            ...
+    '''
+    def register(func):
+        JOBS[name] = (func, max_attempts or settings.JOBS_MAX_ATTEMPTS)
+        return func
+    return register
+
+
+def enqueue(name, kwargs=None, owner=None, run_after=None):
+    '''
+    Queue a run of the job `name` with `kwargs`, for `owner` if given,
+    not before `run_after` if given.
+    '''
+    if name not in JOBS:
+        raise KeyError('No job is registered as {}.'.format(name))
+
+    fields = {}
+    if run_after is not None:
+        fields['run_after'] = run_after
+    return Job.objects.create(
+        name=name,
+        kwargs=json.dumps(kwargs or {}),
+        owner=owner,
+        max_attempts=JOBS[name][1],
+        **fields
+    )
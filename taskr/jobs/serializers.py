@@ -0,0 +1,27 @@
+import json
+
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JSONTextField(serializers.Field):
+    '''
+    A text field holding JSON, shown as the value it encodes.
+    '''
+    def to_representation(self, value):
+        return json.loads(value) if value else None
+
+
+class JobSerializer(serializers.ModelSerializer):
+    kwargs = JSONTextField(read_only=True)
+    result = JSONTextField(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'created_on', 'name', 'kwargs', 'status', 'attempts',
+            'max_attempts', 'run_after', 'started_on', 'finished_on',
+            'result', 'error'
+        )
+        read_only_fields = fields
@@ -0,0 +1,253 @@
+import json
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from tasks.models import Task, TaskCategory
+
+from . import enums
+from .models import Job
+from .registry import enqueue, job
+from .worker import Worker
+
+User = get_user_model()
+
+# Calls of the test jobs, by name.
+calls = {}
+calls_lock = threading.Lock()
+
+
+@job('tests.add')
+def add(a, b):
+    return a + b
+
+
+@job('tests.flaky', max_attempts=2)
+def flaky():
+    calls['flaky'] = calls.get('flaky', 0) + 1
+    if calls['flaky'] == 1:
+        raise ValueError('Not this time.')
+    return 'done'
+
+
+@job('tests.broken', max_attempts=2)
+def broken():
+    raise ValueError('Never works.')
+
+
+@job('tests.sleep')
+def sleep(seconds):
+    with calls_lock:
+        calls['running'] = calls.get('running', 0) + 1
+        calls['max_running'] = max(
+            calls.get('max_running', 0), calls['running']
+        )
+    time.sleep(seconds)
+    with calls_lock:
+        calls['running'] -= 1
+    return threading.current_thread().name
+
+
+@job('tests.outlive_lease')
+def outlive_lease(seconds):
+    time.sleep(seconds)
+    # Another worker looking for due jobs.
+    return len(Job.objects.claim('other', 10))
+
+
+class JobsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'testuser',
+            'testuser@email.com',
+            'testuser'
+        )
+
+        # Define headers.
+        self.headers = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(self.user.auth_token.key)
+        }
+        calls.clear()
+
+    def run_jobs(self):
+        out = StringIO()
+        call_command('runjobs', pool='none', once=True, stdout=out)
+        return out.getvalue()
+
+    def test_run_jobs(self):
+        '''
+        Test the runjobs command and the JobList and JobDetail views.
+        '''
+        added = enqueue('tests.add', {'a': 1, 'b': 2}, owner=self.user)
+        later = enqueue(
+            'tests.add', {'a': 1, 'b': 2},
+            run_after=timezone.now() + timedelta(hours=1)
+        )
+        with self.assertRaises(KeyError):
+            enqueue('tests.missing')
+
+        self.assertIn('1 job(s) succeeded', self.run_jobs())
+
+        url = reverse('job-detail', kwargs={'pk': added.pk})
+        response = self.client.get(url, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], enums.JOB_SUCCEEDED)
+        self.assertEqual(response.data['kwargs'], {'a': 1, 'b': 2})
+        self.assertEqual(response.data['result'], 3)
+        self.assertEqual(response.data['attempts'], 1)
+
+        # Not due yet.
+        self.assertEqual(
+            Job.objects.get(pk=later.pk).status, enums.JOB_QUEUED
+        )
+
+        # Check jobs are only shown to their owner.
+        response = self.client.get(reverse('job-list'), **self.headers)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']], [added.pk]
+        )
+        response = self.client.get(
+            reverse('job-detail', kwargs={'pk': later.pk}), **self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(JOBS_RETRY_BACKOFF=0)
+    def test_retry_jobs(self):
+        '''
+        Test failed jobs are retried until they run out of attempts.
+        '''
+        flaky_job = enqueue('tests.flaky')
+        broken_job = enqueue('tests.broken')
+
+        self.assertIn(
+            '1 job(s) succeeded, 2 retried, 1 failed', self.run_jobs()
+        )
+
+        flaky_job.refresh_from_db()
+        self.assertEqual(flaky_job.status, enums.JOB_SUCCEEDED)
+        self.assertEqual(flaky_job.attempts, 2)
+        self.assertEqual(flaky_job.error, '')
+
+        broken_job.refresh_from_db()
+        self.assertEqual(broken_job.status, enums.JOB_FAILED)
+        self.assertEqual(broken_job.attempts, 2)
+        self.assertIn('ValueError: Never works.', broken_job.error)
+        self.assertIsNotNone(broken_job.finished_on)
+
+    def test_job_leases(self):
+        '''
+        Test jobs are claimed by one worker at a time, and taken over
+        once their lease expired.
+        '''
+        enqueue('tests.add', {'a': 1, 'b': 2})
+
+        [claimed] = Job.objects.claim('first', 10)
+        self.assertEqual(claimed.status, enums.JOB_RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertEqual(Job.objects.claim('second', 10), [])
+        self.assertEqual(Job.objects.renew([claimed]), [])
+
+        # The first worker died.
+        Job.objects.update(lease_expires_on=timezone.now())
+        [taken_over] = Job.objects.claim('second', 10)
+        self.assertEqual(taken_over.worker, 'second')
+        self.assertEqual(taken_over.attempts, 2)
+
+        self.assertEqual(Job.objects.renew([claimed]), [claimed])
+        self.assertFalse(claimed.finish(result=3))
+        self.assertTrue(taken_over.finish(result=3))
+        self.assertEqual(Job.objects.get().status, enums.JOB_SUCCEEDED)
+
+    def test_deferred_work(self):
+        '''
+        Test deleted tasks are purged and user reports are computed by
+        jobs.
+        '''
+        task = Task.objects.create(
+            name='some task',
+            category=TaskCategory.objects.get(name='General'),
+            reporter=self.user
+        )
+        response = self.client.delete(
+            reverse('task-detail', kwargs={'pk': task.pk}), **self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        purge_job = Job.objects.get(name='tasks.purge_task')
+        self.assertGreater(
+            purge_job.run_after, timezone.now() + timedelta(hours=23)
+        )
+        self.assertTrue(Task.all_objects.filter(pk=task.pk).exists())
+
+        Job.objects.update(run_after=timezone.now())
+        self.run_jobs()
+        self.assertFalse(Task.all_objects.filter(pk=task.pk).exists())
+
+        response = self.client.get(
+            reverse('user-reports'), {'defer': 1}, **self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.run_jobs()
+
+        response = self.client.get(response.data['url'], **self.headers)
+        self.assertEqual(response.data['status'], enums.JOB_SUCCEEDED)
+        self.assertEqual(
+            response.data['result'],
+            self.client.get(reverse('user-reports'), **self.headers).data
+        )
+
+
+class JobPoolsTest(APITransactionTestCase):
+    # Pool threads use their own connections, which only see committed
+    # data.
+    serialized_rollback = True
+
+    def setUp(self):
+        calls.clear()
+
+    def test_thread_pool(self):
+        '''
+        Test the runjobs command runs jobs on a pool of threads.
+        '''
+        for _ in range(4):
+            enqueue('tests.sleep', {'seconds': 0.2})
+
+        out = StringIO()
+        call_command(
+            'runjobs', pool='thread', concurrency=2, once=True, stdout=out
+        )
+        self.assertIn('4 job(s) succeeded', out.getvalue())
+        self.assertEqual(calls['max_running'], 2)
+        self.assertEqual(
+            len({json.loads(result) for result in Job.objects.values_list(
+                'result', flat=True
+            )}),
+            2
+        )
+
+    def test_lease_renewed(self):
+        '''
+        Test the lease of a job run in the worker's thread is renewed
+        while it runs past the lease.
+        '''
+        outlived = enqueue('tests.outlive_lease', {'seconds': 1.2})
+
+        counts = Worker(pool='none', lease=0.5, poll_interval=0.1).run(
+            once=True
+        )
+        self.assertEqual(counts['succeeded'], 1)
+
+        outlived.refresh_from_db()
+        self.assertEqual(outlived.status, enums.JOB_SUCCEEDED)
+        self.assertEqual(outlived.attempts, 1)
+        # The other worker found nothing to claim.
+        self.assertEqual(json.loads(outlived.result), 0)
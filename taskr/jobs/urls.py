@@ -0,0 +1,18 @@
+from django.conf.urls import url
+
+from . import views
+
+
+urlpatterns = [
+    url(
+        r'^jobs/$',
+        views.JobList.as_view(),
+        name='job-list'
+    ),
+
+    url(
+        r'^jobs/(?P<pk>\d+)/$',
+        views.JobDetail.as_view(),
+        name='job-detail'
+    ),
+]
@@ -0,0 +1,41 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+
+from config.paginators import FeedPagination
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobList(generics.ListAPIView):
+    '''
+    Get the background jobs the user started, newest first.
+
+    Paginated with a cursor, follow the `next` link for older jobs.
+    Query parameters:
+      - page_size: number of jobs per page
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+    serializer_class = JobSerializer
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        return Job.objects.filter(owner=self.request.user)
+
+
+class JobDetail(generics.RetrieveAPIView):
+    '''
+    Get the status of a background job the user started, and its result
+    once it succeeded. Staff users can get any job.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(owner=self.request.user)
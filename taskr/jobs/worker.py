@@ -0,0 +1,196 @@
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
+from django.db import (
+    DatabaseError, close_old_connections, connection, connections
+)
+
+from .models import Job
+from .registry import JOBS
+
+
+POOLS = ('thread', 'process', 'none')
+
+
+def execute(name, kwargs):
+    '''
+    Run the job function `name` with the JSON `kwargs`.
+
+    Returns its result and None, or None and the traceback of the error
+    it raised.
+    '''
+    close_old_connections()
+    try:
+        return JOBS[name][0](**json.loads(kwargs)), None
+    except Exception:
+        return None, traceback.format_exc()
+    finally:
+        close_old_connections()
+
+
+class Finished(object):
+    '''
+    The result of a job run in the worker's thread, shaped like the
+    AsyncResult of a pool.
+    '''
+    def __init__(self, value):
+        self.value = value
+
+    def ready(self):
+        return True
+
+    def get(self):
+        return self.value
+
+
+class Worker(object):
+    '''
+    Claims due jobs and runs them on a pool of `concurrency` threads or
+    processes (JOBS_CONCURRENCY by default), or one at a time in its own
+    thread with the "none" pool.
+
+    Leases of running jobs are renewed every third of `lease` seconds
+    (JOBS_LEASE by default), from a heartbeat thread while a job runs
+    in the worker's thread. Failed attempts are retried after
+    JOBS_RETRY_BACKOFF seconds, doubled after each attempt.
+    '''
+    def __init__(self, pool='thread', concurrency=None, lease=None,
+                 poll_interval=None, log=None):
+        if pool not in POOLS:
+            raise ValueError('The pool must be one of {}.'.format(
+                ', '.join(POOLS)
+            ))
+        self.name = '{}:{}:{}'.format(
+            socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8]
+        )
+        self.pool_kind = pool
+        self.concurrency = 1 if pool == 'none' else (
+            concurrency or settings.JOBS_CONCURRENCY
+        )
+        self.lease = lease or settings.JOBS_LEASE
+        self.poll_interval = poll_interval or settings.JOBS_POLL_INTERVAL
+        self.log = log or (lambda line: None)
+        self.counts = {'succeeded': 0, 'retried': 0, 'failed': 0, 'lost': 0}
+
+    def make_pool(self):
+        if self.pool_kind == 'none':
+            return None
+        # Processes cannot share an in-memory SQLite database, threads
+        # can.
+        if self.pool_kind == 'thread' or connection.vendor == 'sqlite' and \
+                connection.is_in_memory_db(connection.settings_dict['NAME']):
+            return ThreadPool(self.concurrency)
+        # Children open their own connections instead of sharing ours.
+        connections.close_all()
+        return multiprocessing.Pool(self.concurrency)
+
+    def run(self, once=False):
+        '''
+        Run jobs until interrupted, or with `once` until none are due
+        nor running.
+
+        Returns the number of jobs that succeeded, were retried, failed,
+        and whose lease was lost to another worker.
+        '''
+        pool = self.make_pool()
+        running = {}
+        renewed_on = time.time()
+        try:
+            while True:
+                claimed = []
+                if len(running) < self.concurrency:
+                    claimed = Job.objects.claim(
+                        self.name, self.concurrency - len(running),
+                        self.lease
+                    )
+                for job in claimed:
+                    if pool is None:
+                        with self.heartbeat([job]):
+                            running[job] = Finished(
+                                execute(job.name, job.kwargs)
+                            )
+                    else:
+                        running[job] = pool.apply_async(
+                            execute, (job.name, job.kwargs)
+                        )
+
+                finished = [
+                    job for job, result in running.items() if result.ready()
+                ]
+                for job in finished:
+                    self.finish(job, *running.pop(job).get())
+
+                if running and \
+                        time.time() - renewed_on >= self.lease / 3.0:
+                    for job in Job.objects.renew(running, self.lease):
+                        self.log('Lost the lease of {}.'.format(job))
+                    renewed_on = time.time()
+
+                if claimed or finished:
+                    continue
+                if once and not running:
+                    break
+                # Check on running jobs more often than for new ones.
+                time.sleep(min(self.poll_interval, 0.1) if running
+                           else self.poll_interval)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return self.counts
+
+    @contextlib.contextmanager
+    def heartbeat(self, jobs):
+        '''
+        Renew the leases of `jobs` from another thread while the block
+        runs them in this one.
+        '''
+        stop = threading.Event()
+
+        def beat():
+            try:
+                while not stop.wait(self.lease / 3.0):
+                    try:
+                        lost = Job.objects.renew(jobs, self.lease)
+                    except DatabaseError as e:
+                        # Retried on the next beat, the lease outlasts it.
+                        self.log('Could not renew leases: {}'.format(e))
+                        continue
+                    for job in lost:
+                        self.log('Lost the lease of {}.'.format(job))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=beat)
+        thread.daemon = True
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def finish(self, job, result, error):
+        retry_after = settings.JOBS_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        if not job.finish(result, error, retry_after):
+            outcome = 'lost'
+        elif error is None:
+            outcome = 'succeeded'
+        elif job.finished_on is None:
+            outcome = 'retried'
+        else:
+            outcome = 'failed'
+        self.counts[outcome] += 1
+        self.log('{} {}.'.format(job, outcome))
+        if error is not None:
+            self.log(error)
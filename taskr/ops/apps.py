@@ -0,0 +1,7 @@
+from __future__ import unicode_literals
+
+from django.apps import AppConfig
+
+
+class OpsConfig(AppConfig):
+    name = 'ops'
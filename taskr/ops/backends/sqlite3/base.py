@@ -0,0 +1,14 @@
+'''
+SQLite backend that logs slow queries, see ops.slowqueries.
+'''
+from django.db.backends.sqlite3 import base
+
+from ops.slowqueries import CursorDebugWrapper, CursorWrapper
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def make_cursor(self, cursor):
+        return CursorWrapper(cursor, self)
+
+    def make_debug_cursor(self, cursor):
+        return CursorDebugWrapper(cursor, self)
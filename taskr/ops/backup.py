@@ -0,0 +1,122 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.db import connections
+
+
+class BackupError(Exception):
+    pass
+
+
+def backup(path, alias='default', pages=100, sleep=0, compress=False):
+    '''
+    Snapshot the SQLite database of `alias` to `path` while it is live.
+
+    The online backup API copies `pages` pages at a time, pausing `sleep`
+    seconds in between so writers get through. Pythons without it
+    (before 3.7) fall back to VACUUM INTO, which copies in one go. The
+    snapshot is checked for integrity before it replaces `path`, and
+    is gzipped with `compress`.
+
+    Returns the number of pages copied.
+    '''
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        raise BackupError('{} is not a SQLite database.'.format(alias))
+
+    source = sqlite3.connect(**connection.get_connection_params())
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp'
+    )
+    os.close(fd)
+    try:
+        if hasattr(source, 'backup'):
+            target = sqlite3.connect(tmp_path)
+            try:
+                source.backup(
+                    target, pages=pages,
+                    progress=lambda *args: sleep and time.sleep(sleep)
+                )
+            finally:
+                target.close()
+        else:
+            # The empty file made above is a valid target.
+            source.execute('VACUUM INTO ?', (tmp_path,))
+
+        page_count = check_integrity(tmp_path)
+
+        if compress:
+            with open(tmp_path, 'rb') as f_in:
+                with gzip.open(tmp_path + '.gz', 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out)
+            os.remove(tmp_path)
+            tmp_path += '.gz'
+        os.rename(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+
+    return page_count
+
+
+def restore(path, alias, replace=False):
+    '''
+    Restore a snapshot, gzipped or not, as the SQLite database of `alias`.
+
+    Meant for a spare alias to test snapshots with, so an existing
+    database is only replaced with `replace`.
+    '''
+    connection = connections[alias]
+    name = connection.settings_dict['NAME']
+    if connection.vendor != 'sqlite' or not name or \
+            connection.is_in_memory_db(name):
+        raise BackupError(
+            '{} is not a SQLite database file.'.format(alias)
+        )
+    if not replace and os.path.exists(name) and os.path.getsize(name):
+        raise BackupError('{} already has a database.'.format(alias))
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(name)), suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f_out:
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rb') as f_in:
+                shutil.copyfileobj(f_in, f_out)
+        check_integrity(tmp_path)
+
+        connection.close()
+        os.rename(tmp_path, name)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def check_integrity(path):
+    '''
+    Raise BackupError unless the database at `path` is intact, return its
+    number of pages otherwise.
+    '''
+    database = sqlite3.connect(path)
+    try:
+        result = database.execute('PRAGMA integrity_check').fetchall()
+        page_count = database.execute('PRAGMA page_count').fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise BackupError('{} is not a valid database: {}'.format(path, e))
+    finally:
+        database.close()
+
+    if result != [('ok',)]:
+        raise BackupError('{} failed the integrity check: {}'.format(
+            path, '; '.join(row[0] for row in result)
+        ))
+    return page_count
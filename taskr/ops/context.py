@@ -0,0 +1,32 @@
+import threading
+
+
+_local = threading.local()
+
+
+def current_view():
+    '''
+    Name of the view handling the current request in this thread, if any.
+    '''
+    return getattr(_local, 'view', None)
+
+
+class ViewContextMiddleware(object):
+    '''
+    Remember which view a request is routed to, so work done on its
+    behalf further down (database queries) can be attributed to it.
+
+    Must come before any middleware whose process_view may return a
+    response.
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            _local.view = None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _local.view = request.resolver_match.url_name or view_func.__name__
@@ -0,0 +1,38 @@
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ops.profiling import profile_paths, profile_view, summarize
+
+
+class Command(BaseCommand):
+    help = 'Aggregate the stored request profiles and print the hot spots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view',
+            help='Only aggregate profiles of this URL name.'
+        )
+        parser.add_argument(
+            '--sort', default='cumulative',
+            help='pstats sort key, e.g. cumulative, tottime or calls.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=30,
+            help='Number of functions to print.'
+        )
+
+    def handle(self, *args, **options):
+        paths = profile_paths(options['view'])
+        if not paths:
+            raise CommandError('No stored profiles found.')
+
+        stats = pstats.Stats(*paths)
+
+        views = sorted(set(profile_view(path) for path in paths))
+        self.stdout.write('{} profile(s) of {}.'.format(
+            len(paths), ', '.join(views)
+        ))
+        self.stdout.write(
+            summarize(stats, options['sort'], options['limit'])
+        )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ops.backup import BackupError, backup
+
+
+class Command(BaseCommand):
+    help = 'Snapshot a live SQLite database with the online backup API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to write the snapshot to.')
+        parser.add_argument(
+            '--database', default='default',
+            help='Database alias to back up.'
+        )
+        parser.add_argument(
+            '--pages', type=int, default=100,
+            help='Pages copied per step, -1 for all at once.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to pause between steps to let writers through.'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Compress the snapshot.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            pages = backup(
+                options['path'],
+                alias=options['database'],
+                pages=options['pages'],
+                sleep=options['sleep'],
+                compress=options['gzip']
+            )
+        except BackupError as e:
+            raise CommandError(e)
+
+        self.stdout.write('Backed up {} to {} ({} pages).'.format(
+            options['database'], options['path'], pages
+        ))
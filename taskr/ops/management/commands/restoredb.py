@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ops.backup import BackupError, restore
+
+
+class Command(BaseCommand):
+    help = (
+        'Restore a snapshot taken by backupdb as the SQLite database of an '
+        'alias, e.g. a spare one to test the snapshot with.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot to restore.')
+        parser.add_argument('database', help='Database alias to restore into.')
+        parser.add_argument(
+            '--replace', action='store_true',
+            help='Replace the existing database of the alias.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            restore(
+                options['path'], options['database'],
+                replace=options['replace']
+            )
+        except BackupError as e:
+            raise CommandError(e)
+
+        self.stdout.write('Restored {} into {}.'.format(
+            options['path'], options['database']
+        ))
@@ -0,0 +1,310 @@
+import atexit
+import bisect
+import errno
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from .context import current_view
+
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'taskr_http_requests_total': (
+        'counter', 'Requests by view, method and status code.', None
+    ),
+    'taskr_http_request_duration_seconds': (
+        'histogram', 'Request latency by view.',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    ),
+    'taskr_http_response_size_bytes': (
+        'histogram', 'Response body size by view.',
+        (100, 1000, 10000, 100000, 1000000)
+    ),
+    'taskr_db_query_duration_seconds': (
+        'histogram', 'Database statement time by view.',
+        (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+    ),
+    'taskr_auth_total': (
+        'counter', 'Requests by authentication result.', None
+    ),
+    'taskr_cache_requests_total': (
+        'counter', 'Cache lookups by cache and result.', None
+    ),
+    'taskr_notifications_total': (
+        'counter', 'Notifications created by the notification worker.', None
+    ),
+    'taskr_notification_lag_seconds': (
+        'histogram', 'Time events waited in the notification outbox.',
+        (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+    ),
+    'taskr_webhook_requests_total': (
+        'counter', 'Webhook requests by result.', None
+    ),
+    'taskr_webhook_request_duration_seconds': (
+        'histogram', 'Webhook request latency.',
+        (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    ),
+}
+
+
+class Registry(object):
+    '''
+    Metrics of this process.
+
+    Each worker process keeps its own counters and histograms and, once
+    `enable`d, periodically writes them to a file of its own in
+    METRICS_DIR. The metrics endpoint sums the files of all workers.
+    Other processes, such as tests and one-off commands, write nothing.
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.started_on = time.time()
+        self.flushed_on = self.started_on
+        self.counters = {}
+        self.histograms = {}
+
+    def check_fork(self):
+        # Metrics gathered before a fork belong to the parent.
+        if os.getpid() != self.pid:
+            self.reset()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.check_fork()
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = METRICS[name][2]
+        with self.lock:
+            self.check_fork()
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = [[0] * (len(buckets) + 1), 0]
+                self.histograms[key] = histogram
+            histogram[0][bisect.bisect_left(buckets, value)] += 1
+            histogram[1] += value
+
+    @property
+    def path(self):
+        return os.path.join(settings.METRICS_DIR, '{}-{:.0f}.json'.format(
+            self.pid, self.started_on
+        ))
+
+    def snapshot(self):
+        '''
+        This process' metrics, as written to its file.
+        '''
+        with self.lock:
+            self.check_fork()
+            return {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, labels, list(buckets), total]
+                    for (name, labels), (buckets, total)
+                    in self.histograms.items()
+                ],
+            }
+
+    def flush(self):
+        '''
+        Write this process' metrics to its file in METRICS_DIR, if
+        enabled.
+        '''
+        if not self.enabled:
+            return
+        data = self.snapshot()
+        self.flushed_on = time.time()
+        path = self.path
+
+        if not os.path.isdir(settings.METRICS_DIR):
+            os.makedirs(settings.METRICS_DIR)
+        # Write and rename, so readers never see a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=settings.METRICS_DIR)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.rename(tmp_path, path)
+
+    def maybe_flush(self):
+        if time.time() - self.flushed_on >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+maybe_flush = registry.maybe_flush
+
+
+def enable():
+    '''
+    Write the metrics of this worker process, and of the processes it
+    forks, to METRICS_DIR for the metrics endpoint of every worker.
+    '''
+    if not registry.enabled:
+        registry.enabled = True
+        atexit.register(flush_on_exit)
+
+
+def flush_on_exit():
+    if registry.counters or registry.histograms:
+        registry.flush()
+
+
+def running(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno != errno.ESRCH
+    return True
+
+
+def collect():
+    '''
+    Metrics of this process and of the running worker processes, summed.
+
+    Files of workers that exited are removed. Their counters go down by
+    what they had counted, which Prometheus treats like a restart.
+    '''
+    files = []
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        if path == registry.path:
+            continue
+        pid = int(os.path.basename(path).split('-')[0])
+        if not running(pid):
+            try:
+                os.remove(path)
+            except OSError:
+                # Removed by another worker since it was listed.
+                pass
+            continue
+        try:
+            with open(path) as f:
+                files.append(json.load(f))
+        except (IOError, OSError):
+            # Removed since it was listed.
+            continue
+
+    counters = {}
+    histograms = {}
+    for data in files + [registry.snapshot()]:
+        for name, labels, value in data['counters']:
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total in data['histograms']:
+            key = (name, tuple(tuple(label) for label in labels))
+            if key in histograms:
+                histogram = histograms[key]
+                histogram[0] = [a + b for a, b in zip(histogram[0], buckets)]
+                histogram[1] += total
+            else:
+                histograms[key] = [buckets, total]
+    return counters, histograms
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{{{}}}'.format(','.join(
+        '{}="{}"'.format(name, escape(value)) for name, value in labels
+    ))
+
+
+def escape(value):
+    return '{}'.format(value).replace('\\', '\\\\').replace(
+        '"', '\\"'
+    ).replace('\n', '\\n')
+
+
+def exposition(counters, histograms):
+    '''
+    Metrics in the Prometheus text exposition format.
+    '''
+    lines = []
+    for name in sorted(METRICS):
+        kind, help_text, bounds = METRICS[name]
+        lines.append('# HELP {} {}'.format(name, help_text))
+        lines.append('# TYPE {} {}'.format(name, kind))
+
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append('{}{} {}'.format(
+                        name, format_labels(labels), value
+                    ))
+            continue
+
+        for (metric, labels), (buckets, total) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            count = 0
+            for bound, bucket in zip(bounds + ('+Inf',), buckets):
+                count += bucket
+                lines.append('{}_bucket{} {}'.format(
+                    name, format_labels(labels + (('le', bound),)), count
+                ))
+            lines.append('{}_sum{} {}'.format(
+                name, format_labels(labels), total
+            ))
+            lines.append('{}_count{} {}'.format(
+                name, format_labels(labels), count
+            ))
+    return '\n'.join(lines) + '\n'
+
+
+def view_label():
+    return current_view() or 'none'
+
+
+class MetricsMiddleware(object):
+    '''
+    Count requests and measure their latency and response size per view.
+
+    Must come after ops.context.ViewContextMiddleware.
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.time()
+        response = self.get_response(request)
+        duration = time.time() - start
+
+        view = view_label()
+        inc(
+            'taskr_http_requests_total', view=view, method=request.method,
+            status=str(response.status_code)
+        )
+        observe('taskr_http_request_duration_seconds', duration, view=view)
+        if not response.streaming:
+            observe(
+                'taskr_http_response_size_bytes', len(response.content),
+                view=view
+            )
+
+        # Rest framework sets the user it authenticated on the request.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            inc('taskr_auth_total', result='success')
+        elif 'HTTP_AUTHORIZATION' in request.META:
+            inc('taskr_auth_total', result='failure')
+        else:
+            inc('taskr_auth_total', result='anonymous')
+
+        registry.maybe_flush()
+        return response
@@ -0,0 +1,142 @@
+import cProfile
+import glob
+import itertools
+import os
+import pstats
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.six import StringIO
+
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+PROFILE_QUERY_PARAM = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_MODES = ('1', 'true', 'summary')
+
+
+def profile_paths(view=None):
+    '''
+    Stored profiles, oldest first, optionally only those of a view.
+    '''
+    paths = sorted(glob.glob(os.path.join(settings.PROFILING_DIR, '*.prof')))
+    if view is not None:
+        paths = [path for path in paths if profile_view(path) == view]
+    return paths
+
+
+def profile_view(path):
+    '''
+    Name of the view a profile was stored for.
+    '''
+    # Profiles are named <timestamp>-<pid>-<view>.prof
+    return os.path.basename(path)[:-len('.prof')].split('-', 2)[2]
+
+
+def store_profile(profiler, view):
+    '''
+    Save a profile and drop the oldest ones above PROFILING_MAX_FILES.
+    '''
+    if not os.path.isdir(settings.PROFILING_DIR):
+        os.makedirs(settings.PROFILING_DIR)
+
+    path = os.path.join(settings.PROFILING_DIR, '{:.6f}-{}-{}.prof'.format(
+        time.time(), os.getpid(), view
+    ))
+    profiler.dump_stats(path)
+
+    for old_path in profile_paths()[:-settings.PROFILING_MAX_FILES]:
+        try:
+            os.remove(old_path)
+        except OSError:
+            # Already rotated by another worker.
+            pass
+
+    return path
+
+
+def summarize(stats, sort='cumulative', limit=30):
+    '''
+    Top `limit` functions of a `pstats.Stats` as text.
+    '''
+    stats.stream = StringIO()
+    stats.sort_stats(sort).print_stats(limit)
+    return stats.stream.getvalue()
+
+
+class ProfilingMiddleware(object):
+    '''
+    Run views under cProfile.
+
+    Staff users profile a request by passing `?_profile=1` or an
+    `X-Profile: 1` header (`true` works too), the profile is stored and
+    its file name is returned in the `X-Profile` response header. With
+    `summary` instead of `1` the response is replaced by the top of the
+    profile. Other values, like `0` or `false`, are ignored.
+
+    With PROFILING_SAMPLE_RATE set to N, 1 in N requests to the views of
+    PROFILING_MODULES are also profiled and stored.
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.requests = itertools.count(1)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mode = request.GET.get(
+            PROFILE_QUERY_PARAM, request.META.get(PROFILE_HEADER, '')
+        ).lower()
+        if mode not in PROFILE_MODES or not self.is_staff(request):
+            mode = None
+        if mode is None and not self.sampled(view_func):
+            return None
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(
+            view_func, request, *view_args, **view_kwargs
+        )
+        # Rest framework responses are rendered later, profile that too.
+        if callable(getattr(response, 'render', None)):
+            response = profiler.runcall(response.render)
+
+        view = request.resolver_match.url_name or view_func.__name__
+        path = store_profile(profiler, view)
+
+        if mode == 'summary':
+            return HttpResponse(
+                summarize(pstats.Stats(profiler)), content_type='text/plain'
+            )
+
+        response['X-Profile'] = os.path.basename(path)
+        return response
+
+    def sampled(self, view_func):
+        rate = settings.PROFILING_SAMPLE_RATE
+        return (
+            bool(rate) and
+            view_func.__module__ in settings.PROFILING_MODULES and
+            next(self.requests) % rate == 0
+        )
+
+    def is_staff(self, request):
+        '''
+        Authenticate the request the way the API views do, as token
+        authentication only happens once the view runs.
+        '''
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            authenticators = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+            drf_request = Request(request, authenticators=[
+                authenticator() for authenticator in authenticators
+            ])
+            try:
+                user = drf_request.user
+            except APIException:
+                return False
+        return user.is_staff
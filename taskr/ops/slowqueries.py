@@ -0,0 +1,110 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db.backends import utils
+from django.utils.encoding import force_text
+
+from . import metrics
+from .context import current_view
+
+
+logger = logging.getLogger('taskr.slowqueries')
+
+
+def redact(params):
+    '''
+    Replace query parameters by their type names.
+    '''
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def explain(connection, sql, params):
+    '''
+    SQLite query plan of a SELECT statement, one line per step.
+    '''
+    if connection.vendor != 'sqlite':
+        return None
+    if sql.split(None, 1)[0].upper() not in ('SELECT', 'WITH'):
+        return None
+
+    # A raw cursor, so the plan is neither timed nor counted as a query.
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+    except connection.Database.Error:
+        return None
+    finally:
+        cursor.close()
+
+
+def log_query(connection, sql, params, duration, many=False):
+    '''
+    Log a statement that took longer than SLOW_QUERY_THRESHOLD_MS.
+    '''
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold is None or duration * 1000 < threshold:
+        return
+
+    record = {
+        'duration_ms': round(duration * 1000, 3),
+        'view': current_view(),
+        'sql': sql,
+        'params': None,
+        'plan': None,
+    }
+    if many:
+        # The parameter sets may have been a generator, already consumed.
+        record['many'] = True
+    else:
+        record['params'] = (
+            redact(params) if settings.SLOW_QUERY_REDACT_PARAMS else params
+        )
+        if settings.SLOW_QUERY_EXPLAIN:
+            record['plan'] = explain(connection, sql, params)
+
+    logger.warning(json.dumps(record, default=force_text, sort_keys=True))
+
+
+class SlowQueryCursorMixin(object):
+    '''
+    Time statements run through a cursor, add them to the metrics and log
+    the slow ones.
+    '''
+    def execute(self, sql, params=None):
+        start = time.time()
+        result = super(SlowQueryCursorMixin, self).execute(sql, params)
+        duration = time.time() - start
+        metrics.observe(
+            'taskr_db_query_duration_seconds', duration,
+            view=metrics.view_label()
+        )
+        log_query(self.db, sql, params, duration)
+        return result
+
+    def executemany(self, sql, param_list):
+        start = time.time()
+        result = super(SlowQueryCursorMixin, self).executemany(
+            sql, param_list
+        )
+        duration = time.time() - start
+        metrics.observe(
+            'taskr_db_query_duration_seconds', duration,
+            view=metrics.view_label()
+        )
+        log_query(self.db, sql, param_list, duration, many=True)
+        return result
+
+
+class CursorWrapper(SlowQueryCursorMixin, utils.CursorWrapper):
+    pass
+
+
+class CursorDebugWrapper(SlowQueryCursorMixin, utils.CursorDebugWrapper):
+    pass
@@ -0,0 +1,441 @@
+import json
+import gzip
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.urlresolvers import reverse
+from django.db import connections
+from django.test import override_settings
+from django.utils.six import StringIO
+
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from tasks.models import Task, TaskCategory
+
+from .metrics import registry
+from .profiling import profile_paths
+from .slowqueries import redact
+
+User = get_user_model()
+
+
+class ProfilingTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'testuser',
+            'testuser@email.com',
+            'testuser',
+            is_staff=True
+        )
+        self.other_user = User.objects.create_user(
+            'dummyuser',
+            'dummyemail@email.com',
+            'dummyuser'
+        )
+
+        self.url = reverse('task-list')
+
+        # Define headers.
+        self.headers = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(self.user.auth_token.key)
+        }
+        self.other_headers = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(
+                self.other_user.auth_token.key
+            )
+        }
+
+        self.profiling_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiling_dir)
+
+    def test_profile_request(self):
+        '''
+        Test that staff users can profile a request.
+        '''
+        with override_settings(PROFILING_DIR=self.profiling_dir):
+            # Check the profile is stored and named in a header.
+            response = self.client.get(
+                self.url, HTTP_X_PROFILE='1', **self.headers
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('results', response.data)
+            self.assertEqual(
+                [os.path.basename(p) for p in profile_paths('task-list')],
+                [response['X-Profile']]
+            )
+
+            # Check a summary can be returned instead of the response.
+            response = self.client.get(
+                self.url, {'_profile': 'summary'}, **self.headers
+            )
+            self.assertEqual(response['Content-Type'], 'text/plain')
+            self.assertIn(b'function calls', response.content)
+
+            # Check other users cannot profile requests.
+            response = self.client.get(
+                self.url, HTTP_X_PROFILE='1', **self.other_headers
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('X-Profile', response)
+            self.assertEqual(len(profile_paths()), 2)
+
+            # Check only true values start profiling.
+            for value in ('0', 'false', ''):
+                response = self.client.get(
+                    self.url, {'_profile': value}, **self.headers
+                )
+                self.assertNotIn('X-Profile', response)
+            response = self.client.get(
+                self.url, {'_profile': 'True'}, **self.headers
+            )
+            self.assertIn('X-Profile', response)
+            self.assertEqual(len(profile_paths()), 3)
+
+    def test_sampled_profiles(self):
+        '''
+        Test sampling, rotation and aggregation of stored profiles.
+        '''
+        with override_settings(
+            PROFILING_DIR=self.profiling_dir,
+            PROFILING_SAMPLE_RATE=2,
+            PROFILING_MAX_FILES=3
+        ):
+            for _ in range(10):
+                self.client.get(self.url, **self.headers)
+            self.client.get(reverse('checkpoint'), **self.headers)
+
+            # ... 1 in 2 requests to task and user views, only the
+            # newest ones are kept.
+            self.assertEqual(len(profile_paths('task-list')), 3)
+            self.assertEqual(profile_paths('checkpoint'), [])
+
+            stdout = StringIO()
+            call_command('aggregateprofiles', view='task-list', stdout=stdout)
+            self.assertIn('3 profile(s) of task-list.', stdout.getvalue())
+            self.assertIn('tasks/views.py', stdout.getvalue())
+
+
+class SlowQueryTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'testuser',
+            'testuser@email.com',
+            'testuser'
+        )
+        self.task = Task.objects.create(
+            name='some task',
+            category=TaskCategory.objects.get(name='General'),
+            reporter=self.user
+        )
+
+        self.url = reverse('task-detail', kwargs={'pk': self.task.pk})
+
+        # Define headers.
+        self.headers = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(self.user.auth_token.key)
+        }
+
+    def get_slow_queries(self, **settings):
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=0, **settings):
+            with self.assertLogs('taskr.slowqueries') as logs:
+                response = self.client.get(self.url, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_slow_query_log(self):
+        '''
+        Test slow queries are logged with their view, redacted
+        parameters and query plan.
+        '''
+        queries = [
+            query for query in self.get_slow_queries()
+            if query['view'] == 'task-detail' and
+            query['sql'].startswith('SELECT') and
+            'FROM "tasks_task"' in query['sql']
+        ]
+        self.assertTrue(queries)
+        for query in queries:
+            self.assertEqual(query['params'], ['int'])
+            self.assertTrue(query['plan'])
+
+        # ... and unredacted parameters when asked to.
+        queries = self.get_slow_queries(SLOW_QUERY_REDACT_PARAMS=False)
+        self.assertTrue([
+            query for query in queries
+            if query['view'] == 'task-detail' and
+            query['params'] == [self.task.pk]
+        ])
+
+    def test_fast_queries_not_logged(self):
+        '''
+        Test queries under the threshold are not logged.
+        '''
+        # A minute, which no query of the request comes close to.
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=60000):
+            with self.assertRaises(AssertionError):
+                with self.assertLogs('taskr.slowqueries'):
+                    self.client.get(self.url, **self.headers)
+
+    def test_redact(self):
+        '''
+        Test parameters are redacted to their types.
+        '''
+        self.assertEqual(
+            redact([1, 'secret', None]), ['int', 'str', 'NoneType']
+        )
+        self.assertEqual(redact({'key': 'secret'}), {'key': 'str'})
+        self.assertIsNone(redact(None))
+
+
+class MetricsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'testuser',
+            'testuser@email.com',
+            'testuser'
+        )
+
+        self.url = reverse('task-list')
+
+        # Define headers.
+        self.headers = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(self.user.auth_token.key)
+        }
+        staff = User.objects.create_user('staffuser', is_staff=True)
+        self.staff_headers = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(staff.auth_token.key)
+        }
+
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+
+    def get_metrics(self):
+        response = self.client.get(reverse('metrics'), **self.staff_headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response['Content-Type'], 'text/plain; version=0.0.4'
+        )
+        metrics = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith('#'):
+                sample, value = line.rsplit(' ', 1)
+                metrics[sample] = float(value)
+        return metrics
+
+    def test_metrics(self):
+        '''
+        Test request, auth, cache and database metrics are exposed.
+        '''
+        requests = 'taskr_http_requests_total{method="GET",status="200",' \
+            'view="task-list"}'
+        latency = 'taskr_http_request_duration_seconds_count{view="task-list"}'
+        size = 'taskr_http_response_size_bytes_sum{view="task-list"}'
+        queries = 'taskr_db_query_duration_seconds_count{view="task-list"}'
+        success = 'taskr_auth_total{result="success"}'
+        failure = 'taskr_auth_total{result="failure"}'
+        miss = 'taskr_cache_requests_total{cache="count",result="miss"}'
+        hit = 'taskr_cache_requests_total{cache="count",result="hit"}'
+
+        cache.clear()
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            before = self.get_metrics()
+            for _ in range(2):
+                self.client.get(self.url, {'count': 'cached'}, **self.headers)
+            self.client.get(self.url, HTTP_AUTHORIZATION='Token invalid')
+            after = self.get_metrics()
+
+        def delta(sample):
+            return after.get(sample, 0) - before.get(sample, 0)
+
+        self.assertEqual(delta(requests), 2)
+        self.assertEqual(delta(latency), 3)
+        self.assertGreater(delta(size), 0)
+        self.assertGreaterEqual(delta(queries), 4)
+        # The scrape before is counted as well.
+        self.assertEqual(delta(success), 3)
+        self.assertEqual(delta(failure), 1)
+        self.assertEqual(delta(miss), 1)
+        self.assertEqual(delta(hit), 1)
+
+        # Check histogram buckets are cumulative.
+        self.assertEqual(
+            after[
+                'taskr_http_request_duration_seconds_bucket'
+                '{view="task-list",le="+Inf"}'
+            ],
+            after[latency]
+        )
+
+        # Check only enabled workers write their metrics.
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            registry.flush()
+            self.assertEqual(os.listdir(self.metrics_dir), [])
+
+            registry.enabled = True
+            self.addCleanup(setattr, registry, 'enabled', False)
+            registry.flush()
+            self.assertEqual(
+                os.listdir(self.metrics_dir),
+                [os.path.basename(registry.path)]
+            )
+            # ... and are not counted twice.
+            self.assertEqual(self.get_metrics()[requests], after[requests])
+
+    def test_metrics_permissions(self):
+        '''
+        Test metrics are only shown to staff users and scrapers with the
+        METRICS_SCRAPE_TOKEN.
+        '''
+        url = reverse('metrics')
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            response = self.client.get(url)
+            self.assertEqual(
+                response.status_code, status.HTTP_401_UNAUTHORIZED
+            )
+            response = self.client.get(url, **self.headers)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION='Bearer scrape'
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_401_UNAUTHORIZED
+            )
+
+            with override_settings(METRICS_SCRAPE_TOKEN='scrape'):
+                response = self.client.get(
+                    url, HTTP_AUTHORIZATION='Bearer scrape'
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                response = self.client.get(
+                    url, HTTP_AUTHORIZATION='Bearer wrong'
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_401_UNAUTHORIZED
+                )
+
+    def test_metrics_of_all_workers(self):
+        '''
+        Test the metrics of running worker processes are summed, and the
+        files of exited ones removed.
+        '''
+        exited = subprocess.Popen([sys.executable, '-c', ''])
+        exited.wait()
+        for pid, value in ((1, 3), (os.getppid(), 4), (exited.pid, 100)):
+            path = os.path.join(self.metrics_dir, '{}-0.json'.format(pid))
+            with open(path, 'w') as f:
+                json.dump({
+                    'counters': [
+                        ['taskr_auth_total', [['result', 'worker']], value]
+                    ],
+                    'histograms': [[
+                        'taskr_http_response_size_bytes',
+                        [['view', 'worker']],
+                        [value, 0, 0, 0, 0, 1],
+                        value * 10 + 5000000,
+                    ]],
+                }, f)
+
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            metrics = self.get_metrics()
+
+        self.assertEqual(metrics['taskr_auth_total{result="worker"}'], 7)
+        sample = 'taskr_http_response_size_bytes_{}{{view="worker"{}}}'
+        self.assertEqual(metrics[sample.format('bucket', ',le="100"')], 7)
+        self.assertEqual(metrics[sample.format('bucket', ',le="+Inf"')], 9)
+        self.assertEqual(metrics[sample.format('count', '')], 9)
+        self.assertEqual(metrics[sample.format('sum', '')], 10000070)
+        self.assertEqual(len(os.listdir(self.metrics_dir)), 2)
+
+
+class BackupTest(APITransactionTestCase):
+    # Snapshots are read through their own connection, which only sees
+    # committed data.
+    serialized_rollback = True
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'testuser',
+            'testuser@email.com',
+            'testuser'
+        )
+        for i in range(50):
+            Task.objects.create(
+                name='task {}'.format(i),
+                category=TaskCategory.objects.get(name='General'),
+                reporter=self.user
+            )
+
+        self.backup_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.backup_dir)
+
+    def add_database(self, alias):
+        path = os.path.join(self.backup_dir, '{}.sqlite3'.format(alias))
+        connections.databases[alias] = dict(
+            connections.databases['default'], NAME=path, TEST={}
+        )
+        self.addCleanup(self.remove_database, alias)
+        return path
+
+    def remove_database(self, alias):
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+
+    def test_backup_and_restore(self):
+        '''
+        Test a live database is backed up and restored into another alias.
+        '''
+        path = os.path.join(self.backup_dir, 'backup.sqlite3')
+        stdout = StringIO()
+        call_command('backupdb', path, pages=5, sleep=0.001, stdout=stdout)
+        self.assertIn(
+            'Backed up default to {}'.format(path), stdout.getvalue()
+        )
+        self.assertEqual(
+            sqlite3.connect(path).execute(
+                'SELECT COUNT(*) FROM tasks_task'
+            ).fetchone(),
+            (50,)
+        )
+
+        # Check compressed snapshots restore into a spare alias.
+        gz_path = path + '.gz'
+        call_command('backupdb', gz_path, gzip=True, stdout=StringIO())
+        with gzip.open(gz_path) as f:
+            self.assertEqual(f.read(16), b'SQLite format 3\x00')
+
+        self.add_database('snapshot')
+        stdout = StringIO()
+        call_command('restoredb', gz_path, 'snapshot', stdout=stdout)
+        self.assertIn('Restored', stdout.getvalue())
+        self.assertEqual(Task.objects.using('snapshot').count(), 50)
+
+        # ... but do not replace a database unless asked to.
+        with self.assertRaises(CommandError):
+            call_command('restoredb', path, 'snapshot')
+        call_command(
+            'restoredb', path, 'snapshot', replace=True,
+            stdout=StringIO()
+        )
+        self.assertEqual(Task.objects.using('snapshot').count(), 50)
+
+    def test_restore_corrupt_snapshot(self):
+        '''
+        Test snapshots failing the integrity check are not restored.
+        '''
+        path = os.path.join(self.backup_dir, 'corrupt.sqlite3')
+        with open(path, 'wb') as f:
+            f.write(b'SQLite format 3\x00' + b'\xff' * 4096)
+
+        database_path = self.add_database('snapshot')
+        with self.assertRaises(CommandError):
+            call_command('restoredb', path, 'snapshot')
+        self.assertFalse(os.path.exists(database_path))
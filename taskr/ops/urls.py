@@ -0,0 +1,12 @@
+from django.conf.urls import url
+
+from . import views
+
+
+urlpatterns = [
+    url(
+        r'^metrics$',
+        views.Metrics.as_view(),
+        name='metrics'
+    ),
+]
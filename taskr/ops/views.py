@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from rest_framework.permissions import BasePermission, IsAdminUser
+from rest_framework.views import APIView
+
+from .metrics import collect, exposition
+
+
+class IsMetricsScraper(BasePermission):
+    '''
+    Staff users, or scrapers sending METRICS_SCRAPE_TOKEN as a bearer
+    token.
+    '''
+    def has_permission(self, request, view):
+        token = settings.METRICS_SCRAPE_TOKEN
+        if token and constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            'Bearer {}'.format(token)
+        ):
+            return True
+        return IsAdminUser().has_permission(request, view)
+
+
+class Metrics(APIView):
+    '''
+    Metrics of all worker processes in the Prometheus text format.
+
+    * Requires token authentication of a staff user, or the
+      METRICS_SCRAPE_TOKEN as a bearer token.
+    '''
+    permission_classes = (IsMetricsScraper,)
+
+    def get(self, request):
+        return HttpResponse(
+            exposition(*collect()), content_type='text/plain; version=0.0.4'
+        )
@@ -1,20 +1,43 @@
 from django.contrib import admin
 
-from .models import Task, TaskCategory, TaskEventLog
+from config.paginators import CachedCountPaginator
+from .models import Label, Task, TaskCategory, TaskEventLog
 
 
 class TaskAdmin(admin.ModelAdmin):
-    pass
+    list_display = (
+        'id', 'name', 'category', 'priority', 'status',
+        'reporter', 'assignee', 'created_on'
+    )
+    list_select_related = ('category', 'reporter', 'assignee')
+    list_filter = ('status', 'category')
+    raw_id_fields = ('reporter', 'assignee', 'parent')
+    filter_horizontal = ('labels',)
+    date_hierarchy = 'created_on'
+
+    # Counts are cached, the unfiltered total is not shown.
+    paginator = CachedCountPaginator
+    show_full_result_count = False
 
 
 class TaskCategoryAdmin(admin.ModelAdmin):
-    pass
+    list_display = ('name', 'description', 'created_on')
 
 
 class TaskEventLogAdmin(admin.ModelAdmin):
-    pass
+    list_display = (
+        'id', 'task', 'user', 'event', 'count', 'created_on', 'updated_on'
+    )
+    list_select_related = ('task', 'user')
+    list_filter = ('event',)
+    raw_id_fields = ('task', 'user', 'task_assignee')
+    date_hierarchy = 'created_on'
+
+    paginator = CachedCountPaginator
+    show_full_result_count = False
 
 
+admin.site.register(Label)
 admin.site.register(Task, TaskAdmin)
 admin.site.register(TaskCategory, TaskCategoryAdmin)
 admin.site.register(TaskEventLog, TaskEventLogAdmin)
@@ -35,10 +35,12 @@ EVENT_CREATED = 1
 EVENT_EDITED = 2
 EVENT_STATUS_CHANGED = 3
 EVENT_ASSIGNED = 4
+EVENT_DELETED = 5
 
 EVENT_CHOICES = (
     (EVENT_CREATED, 'Created'),
     (EVENT_EDITED, 'Edited'),
     (EVENT_STATUS_CHANGED, 'Status Changed'),
     (EVENT_ASSIGNED, 'Assigned'),
+    (EVENT_DELETED, 'Deleted'),
 )
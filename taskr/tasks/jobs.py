@@ -0,0 +1,19 @@
+from __future__ import absolute_import
+
+from jobs.registry import job
+
+from .models import Task
+
+
+@job('tasks.purge_task')
+def purge_task(task_id, batch_size=1000):
+    '''
+    Hard delete a soft-deleted task, see `Task.purge`.
+
+    Returns whether there was a task to purge.
+    '''
+    task = Task.all_objects.deleted().filter(pk=task_id).first()
+    if task is None:
+        return False
+    task.purge(batch_size=batch_size)
+    return True
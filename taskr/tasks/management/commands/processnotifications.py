@@ -0,0 +1,58 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ops import metrics
+from tasks.notifications import notification_pool, process_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Notify the watchers of tasks of the events queued in the '
+        'notification outbox.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of events taken from the outbox at a time.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of notifications created per insert.'
+        )
+        parser.add_argument(
+            '--processes', type=int,
+            default=settings.TASKS_NOTIFICATION_PROCESSES,
+            help='Processes creating notifications, one per CPU by default.'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=0,
+            help='Keep running, checking the outbox this many seconds '
+                 'after it was emptied. Stops once it is empty by default.'
+        )
+
+    def handle(self, *args, **options):
+        if options['poll']:
+            # A worker, its metrics are exposed by the web workers.
+            metrics.enable()
+
+        with notification_pool(options['processes']) as pool:
+            while True:
+                events, notifications, lag = process_outbox(
+                    batch_size=options['batch_size'],
+                    chunk_size=options['chunk_size'],
+                    pool=pool
+                )
+                if events or not options['poll']:
+                    self.stdout.write(
+                        'Processed {} event(s) into {} notification(s), '
+                        'at most {:.1f}s behind.'.format(
+                            events, notifications, lag
+                        )
+                    )
+                if not options['poll']:
+                    break
+                metrics.maybe_flush()
+                time.sleep(options['poll'])
@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Hard delete soft-deleted tasks and their event logs in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Maximum number of event logs deleted per transaction.'
+        )
+        parser.add_argument(
+            '--older-than', type=int, default=0,
+            help='Only purge tasks deleted at least this many seconds ago.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to pause between tasks to let writers through.'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['older_than'])
+        tasks = Task.all_objects.deleted().filter(deleted_on__lte=cutoff)
+
+        purged = 0
+        for task in tasks.only('pk').iterator():
+            task.purge(batch_size=options['batch_size'])
+            purged += 1
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write('Purged {} task(s).'.format(purged))
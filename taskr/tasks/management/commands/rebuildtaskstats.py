@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from tasks.models import TaskDailyStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily task analytics rollups from the event log.'
+
+    def handle(self, *args, **options):
+        TaskDailyStats.objects.rebuild()
+        self.stdout.write('Rebuilt {} rollup row(s).'.format(
+            TaskDailyStats.objects.count()
+        ))
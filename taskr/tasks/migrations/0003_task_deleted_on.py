@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 21:38
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_create_task_categories'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='deleted_on',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='When the task was deleted, pending purge', null=True, verbose_name='Deleted on'),
+        ),
+    ]
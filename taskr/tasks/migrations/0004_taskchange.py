@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 21:39
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def create_task_changes(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskChange = apps.get_model('tasks', 'TaskChange')
+
+    TaskChange.objects.bulk_create([
+        TaskChange(task_id=pk, deleted=deleted_on is not None)
+        for pk, deleted_on in Task.objects.order_by('pk').values_list(
+            'pk', 'deleted_on'
+        )
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_deleted_on'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.PositiveIntegerField(help_text='The changed task', unique=True, verbose_name='Task')),
+                ('deleted', models.BooleanField(default=False, help_text='Whether the change was a deletion', verbose_name='Deleted')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='taskeventlog',
+            name='event',
+            field=models.PositiveIntegerField(choices=[(1, 'Created'), (2, 'Edited'), (3, 'Status Changed'), (4, 'Assigned'), (5, 'Deleted')], default=1, help_text='The event logged for this task', verbose_name='Event'),
+        ),
+        migrations.RunPython(
+            create_task_changes, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    '''
+    Covering index for claiming the next task of a category.
+
+    Written as SQL since index_together cannot express the descending
+    priority order.
+    '''
+
+    dependencies = [
+        ('tasks', '0004_taskchange'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [
+                'CREATE INDEX tasks_task_claim ON tasks_task '
+                '(category_id, status, assignee_id, deleted_on, '
+                'priority DESC, created_on)'
+            ],
+            ['DROP INDEX tasks_task_claim'],
+        ),
+    ]
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 21:44
+from __future__ import unicode_literals
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+EVENT_CREATED = 1
+EVENT_EDITED = 2
+EVENT_STATUS_CHANGED = 3
+EVENT_ASSIGNED = 4
+EVENT_DELETED = 5
+
+STATUS_TODO = 1
+
+# Matches both "{'status': 2}" and "ReturnDict([('status', 2)])".
+STATUS_RE = re.compile(r"'status'\)?[:,]\s*(\d+)")
+ASSIGNED_RE = re.compile(r'^Task assigned to (.*)\.$', re.S)
+
+
+def backfill_event_payloads(apps, schema_editor):
+    '''
+    Parse the formatted descriptions of existing events into the
+    structured fields, and clear the descriptions that can now be
+    rendered from them.
+    '''
+    TaskEventLog = apps.get_model('tasks', 'TaskEventLog')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    for event, description in [
+        (EVENT_CREATED, 'Task created.'),
+        (EVENT_EDITED, 'Task edited.'),
+        (EVENT_DELETED, 'Task deleted.'),
+    ]:
+        TaskEventLog.objects.filter(
+            event=event, description=description
+        ).update(description='')
+
+    user_ids = {'None': None}
+    previous_task_id, previous = None, {}
+
+    events = TaskEventLog.objects.filter(
+        event__in=[EVENT_STATUS_CHANGED, EVENT_ASSIGNED]
+    ).order_by('task_id', 'pk').values_list(
+        'pk', 'task_id', 'event', 'description'
+    )
+    for pk, task_id, event, description in events.iterator():
+        # Events come grouped by task, only remember the current one.
+        if task_id != previous_task_id:
+            previous_task_id, previous = task_id, {}
+
+        if event == EVENT_STATUS_CHANGED:
+            field, initial = 'status', STATUS_TODO
+            match = STATUS_RE.search(description)
+            new_value = int(match.group(1)) if match else None
+        else:
+            field, initial = 'assignee', None
+            match = ASSIGNED_RE.match(description)
+            if match:
+                username = match.group(1)
+                if username not in user_ids:
+                    user_ids[username] = User.objects.filter(
+                        username=username
+                    ).values_list('pk', flat=True).first()
+                new_value = user_ids[username]
+                # Keep the text of events for users that no longer exist.
+                if new_value is None and username != 'None':
+                    match = None
+
+        if not match:
+            continue
+
+        old_value = previous.get(field, initial)
+        previous[field] = new_value
+
+        TaskEventLog.objects.filter(pk=pk).update(
+            field=field,
+            old_value=old_value,
+            new_value=new_value,
+            description=''
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_claim_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskeventlog',
+            name='field',
+            field=models.CharField(blank=True, help_text='The task field changed by this event', max_length=20, verbose_name='Field'),
+        ),
+        migrations.AddField(
+            model_name='taskeventlog',
+            name='new_value',
+            field=models.IntegerField(blank=True, help_text='Value of the changed field after the event', null=True, verbose_name='New value'),
+        ),
+        migrations.AddField(
+            model_name='taskeventlog',
+            name='old_value',
+            field=models.IntegerField(blank=True, help_text='Value of the changed field before the event', null=True, verbose_name='Old value'),
+        ),
+        migrations.AlterField(
+            model_name='taskeventlog',
+            name='description',
+            field=models.TextField(blank=True, help_text='Event description, rendered from the other fields if blank', max_length=2000, verbose_name='Description'),
+        ),
+        migrations.AlterIndexTogether(
+            name='taskeventlog',
+            index_together=set([('event', 'new_value', 'created_on')]),
+        ),
+        migrations.RunPython(
+            backfill_event_payloads, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 21:46
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0006_taskeventlog_payload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDailyStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='The day the counted events happened', verbose_name='Day')),
+                ('created', models.PositiveIntegerField(default=0, help_text='Number of tasks created', verbose_name='Created')),
+                ('completed', models.PositiveIntegerField(default=0, help_text='Number of tasks moved to done', verbose_name='Completed')),
+                ('started_completed', models.PositiveIntegerField(default=0, help_text='Number of completed tasks that were in progress before', verbose_name='Started and completed')),
+                ('lead_time', models.BigIntegerField(default=0, help_text='Total lead time of completed tasks, in seconds', verbose_name='Lead time')),
+                ('cycle_time', models.BigIntegerField(default=0, help_text='Total cycle time of completed tasks, in seconds', verbose_name='Cycle time')),
+                ('assignee', models.ForeignKey(blank=True, help_text='Assignee of the counted tasks', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='task_daily_stats', to=settings.AUTH_USER_MODEL, verbose_name='Assignee')),
+                ('category', models.ForeignKey(help_text='Category of the counted tasks', on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='tasks.TaskCategory', verbose_name='Category')),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='taskeventlog',
+            index_together=set([('task', 'event', 'new_value'), ('event', 'new_value', 'created_on')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='taskdailystats',
+            index_together=set([('day', 'category', 'assignee')]),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 21:47
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_taskdailystats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='created_on',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=models.PositiveIntegerField(choices=[(1, 'Todo'), (2, 'In Progress'), (3, 'Done')], db_index=True, default=1, help_text='Task status', verbose_name='Status'),
+        ),
+        migrations.AlterField(
+            model_name='taskeventlog',
+            name='created_on',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 22:07
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0008_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityFeedItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.ForeignKey(help_text='The event', on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='tasks.TaskEventLog', verbose_name='Event')),
+                ('user', models.ForeignKey(help_text='The user whose feed the event is in', on_delete=django.db.models.deletion.CASCADE, related_name='activity', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        # Feeds of existing events, as of the current reporter and
+        # assignee of their tasks, oldest first so ids follow time.
+        migrations.RunSQL(
+            [
+                'INSERT INTO tasks_activityfeeditem (user_id, event_id) '
+                'SELECT user_id, event_id FROM ('
+                'SELECT t.reporter_id AS user_id, e.id AS event_id '
+                'FROM tasks_taskeventlog e '
+                'INNER JOIN tasks_task t ON t.id = e.task_id '
+                'UNION '
+                'SELECT t.assignee_id, e.id '
+                'FROM tasks_taskeventlog e '
+                'INNER JOIN tasks_task t ON t.id = e.task_id '
+                'WHERE t.assignee_id IS NOT NULL'
+                ') feed ORDER BY event_id, user_id'
+            ],
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 22:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_activityfeeditem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='event_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of events logged for the task', verbose_name='Event count'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='last_event_at',
+            field=models.DateTimeField(blank=True, help_text='When the last event of the task was logged', null=True, verbose_name='Last event at'),
+        ),
+        # Counts of the existing event logs.
+        migrations.RunSQL(
+            [
+                'UPDATE tasks_task SET '
+                'event_count = (SELECT COUNT(*) FROM tasks_taskeventlog e '
+                'WHERE e.task_id = tasks_task.id), '
+                'last_event_at = (SELECT MAX(e.created_on) '
+                'FROM tasks_taskeventlog e WHERE e.task_id = tasks_task.id)'
+            ],
+            migrations.RunSQL.noop,
+        ),
+    ]
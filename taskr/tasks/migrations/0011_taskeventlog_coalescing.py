@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 22:15
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_event_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskeventlog',
+            name='count',
+            field=models.PositiveIntegerField(default=1, help_text='Number of events merged into this one', verbose_name='Count'),
+        ),
+        migrations.AddField(
+            model_name='taskeventlog',
+            name='updated_on',
+            field=models.DateTimeField(auto_now=True, help_text='When the event was last logged, events can be merged', verbose_name='Updated on'),
+        ),
+        # Existing events were last logged when they were created.
+        migrations.RunSQL(
+            ['UPDATE tasks_taskeventlog SET updated_on = created_on'],
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 22:18
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0011_taskeventlog_coalescing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(help_text='Version number, from 1 for each task', verbose_name='Number')),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now, help_text='When the task changed to this version', verbose_name='Created on')),
+                ('snapshot', models.BooleanField(default=False, help_text='Whether all fields are stored, or only changed ones', verbose_name='Snapshot')),
+                ('data', models.TextField(help_text='Fields of the version as JSON', verbose_name='Data')),
+            ],
+            options={
+                'ordering': ['task', 'number'],
+            },
+        ),
+        migrations.AddField(
+            model_name='taskversion',
+            name='task',
+            field=models.ForeignKey(help_text='The versioned task', on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='tasks.Task', verbose_name='Task'),
+        ),
+        migrations.AddField(
+            model_name='taskversion',
+            name='user',
+            field=models.ForeignKey(blank=True, help_text='The user that changed the task', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='task_versions', to=settings.AUTH_USER_MODEL, verbose_name='User'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='taskversion',
+            unique_together=set([('task', 'number')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='taskversion',
+            index_together=set([('task', 'snapshot', 'number')]),
+        ),
+    ]
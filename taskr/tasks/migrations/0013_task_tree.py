@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 22:22
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_taskversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskTreePath',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(help_text='Number of parent links on the path', verbose_name='Depth')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Task this task is a subtask of', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subtasks', to='tasks.Task', verbose_name='Parent'),
+        ),
+        migrations.AddField(
+            model_name='tasktreepath',
+            name='ancestor',
+            field=models.ForeignKey(help_text='The task at the top of the path', on_delete=django.db.models.deletion.CASCADE, related_name='descendant_paths', to='tasks.Task', verbose_name='Ancestor'),
+        ),
+        migrations.AddField(
+            model_name='tasktreepath',
+            name='descendant',
+            field=models.ForeignKey(help_text='The subtask at the bottom of the path', on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_paths', to='tasks.Task', verbose_name='Descendant'),
+        ),
+        migrations.AddField(
+            model_name='taskdependency',
+            name='blocked',
+            field=models.ForeignKey(help_text='The task waiting for the blocker', on_delete=django.db.models.deletion.CASCADE, related_name='blocked_by', to='tasks.Task', verbose_name='Blocked'),
+        ),
+        migrations.AddField(
+            model_name='taskdependency',
+            name='blocker',
+            field=models.ForeignKey(help_text='The task that has to be done first', on_delete=django.db.models.deletion.CASCADE, related_name='blocking', to='tasks.Task', verbose_name='Blocker'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tasktreepath',
+            unique_together=set([('ancestor', 'descendant')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='taskdependency',
+            unique_together=set([('blocker', 'blocked')]),
+        ),
+    ]
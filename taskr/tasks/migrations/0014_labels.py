@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 22:26
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_task_tree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Label',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('name', models.CharField(help_text='Label name', max_length=100, unique=True, verbose_name='Name')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LabelBitmap',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chunk', models.PositiveIntegerField(help_text='Task ids from chunk * BITMAP_CHUNK_SIZE', verbose_name='Chunk')),
+                ('bits', models.BinaryField(blank=True, help_text='Big-endian bitmap, bit n set for task id n of the chunk', verbose_name='Bits')),
+                ('label', models.ForeignKey(help_text='The label of the tasks', on_delete=django.db.models.deletion.CASCADE, related_name='bitmaps', to='tasks.Label', verbose_name='Label')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='labels',
+            field=models.ManyToManyField(blank=True, help_text='Labels of the task', related_name='tasks', to='tasks.Label', verbose_name='Labels'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='labelbitmap',
+            unique_together=set([('label', 'chunk')]),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 22:41
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0014_labels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(help_text='The event the user is notified of', on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='tasks.TaskEventLog', verbose_name='Event')),
+                ('user', models.ForeignKey(help_text='The user notified', on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationOutboxItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(help_text='The event to notify watchers of', on_delete=django.db.models.deletion.CASCADE, related_name='outbox_items', to='tasks.TaskEventLog', verbose_name='Event')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskWatcher',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskwatcher',
+            name='task',
+            field=models.ForeignKey(help_text='The watched task', on_delete=django.db.models.deletion.CASCADE, related_name='watchers', to='tasks.Task', verbose_name='Task'),
+        ),
+        migrations.AddField(
+            model_name='taskwatcher',
+            name='user',
+            field=models.ForeignKey(help_text='The watching user', on_delete=django.db.models.deletion.CASCADE, related_name='watched_tasks', to=settings.AUTH_USER_MODEL, verbose_name='User'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='taskwatcher',
+            unique_together=set([('task', 'user')]),
+        ),
+    ]
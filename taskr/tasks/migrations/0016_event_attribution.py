@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 23:23
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+EVENT_CREATED = 1
+EVENT_STATUS_CHANGED = 3
+EVENT_ASSIGNED = 4
+
+STATUS_IN_PROGRESS = 2
+STATUS_DONE = 3
+
+
+def seconds(duration):
+    return int(duration.total_seconds())
+
+
+def backfill_event_attribution(apps, schema_editor):
+    '''
+    Stamp existing done events like new ones are logged, created events
+    are stamped by the SQL before.
+
+    Categories are not logged, so the current category of the task is
+    used. Assignees and start times are replayed from the log, each
+    task starting with the assignee its first assign event replaced.
+    '''
+    Task = apps.get_model('tasks', 'Task')
+    TaskEventLog = apps.get_model('tasks', 'TaskEventLog')
+
+    tasks = {
+        pk: (created_on, category_id, assignee_id)
+        for pk, created_on, category_id, assignee_id in
+        Task.objects.order_by().values_list(
+            'pk', 'created_on', 'category', 'assignee'
+        )
+    }
+    first_assigned = {}
+    for task_id, old_value in TaskEventLog.objects.filter(
+        event=EVENT_ASSIGNED
+    ).order_by('-pk').values_list('task_id', 'old_value').iterator():
+        first_assigned[task_id] = old_value
+
+    assignees, started = {}, {}
+    events = TaskEventLog.objects.filter(
+        event__in=[EVENT_STATUS_CHANGED, EVENT_ASSIGNED]
+    ).order_by('pk').values_list(
+        'pk', 'task_id', 'event', 'new_value', 'created_on'
+    )
+    for pk, task_id, event, new_value, created_on in events.iterator():
+        if event == EVENT_ASSIGNED:
+            assignees[task_id] = new_value
+        elif new_value == STATUS_IN_PROGRESS:
+            started[task_id] = created_on
+        elif new_value == STATUS_DONE:
+            task_created_on, category_id, assignee_id = tasks[task_id]
+            assignee_id = assignees.get(
+                task_id, first_assigned.get(task_id, assignee_id)
+            )
+            cycle_time = None
+            if task_id in started:
+                cycle_time = seconds(created_on - started[task_id])
+            TaskEventLog.objects.filter(pk=pk).update(
+                task_category=category_id,
+                task_assignee=assignee_id,
+                lead_time=seconds(created_on - task_created_on),
+                cycle_time=cycle_time
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0015_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskeventlog',
+            name='cycle_time',
+            field=models.BigIntegerField(blank=True, help_text='Seconds from the latest start of the task, for completions', null=True, verbose_name='Cycle time'),
+        ),
+        migrations.AddField(
+            model_name='taskeventlog',
+            name='lead_time',
+            field=models.BigIntegerField(blank=True, help_text='Seconds from the creation of the task, for completions', null=True, verbose_name='Lead time'),
+        ),
+        migrations.AddField(
+            model_name='taskeventlog',
+            name='task_assignee',
+            field=models.ForeignKey(blank=True, help_text='Assignee the event is counted for in the analytics', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Task assignee'),
+        ),
+        migrations.AddField(
+            model_name='taskeventlog',
+            name='task_category',
+            field=models.ForeignKey(blank=True, help_text='Category the event is counted for in the analytics', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='tasks.TaskCategory', verbose_name='Task category'),
+        ),
+        # Created events, with a single UPDATE.
+        migrations.RunSQL(
+            [
+                'UPDATE tasks_taskeventlog SET '
+                'task_category_id = (SELECT t.category_id FROM tasks_task t '
+                'WHERE t.id = tasks_taskeventlog.task_id) '
+                'WHERE event = {}'.format(EVENT_CREATED)
+            ],
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunPython(
+            backfill_event_attribution, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    '''
+    Create the claim index of 0005 again, now covering modified_on.
+
+    Django does not know of the index, so SQLite dropped it when the
+    migrations since rebuilt tasks_task.
+    '''
+
+    dependencies = [
+        ('tasks', '0016_event_attribution'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [
+                'DROP INDEX IF EXISTS tasks_task_claim',
+                'CREATE INDEX tasks_task_claim ON tasks_task '
+                '(category_id, status, assignee_id, deleted_on, '
+                'priority DESC, created_on, modified_on)',
+            ],
+            ['DROP INDEX IF EXISTS tasks_task_claim'],
+        ),
+    ]
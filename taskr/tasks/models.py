@@ -1,18 +1,89 @@
 from __future__ import unicode_literals
 
+import contextlib
+import json
+from binascii import hexlify, unhexlify
+from datetime import timedelta
+
 from django.conf import settings
-from django.db import models
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import Case, Count, F, Sum, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from config import identity_map
 
 from .enums import (
     PRIORITY_CHOICES, PRIORITY_MEDIUM,
     STATUS_CHOICES, STATUS_TODO,
-    EVENT_CHOICES, EVENT_CREATED,
+    STATUS_IN_PROGRESS, STATUS_DONE,
+    EVENT_CHOICES, EVENT_CREATED, EVENT_EDITED, EVENT_STATUS_CHANGED,
+    EVENT_ASSIGNED, EVENT_DELETED,
 )
 
 
+class TaskQuerySet(models.QuerySet):
+
+    def alive(self):
+        return self.filter(deleted_on__isnull=True)
+
+    def deleted(self):
+        return self.filter(deleted_on__isnull=False)
+
+    def soft_delete(self):
+        '''
+        Mark tasks as deleted with a single UPDATE.
+        The rows and their event logs are removed later by `Task.purge`.
+        '''
+        return self.filter(deleted_on__isnull=True).update(
+            deleted_on=timezone.now()
+        )
+
+    def claimable(self, category):
+        '''
+        Unassigned todo tasks of a category.
+        '''
+        return self.filter(
+            category=category,
+            status=STATUS_TODO,
+            assignee__isnull=True
+        )
+
+    def claim_order(self):
+        '''
+        (pk, modified_on) rows, highest priority and oldest first, read
+        from the tasks_task_claim index alone.
+
+        SQLite drops the index whenever a migration rebuilds tasks_task,
+        such migrations must create it again.
+        '''
+        return self.order_by('-priority', 'created_on').values_list(
+            'pk', 'modified_on'
+        )
+
+    def add_events(self, count, last_event_at):
+        '''
+        Bump the event count and last activity of tasks with a single
+        UPDATE.
+        '''
+        return self.update(
+            event_count=F('event_count') + count,
+            last_event_at=last_event_at
+        )
+
+
+class TaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    '''
+    Default manager, hides soft-deleted tasks.
+    '''
+    def get_queryset(self):
+        return super(TaskManager, self).get_queryset().alive()
+
+
 class Task(models.Model):
 
-    created_on = models.DateTimeField(auto_now_add=True)
+    created_on = models.DateTimeField(auto_now_add=True, db_index=True)
 
     modified_on = models.DateTimeField(auto_now=True)
 
@@ -48,7 +119,8 @@ class Task(models.Model):
         choices=STATUS_CHOICES,
         default=STATUS_TODO,
         verbose_name='Status',
-        help_text='Task status'
+        help_text='Task status',
+        db_index=True
     )
 
     reporter = models.ForeignKey(
@@ -69,12 +141,108 @@ class Task(models.Model):
         null=True
     )
 
+    parent = models.ForeignKey(
+        'self',
+        related_name='subtasks',
+        on_delete=models.SET_NULL,
+        verbose_name='Parent',
+        help_text='Task this task is a subtask of',
+        blank=True,
+        null=True
+    )
+
+    labels = models.ManyToManyField(
+        'Label',
+        related_name='tasks',
+        verbose_name='Labels',
+        help_text='Labels of the task',
+        blank=True
+    )
+
+    deleted_on = models.DateTimeField(
+        verbose_name='Deleted on',
+        help_text='When the task was deleted, pending purge',
+        blank=True,
+        null=True,
+        db_index=True
+    )
+
+    event_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Event count',
+        help_text='Number of events logged for the task'
+    )
+
+    last_event_at = models.DateTimeField(
+        verbose_name='Last event at',
+        help_text='When the last event of the task was logged',
+        blank=True,
+        null=True
+    )
+
+    objects = TaskManager()
+
+    all_objects = TaskQuerySet.as_manager()
+
     class Meta:
         ordering = ['created_on']
 
     def __str__(self):
         return '{}'.format(self.name[:20])
 
+    def save_fields(self, fields):
+        '''
+        Save the given fields of the task, and its modified_on.
+
+        Only their columns are written, so the event count and last
+        activity bumped with F() since the task was loaded are not
+        overwritten. Raises Task.DoesNotExist, writing nothing, if the
+        task was soft-deleted since.
+        '''
+        with transaction.atomic():
+            # Locks the row, so it is not soft-deleted before it is saved.
+            if not Task.objects.filter(pk=self.pk).update(
+                modified_on=timezone.now()
+            ):
+                raise Task.DoesNotExist(
+                    'Task {} was deleted.'.format(self.pk)
+                )
+            self.save(update_fields=list(fields) + ['modified_on'])
+
+    def purge(self, batch_size=1000):
+        '''
+        Hard delete the task.
+
+        Event logs and versions are removed first with set-based DELETEs
+        of at most `batch_size` rows, each in its own transaction, so the
+        deletion collector never loads the whole history and the write
+        lock is held only briefly. Subtasks become top level tasks.
+        '''
+        # Sends m2m_changed, so the task leaves the label bitmaps before
+        # its through rows are deleted.
+        self.labels.clear()
+
+        for subtask in Task.all_objects.filter(parent=self):
+            subtask.parent = None
+            subtask.save(update_fields=['parent'])
+            TaskTreePath.objects.move(subtask)
+
+        for model in (TaskEventLog, TaskVersion):
+            rows = model.objects.filter(task_id=self.pk)
+
+            while True:
+                batch = list(
+                    rows.order_by('pk').values_list(
+                        'pk', flat=True
+                    )[:batch_size]
+                )
+                if not batch:
+                    break
+                with transaction.atomic():
+                    model.objects.filter(pk__in=batch).delete()
+
+        Task.all_objects.filter(pk=self.pk).delete()
+
 
 class TaskCategory(models.Model):
 
@@ -94,10 +262,104 @@ class TaskCategory(models.Model):
         return '{}'.format(self.name[:20])
 
 
-class TaskEventLog(models.Model):
+class Label(models.Model):
 
     created_on = models.DateTimeField(auto_now_add=True)
 
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Name',
+        help_text='Label name'
+    )
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return '{}'.format(self.name[:20])
+
+
+# Descriptions of events without structured fields.
+EVENT_DESCRIPTIONS = {
+    EVENT_CREATED: 'Task created.',
+    EVENT_EDITED: 'Task edited.',
+    EVENT_DELETED: 'Task deleted.',
+}
+
+# Events merged with the previous event of their task, see
+# `TaskEventLogManager.log`.
+COALESCED_EVENTS = (EVENT_EDITED,)
+
+
+class TaskEventLogManager(models.Manager):
+
+    def usernames(self, events):
+        '''
+        Map the ids of users that events assigned tasks to, to their
+        usernames, in a single query.
+        '''
+        assigned = events.filter(event=EVENT_ASSIGNED).values('new_value')
+        return dict(
+            get_user_model().objects.filter(
+                pk__in=assigned
+            ).values_list('pk', 'username')
+        )
+
+    def log(self, **fields):
+        '''
+        Log an event.
+
+        Events of COALESCED_EVENTS are merged into the previous event of
+        their task instead when it is the same event, by the same user,
+        last logged at most TASKS_EVENT_COALESCE_WINDOW seconds ago. Its
+        `count` is bumped and the `post_save` signal is sent with
+        `created=False`.
+
+        Returns the new or merged event.
+        '''
+        event = self.model(**fields)
+        window = settings.TASKS_EVENT_COALESCE_WINDOW
+        if event.event not in COALESCED_EVENTS or not window:
+            event.save()
+            return event
+
+        with transaction.atomic():
+            last = self.select_for_update().filter(
+                task_id=event.task_id
+            ).order_by('-pk').first()
+            if last is not None and \
+                    last.event == event.event and \
+                    last.user_id == event.user_id and \
+                    last.updated_on >= timezone.now() - timedelta(
+                        seconds=window
+                    ):
+                if 'task' in fields:
+                    last.task = event.task
+                last.count += 1
+                last.save(update_fields=['count', 'updated_on'])
+                return last
+
+            event.save()
+            return event
+
+
+class TaskEventLog(models.Model):
+
+    created_on = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    updated_on = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Updated on',
+        help_text='When the event was last logged, events can be merged'
+    )
+
+    count = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Count',
+        help_text='Number of events merged into this one'
+    )
+
     task = models.ForeignKey(
         'Task',
         related_name='events',
@@ -121,15 +383,969 @@ class TaskEventLog(models.Model):
         help_text='The event logged for this task'
     )
 
+    field = models.CharField(
+        max_length=20,
+        verbose_name='Field',
+        help_text='The task field changed by this event',
+        blank=True
+    )
+
+    old_value = models.IntegerField(
+        verbose_name='Old value',
+        help_text='Value of the changed field before the event',
+        blank=True,
+        null=True
+    )
+
+    new_value = models.IntegerField(
+        verbose_name='New value',
+        help_text='Value of the changed field after the event',
+        blank=True,
+        null=True
+    )
+
     description = models.TextField(
         max_length=2000,
         verbose_name='Description',
-        help_text='Event description',
+        help_text='Event description, rendered from the other fields if blank',
         blank=True
     )
 
+    # Set on the events rolled up into TaskDailyStats when they are
+    # saved, see `TaskDailyStatsManager.attribute`.
+    task_category = models.ForeignKey(
+        'TaskCategory',
+        related_name='+',
+        on_delete=models.PROTECT,
+        verbose_name='Task category',
+        help_text='Category the event is counted for in the analytics',
+        blank=True,
+        null=True
+    )
+
+    task_assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='+',
+        on_delete=models.SET_NULL,
+        verbose_name='Task assignee',
+        help_text='Assignee the event is counted for in the analytics',
+        blank=True,
+        null=True
+    )
+
+    lead_time = models.BigIntegerField(
+        verbose_name='Lead time',
+        help_text='Seconds from the creation of the task, for completions',
+        blank=True,
+        null=True
+    )
+
+    cycle_time = models.BigIntegerField(
+        verbose_name='Cycle time',
+        help_text='Seconds from the latest start of the task, for completions',
+        blank=True,
+        null=True
+    )
+
+    objects = TaskEventLogManager()
+
     class Meta:
         ordering = ['created_on']
+        index_together = [
+            ('event', 'new_value', 'created_on'),
+            ('task', 'event', 'new_value'),
+        ]
+
+    def __str__(self):
+        task = identity_map.current().get_related(self, 'task')
+        return '{}-{}'.format(task.name[:20], self.get_event_display())
+
+    def render_description(self, usernames=None):
+        '''
+        Human readable description of the event.
+
+        `usernames` maps user ids to usernames for assign events,
+        see `TaskEventLogManager.usernames`.
+        '''
+        if self.description:
+            return self.description
+
+        if self.event == EVENT_ASSIGNED:
+            assignee = None
+            if self.new_value is not None:
+                if usernames is None or self.new_value not in usernames:
+                    usernames = TaskEventLog.objects.usernames(
+                        TaskEventLog.objects.filter(pk=self.pk)
+                    )
+                assignee = usernames.get(self.new_value)
+            return 'Task assigned to {}.'.format(assignee)
+
+        if self.event == EVENT_STATUS_CHANGED:
+            return 'Task status changed to "{}".'.format(
+                dict(STATUS_CHOICES).get(self.new_value)
+            )
+
+        return EVENT_DESCRIPTIONS.get(self.event, '')
+
+
+class TaskChangeManager(models.Manager):
+
+    def record(self, task_id, deleted=False):
+        '''
+        Move a task to the head of the change feed.
+        '''
+        with transaction.atomic():
+            self.filter(task_id=task_id).delete()
+            return self.create(task_id=task_id, deleted=deleted)
+
+
+class TaskChange(models.Model):
+    '''
+    Latest change of every task, ordered by a monotonically increasing id
+    that clients use as their sync cursor.
+
+    `task_id` is not a foreign key so that tombstones of purged tasks
+    are kept.
+    '''
+    task_id = models.PositiveIntegerField(
+        unique=True,
+        verbose_name='Task',
+        help_text='The changed task'
+    )
+
+    deleted = models.BooleanField(
+        default=False,
+        verbose_name='Deleted',
+        help_text='Whether the change was a deletion'
+    )
+
+    objects = TaskChangeManager()
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return '{}-{}'.format(self.pk, self.task_id)
+
+
+def seconds(duration):
+    return int(duration.total_seconds())
+
+
+class TaskDailyStatsManager(models.Manager):
+
+    def add(self, day, category_id, assignee_id, **counts):
+        '''
+        Add `counts` to the rollup row of a day, category and assignee.
+        '''
+        with transaction.atomic():
+            updated = self.filter(
+                day=day, category_id=category_id, assignee_id=assignee_id
+            ).update(**{
+                name: F(name) + value for name, value in counts.items()
+            })
+            if not updated:
+                self.create(
+                    day=day,
+                    category_id=category_id,
+                    assignee_id=assignee_id,
+                    **counts
+                )
+
+    def attribute(self, event):
+        '''
+        Stamp a new event that is rolled up with the category and
+        assignee it is counted for, and completions with their lead and
+        cycle time, from its task as it is when the event is logged.
+
+        Called before events are saved, events created with
+        `bulk_create` are rolled up only if stamped beforehand.
+        '''
+        rolled_up = event.event == EVENT_CREATED or (
+            event.event == EVENT_STATUS_CHANGED and
+            event.new_value == STATUS_DONE
+        )
+        if not rolled_up:
+            return
+
+        task = identity_map.current().get(
+            Task, event.task_id, Task.all_objects.all()
+        )
+        event.task_category_id = task.category_id
+        if event.event == EVENT_CREATED:
+            return
+
+        logged_on = event.created_on or timezone.now()
+        started_on = TaskEventLog.objects.filter(
+            task_id=event.task_id,
+            event=EVENT_STATUS_CHANGED,
+            new_value=STATUS_IN_PROGRESS,
+            created_on__lte=logged_on
+        ).order_by('-created_on').values_list(
+            'created_on', flat=True
+        ).first()
+
+        event.task_assignee_id = task.assignee_id
+        event.lead_time = seconds(logged_on - task.created_on)
+        if started_on is not None:
+            event.cycle_time = seconds(logged_on - started_on)
+
+    def record_event(self, event):
+        '''
+        Roll up a newly logged event, as stamped by `attribute`.
+        '''
+        if event.task_category_id is None:
+            return
+
+        day = timezone.localtime(event.created_on).date()
+        if event.event == EVENT_CREATED:
+            self.add(day, event.task_category_id, None, created=1)
+            return
+
+        counts = {'completed': 1, 'lead_time': event.lead_time}
+        if event.cycle_time is not None:
+            counts['started_completed'] = 1
+            counts['cycle_time'] = event.cycle_time
+        self.add(day, event.task_category_id, event.task_assignee_id, **counts)
+
+    def rebuild(self):
+        '''
+        Recompute every rollup row from the event log, with a single
+        GROUP BY over the stamped events.
+        '''
+        rows = TaskEventLog.objects.filter(
+            task_category__isnull=False
+        ).annotate(
+            day=TruncDate('created_on')
+        ).order_by().values(
+            'day', 'task_category', 'task_assignee'
+        ).annotate(
+            created=Count(Case(When(event=EVENT_CREATED, then=1))),
+            completed=Count('lead_time'),
+            started_completed=Count('cycle_time'),
+            total_lead_time=Coalesce(Sum('lead_time'), 0),
+            total_cycle_time=Coalesce(Sum('cycle_time'), 0),
+        )
+
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create([
+                TaskDailyStats(
+                    day=row['day'],
+                    category_id=row['task_category'],
+                    assignee_id=row['task_assignee'],
+                    created=row['created'],
+                    completed=row['completed'],
+                    started_completed=row['started_completed'],
+                    lead_time=row['total_lead_time'],
+                    cycle_time=row['total_cycle_time'],
+                )
+                for row in rows.iterator()
+            ], batch_size=500)
+
+
+class TaskDailyStats(models.Model):
+    '''
+    Daily rollup of created and completed tasks per category and
+    assignee, maintained as events are logged.
+
+    Lead time runs from task creation to done, cycle time from the
+    latest move to in progress to done. Both are stored as totals in
+    seconds, divide by `completed` and `started_completed` respectively
+    for averages.
+    '''
+    day = models.DateField(
+        verbose_name='Day',
+        help_text='The day the counted events happened'
+    )
+
+    category = models.ForeignKey(
+        'TaskCategory',
+        related_name='daily_stats',
+        on_delete=models.CASCADE,
+        verbose_name='Category',
+        help_text='Category of the counted tasks'
+    )
+
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='task_daily_stats',
+        on_delete=models.CASCADE,
+        verbose_name='Assignee',
+        help_text='Assignee of the counted tasks',
+        blank=True,
+        null=True
+    )
+
+    created = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Created',
+        help_text='Number of tasks created'
+    )
+
+    completed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Completed',
+        help_text='Number of tasks moved to done'
+    )
+
+    started_completed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Started and completed',
+        help_text='Number of completed tasks that were in progress before'
+    )
+
+    lead_time = models.BigIntegerField(
+        default=0,
+        verbose_name='Lead time',
+        help_text='Total lead time of completed tasks, in seconds'
+    )
+
+    cycle_time = models.BigIntegerField(
+        default=0,
+        verbose_name='Cycle time',
+        help_text='Total cycle time of completed tasks, in seconds'
+    )
+
+    objects = TaskDailyStatsManager()
+
+    class Meta:
+        ordering = ['day']
+        index_together = [
+            ('day', 'category', 'assignee'),
+        ]
+
+    def __str__(self):
+        return '{}-{}'.format(self.day, self.category_id)
+
+
+class ActivityFeedItemManager(models.Manager):
+
+    def fan_out(self, events):
+        '''
+        Add events to the feeds of the reporter and assignee of their
+        tasks, and of the previous assignee of reassigned tasks.
+        '''
+        instances = identity_map.current()
+        items = []
+        for event in events:
+            task = instances.get(Task, event.task_id, Task.all_objects.all())
+            users = {task.reporter_id, task.assignee_id}
+            if event.field == 'assignee':
+                users.add(event.old_value)
+            users.discard(None)
+            items.extend(
+                ActivityFeedItem(user_id=user_id, event=event)
+                for user_id in sorted(users)
+            )
+        self.bulk_create(items)
+
+
+class ActivityFeedItem(models.Model):
+    '''
+    An event in the activity feed of a user, written when the event is
+    logged so a feed is read without scanning the events of every task
+    of the user.
+
+    Feeds are read newest first by id, which the index on `user` serves
+    as SQLite indexes end with the row id.
+    '''
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='activity',
+        on_delete=models.CASCADE,
+        verbose_name='User',
+        help_text='The user whose feed the event is in'
+    )
+
+    event = models.ForeignKey(
+        'TaskEventLog',
+        related_name='feed_items',
+        on_delete=models.CASCADE,
+        verbose_name='Event',
+        help_text='The event'
+    )
+
+    objects = ActivityFeedItemManager()
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return '{}-{}'.format(self.user_id, self.event_id)
+
+
+# Task fields kept in the version history.
+VERSIONED_FIELDS = (
+    'name', 'description', 'category', 'priority', 'status',
+    'reporter', 'assignee', 'parent',
+)
+
+
+class TaskVersionManager(models.Manager):
+
+    def state(self, task):
+        '''
+        Versioned fields of `task`, foreign keys by id.
+        '''
+        return {
+            name: getattr(task, Task._meta.get_field(name).attname)
+            for name in VERSIONED_FIELDS
+        }
+
+    @contextlib.contextmanager
+    def track(self, task, user=None):
+        '''
+        Record the changes made to `task` within the block as a version.
+
+        The block and the version are one transaction, so the task is
+        not changed without its version being recorded.
+        '''
+        previous = self.state(task)
+        since = task.modified_on
+        with transaction.atomic():
+            yield
+            self.record(task, previous, since, user)
+
+    def record(self, task, previous=None, since=None, user=None):
+        '''
+        Record the current state of `task` as its next version.
+
+        A version holds the fields changed from `previous`, and every
+        TASKS_VERSION_SNAPSHOT_INTERVAL versions all of them, so any
+        version is rebuilt from at most that many rows. Without
+        `previous` the task is new. The history of tasks written before
+        it was kept starts with a snapshot of `previous`, the state of
+        the task since `since`.
+
+        The version is numbered again when a concurrent writer of the
+        task took its number, up to TASKS_VERSION_ATTEMPTS times.
+
+        Returns the new version, None if nothing changed.
+        '''
+        state = self.state(task)
+        changed = state if previous is None else {
+            name: value for name, value in state.items()
+            if previous[name] != value
+        }
+        if not changed:
+            return None
+
+        for attempt in range(1, settings.TASKS_VERSION_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    return self._create_next(
+                        task, state, changed, previous, since, user
+                    )
+            except IntegrityError:
+                if attempt == settings.TASKS_VERSION_ATTEMPTS:
+                    raise
+
+    def _create_next(self, task, state, changed, previous, since, user):
+        number = self.filter(task=task).order_by('-number').values_list(
+            'number', flat=True
+        ).first() or 0
+        if not number and previous is not None:
+            number = 1
+            self.create(
+                task=task, number=number, created_on=since,
+                snapshot=True, data=dumps(previous)
+            )
+
+        number += 1
+        snapshot = \
+            (number - 1) % settings.TASKS_VERSION_SNAPSHOT_INTERVAL == 0
+        return self.create(
+            task=task, number=number, created_on=task.modified_on,
+            user=user, snapshot=snapshot,
+            data=dumps(state if snapshot else changed)
+        )
+
+    def as_of(self, task, at):
+        '''
+        Number and state of the version of `task` current at `at`, None
+        if it is not known.
+
+        Only the versions since the last snapshot are replayed. Tasks
+        never written since their history is kept are as they are now
+        since they were last modified, their version number is None.
+        '''
+        versions = self.filter(task=task, created_on__lte=at)
+        snapshot = versions.filter(snapshot=True).order_by(
+            '-number'
+        ).values_list('number', 'data').first()
+
+        if snapshot is None:
+            if task.modified_on <= at and \
+                    not self.filter(task=task).exists():
+                return None, self.state(task)
+            return None
+
+        number, data = snapshot
+        state = json.loads(data)
+        for number, data in versions.filter(
+            number__gt=number
+        ).order_by('number').values_list('number', 'data'):
+            state.update(json.loads(data))
+        return number, state
+
+
+def dumps(state):
+    return json.dumps(state, separators=(',', ':'), sort_keys=True)
+
+
+class TaskVersion(models.Model):
+    '''
+    A version of a task, the fields that changed or, for snapshots, all
+    of the VERSIONED_FIELDS as JSON.
+    '''
+    task = models.ForeignKey(
+        'Task',
+        related_name='versions',
+        on_delete=models.CASCADE,
+        verbose_name='Task',
+        help_text='The versioned task'
+    )
+
+    number = models.PositiveIntegerField(
+        verbose_name='Number',
+        help_text='Version number, from 1 for each task'
+    )
+
+    created_on = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Created on',
+        help_text='When the task changed to this version'
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='task_versions',
+        on_delete=models.SET_NULL,
+        verbose_name='User',
+        help_text='The user that changed the task',
+        blank=True,
+        null=True
+    )
+
+    snapshot = models.BooleanField(
+        default=False,
+        verbose_name='Snapshot',
+        help_text='Whether all fields are stored, or only changed ones'
+    )
+
+    data = models.TextField(
+        verbose_name='Data',
+        help_text='Fields of the version as JSON'
+    )
+
+    objects = TaskVersionManager()
+
+    class Meta:
+        ordering = ['task', 'number']
+        unique_together = [('task', 'number')]
+        index_together = [('task', 'snapshot', 'number')]
+
+    def __str__(self):
+        return '{}-{}'.format(self.task_id, self.number)
+
+
+class TaskTreePathManager(models.Manager):
+
+    def creates_cycle(self, task, parent):
+        '''
+        Whether making `parent` the parent of `task` makes a task its own
+        ancestor.
+        '''
+        if parent is None:
+            return False
+        return parent.pk == task.pk or \
+            self.filter(ancestor=task, descendant=parent).exists()
+
+    @transaction.atomic
+    def move(self, task):
+        '''
+        Update the paths of `task` and its subtasks to its current parent.
+        '''
+        subtree = [(task.pk, 0)] + list(
+            self.filter(ancestor=task).values_list('descendant_id', 'depth')
+        )
+
+        inside = self.filter(ancestor=task).values('descendant')
+        self.filter(
+            models.Q(descendant=task) | models.Q(descendant__in=inside)
+        ).exclude(ancestor=task).exclude(ancestor__in=inside).delete()
+
+        if task.parent_id is None:
+            return
+        ancestors = [(task.parent_id, 0)] + list(
+            self.filter(descendant_id=task.parent_id).values_list(
+                'ancestor_id', 'depth'
+            )
+        )
+        self.bulk_create([
+            TaskTreePath(
+                ancestor_id=ancestor_id,
+                descendant_id=descendant_id,
+                depth=ancestor_depth + descendant_depth + 1
+            )
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, descendant_depth in subtree
+        ], batch_size=500)
+
+
+class TaskTreePath(models.Model):
+    '''
+    A path from a task down to one of its subtasks, at any depth, so
+    subtrees and ancestors are read with a single query.
+
+    Maintained by `TaskTreePathManager.move` when the parent of a task
+    changes.
+    '''
+    ancestor = models.ForeignKey(
+        'Task',
+        related_name='descendant_paths',
+        on_delete=models.CASCADE,
+        verbose_name='Ancestor',
+        help_text='The task at the top of the path'
+    )
+
+    descendant = models.ForeignKey(
+        'Task',
+        related_name='ancestor_paths',
+        on_delete=models.CASCADE,
+        verbose_name='Descendant',
+        help_text='The subtask at the bottom of the path'
+    )
+
+    depth = models.PositiveIntegerField(
+        verbose_name='Depth',
+        help_text='Number of parent links on the path'
+    )
+
+    objects = TaskTreePathManager()
+
+    class Meta:
+        unique_together = [('ancestor', 'descendant')]
+
+    def __str__(self):
+        return '{}-{}'.format(self.ancestor_id, self.descendant_id)
+
+
+class TaskDependencyManager(models.Manager):
+
+    def creates_cycle(self, blocker, blocked):
+        '''
+        Whether `blocker` blocking `blocked` makes a task block itself,
+        found with one recursive query over the dependencies.
+        '''
+        if blocker.pk == blocked.pk:
+            return True
+
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                'WITH RECURSIVE reachable (id) AS ('
+                'SELECT blocked_id FROM {table} WHERE blocker_id = %s '
+                'UNION '
+                'SELECT d.blocked_id FROM {table} d '
+                'INNER JOIN reachable r ON d.blocker_id = r.id'
+                ') SELECT 1 FROM reachable WHERE id = %s LIMIT 1'.format(
+                    table=table
+                ),
+                [blocked.pk, blocker.pk]
+            )
+            return cursor.fetchone() is not None
+
+
+class TaskDependency(models.Model):
+    '''
+    A task that has to be done before another one.
+    '''
+    blocker = models.ForeignKey(
+        'Task',
+        related_name='blocking',
+        on_delete=models.CASCADE,
+        verbose_name='Blocker',
+        help_text='The task that has to be done first'
+    )
+
+    blocked = models.ForeignKey(
+        'Task',
+        related_name='blocked_by',
+        on_delete=models.CASCADE,
+        verbose_name='Blocked',
+        help_text='The task waiting for the blocker'
+    )
+
+    objects = TaskDependencyManager()
+
+    class Meta:
+        unique_together = [('blocker', 'blocked')]
+
+    def __str__(self):
+        return '{}-{}'.format(self.blocker_id, self.blocked_id)
+
+
+# Task ids per LabelBitmap row.
+BITMAP_CHUNK_SIZE = 2 ** 16
+
+# Positions of the set bits of every byte value.
+BYTE_BITS = [
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+]
+
+
+def bitmap_to_int(bits):
+    bits = bytes(bits or b'')
+    return int(hexlify(bits), 16) if bits else 0
+
+
+def int_to_bitmap(number):
+    digits = '{:x}'.format(number) if number else ''
+    return unhexlify('0' * (len(digits) % 2) + digits)
+
+
+def bitmap_ids(number, offset=0):
+    '''
+    Ids of the set bits of `number`, the bitmap of ids from `offset`, in
+    order.
+    '''
+    data = bytearray(int_to_bitmap(number))
+    data.reverse()
+    ids = []
+    for index, byte in enumerate(data):
+        if byte:
+            base = offset + index * 8
+            ids.extend(base + bit for bit in BYTE_BITS[byte])
+    return ids
+
+
+class LabelBitmapManager(models.Manager):
+
+    def set_tasks(self, label_id, task_ids, present=True):
+        '''
+        Set, or clear unless `present`, the bits of tasks in the bitmap of
+        a label.
+        '''
+        masks = {}
+        for task_id in task_ids:
+            chunk, bit = divmod(task_id, BITMAP_CHUNK_SIZE)
+            masks[chunk] = masks.get(chunk, 0) | 1 << bit
+
+        with transaction.atomic():
+            rows = {
+                row.chunk: row for row in self.select_for_update().filter(
+                    label_id=label_id, chunk__in=list(masks)
+                )
+            }
+            for chunk, mask in masks.items():
+                row = rows.get(chunk) or LabelBitmap(
+                    label_id=label_id, chunk=chunk
+                )
+                number = bitmap_to_int(row.bits)
+                number = number | mask if present else number & ~mask
+                if number:
+                    row.bits = int_to_bitmap(number)
+                    row.save()
+                elif row.pk is not None:
+                    row.delete()
+
+    def rebuild(self):
+        '''
+        Recompute every bitmap from the labels of tasks.
+        '''
+        numbers = {}
+        for label_id, task_id in Task.labels.through.objects.values_list(
+            'label_id', 'task_id'
+        ).iterator():
+            chunk, bit = divmod(task_id, BITMAP_CHUNK_SIZE)
+            key = (label_id, chunk)
+            numbers[key] = numbers.get(key, 0) | 1 << bit
+
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create([
+                LabelBitmap(
+                    label_id=label_id, chunk=chunk,
+                    bits=int_to_bitmap(number)
+                )
+                for (label_id, chunk), number in sorted(numbers.items())
+            ], batch_size=100)
+
+    def matching(self, all_of=(), any_of=(), none_of=()):
+        '''
+        Ids of the tasks, not deleted, with all of the labels of `all_of`,
+        at least one of `any_of` and none of `none_of`, in order.
+
+        Label sets are combined a chunk of ids at a time with bitwise
+        operations on the bitmaps, read with one query. At least one of
+        `all_of` and `any_of` is required.
+        '''
+        if not all_of and not any_of:
+            raise ValueError('Labels to match are required.')
+
+        bitmaps = {}
+        for label_id, chunk, bits in self.filter(
+            label__in=set(all_of) | set(any_of) | set(none_of)
+        ).values_list('label_id', 'chunk', 'bits'):
+            bitmaps.setdefault(chunk, {})[label_id] = bitmap_to_int(bits)
+
+        ids = []
+        for chunk, numbers in sorted(bitmaps.items()):
+            number = -1
+            for label_id in all_of:
+                number &= numbers.get(label_id, 0)
+            if any_of:
+                union = 0
+                for label_id in any_of:
+                    union |= numbers.get(label_id, 0)
+                number &= union
+            for label_id in none_of:
+                number &= ~numbers.get(label_id, 0)
+            if number > 0:
+                ids.extend(bitmap_ids(number, chunk * BITMAP_CHUNK_SIZE))
+
+        # Soft-deleted tasks are few, they are purged. Without ordering
+        # they are read from the deleted_on index alone.
+        deleted = set(
+            Task.all_objects.deleted().order_by().values_list('pk', flat=True)
+        )
+        return [pk for pk in ids if pk not in deleted] if deleted else ids
+
+
+class LabelBitmap(models.Model):
+    '''
+    The tasks of a label as a bitmap of task ids, in chunks of
+    BITMAP_CHUNK_SIZE ids, so tasks with several labels are found by
+    intersecting bitmaps instead of joining the labels of tasks once
+    per label.
+
+    Maintained by `tasks.receivers.index_task_labels`.
+    '''
+    label = models.ForeignKey(
+        'Label',
+        related_name='bitmaps',
+        on_delete=models.CASCADE,
+        verbose_name='Label',
+        help_text='The label of the tasks'
+    )
+
+    chunk = models.PositiveIntegerField(
+        verbose_name='Chunk',
+        help_text='Task ids from chunk * BITMAP_CHUNK_SIZE'
+    )
+
+    bits = models.BinaryField(
+        verbose_name='Bits',
+        help_text='Big-endian bitmap, bit n set for task id n of the chunk',
+        blank=True
+    )
+
+    objects = LabelBitmapManager()
+
+    class Meta:
+        unique_together = [('label', 'chunk')]
+
+    def __str__(self):
+        return '{}-{}'.format(self.label_id, self.chunk)
+
+
+class TaskWatcher(models.Model):
+    '''
+    A user notified of the events of a task.
+    '''
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    task = models.ForeignKey(
+        'Task',
+        related_name='watchers',
+        on_delete=models.CASCADE,
+        verbose_name='Task',
+        help_text='The watched task'
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='watched_tasks',
+        on_delete=models.CASCADE,
+        verbose_name='User',
+        help_text='The watching user'
+    )
+
+    class Meta:
+        unique_together = [('task', 'user')]
+
+    def __str__(self):
+        return '{}-{}'.format(self.task_id, self.user_id)
+
+
+class NotificationOutboxManager(models.Manager):
+
+    def queue(self, events):
+        '''
+        Queue events for `tasks.notifications.process_outbox` to notify
+        the watchers of their tasks.
+        '''
+        self.bulk_create(
+            NotificationOutboxItem(event=event) for event in events
+        )
+
+
+class NotificationOutboxItem(models.Model):
+    '''
+    An event whose watchers are not notified yet.
+
+    Written along with the event, so fanning out to the watchers of
+    popular tasks happens in the `processnotifications` worker instead
+    of the request. Rows are deleted once processed.
+    '''
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    event = models.ForeignKey(
+        'TaskEventLog',
+        related_name='outbox_items',
+        on_delete=models.CASCADE,
+        verbose_name='Event',
+        help_text='The event to notify watchers of'
+    )
+
+    objects = NotificationOutboxManager()
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return '{}'.format(self.event_id)
+
+
+class Notification(models.Model):
+    '''
+    An event in the notification inbox of a user watching its task.
+
+    Inboxes are read newest first by id, which the index on `user` serves
+    as SQLite indexes end with the row id.
+    '''
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='notifications',
+        on_delete=models.CASCADE,
+        verbose_name='User',
+        help_text='The user notified'
+    )
+
+    event = models.ForeignKey(
+        'TaskEventLog',
+        related_name='notifications',
+        on_delete=models.CASCADE,
+        verbose_name='Event',
+        help_text='The event the user is notified of'
+    )
+
+    class Meta:
+        ordering = ['-id']
 
     def __str__(self):
-        return '{}-{}'.format(self.task.name[:20], self.get_event_display())
+        return '{}-{}'.format(self.user_id, self.event_id)
@@ -0,0 +1,111 @@
+import contextlib
+import multiprocessing
+
+from django.db import connection, connections
+from django.utils import timezone
+
+from ops import metrics
+
+from .models import Notification, NotificationOutboxItem, TaskWatcher
+
+
+def create_notifications(rows):
+    '''
+    Insert notifications given as (user id, event id) rows.
+    '''
+    Notification.objects.bulk_create([
+        Notification(user_id=user_id, event_id=event_id)
+        for user_id, event_id in rows
+    ])
+    return len(rows)
+
+
+@contextlib.contextmanager
+def notification_pool(processes=None):
+    '''
+    A pool of `processes` processes (one per CPU by default) to create
+    notifications with, or None to create them in this process.
+
+    In-memory SQLite databases cannot be shared with other processes,
+    they always get None.
+    '''
+    if processes == 1 or connection.vendor == 'sqlite' and \
+            connection.is_in_memory_db(connection.settings_dict['NAME']):
+        yield None
+        return
+
+    # Children open their own connections instead of sharing ours.
+    connections.close_all()
+    pool = multiprocessing.Pool(processes)
+    try:
+        yield pool
+    finally:
+        pool.close()
+        pool.join()
+
+
+def process_outbox(batch_size=500, chunk_size=1000, pool=None):
+    '''
+    Notify the watchers of the events in the outbox, `batch_size` events
+    at a time, until it is empty.
+
+    The notifications of a batch are inserted `chunk_size` at a time,
+    across the processes of `pool` if any, then the batch leaves the
+    outbox. A batch interrupted half way is processed again, replacing
+    the notifications already made for it. Users are not notified of
+    their own events.
+
+    The lag of each batch, the time its oldest event waited in the
+    outbox, is recorded in the `taskr_notification_lag_seconds` metric.
+
+    Returns the number of events processed, of notifications created and
+    the largest lag in seconds.
+    '''
+    events_count = notifications_count = 0
+    max_lag = 0
+    while True:
+        batch = list(
+            NotificationOutboxItem.objects.order_by('pk').values_list(
+                'pk', 'created_on', 'event_id', 'event__task_id',
+                'event__user_id'
+            )[:batch_size]
+        )
+        if not batch:
+            break
+
+        watchers = {}
+        for task_id, user_id in TaskWatcher.objects.filter(
+            task__in={row[3] for row in batch}
+        ).values_list('task_id', 'user_id'):
+            watchers.setdefault(task_id, []).append(user_id)
+        rows = [
+            (user_id, event_id)
+            for _, _, event_id, task_id, author_id in batch
+            for user_id in watchers.get(task_id, ())
+            if user_id != author_id
+        ]
+
+        Notification.objects.filter(
+            event__in=[row[2] for row in batch]
+        ).delete()
+        chunks = [
+            rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)
+        ]
+        if pool is None:
+            for chunk in chunks:
+                create_notifications(chunk)
+        else:
+            pool.map(create_notifications, chunks)
+
+        NotificationOutboxItem.objects.filter(
+            pk__in=[row[0] for row in batch]
+        ).delete()
+
+        lag = (timezone.now() - batch[0][1]).total_seconds()
+        metrics.observe('taskr_notification_lag_seconds', lag)
+        metrics.inc('taskr_notifications_total', len(rows))
+        events_count += len(batch)
+        notifications_count += len(rows)
+        max_lag = max(max_lag, lag)
+
+    return events_count, notifications_count, max_lag
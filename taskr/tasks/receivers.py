@@ -0,0 +1,126 @@
+from collections import OrderedDict
+
+from django.db.models.signals import m2m_changed, post_save, pre_save
+from django.dispatch import receiver
+
+from . import enums
+from .models import (
+    ActivityFeedItem, LabelBitmap, NotificationOutboxItem, Task, TaskChange,
+    TaskDailyStats, TaskEventLog
+)
+from .signals import events_logged
+
+
+@receiver(pre_save, sender=TaskEventLog)
+def attribute_event(sender, instance=None, raw=False, **kwargs):
+    '''
+    Stamp new events with what the analytics rollups count them for.
+    '''
+    if instance._state.adding and not raw:
+        TaskDailyStats.objects.attribute(instance)
+
+
+@receiver(post_save, sender=TaskEventLog)
+def send_events_logged(sender, instance=None, created=False, **kwargs):
+    '''
+    Send events_logged for new events.
+    '''
+    if created:
+        events_logged.send(sender=TaskEventLog, events=[instance])
+
+
+@receiver(events_logged)
+def record_task_changes(sender, events=(), **kwargs):
+    '''
+    Publish the tasks of new events to the task change feed.
+    '''
+    deleted = OrderedDict()
+    for event in events:
+        deleted[event.task_id] = event.event == enums.EVENT_DELETED
+    for task_id, task_deleted in deleted.items():
+        TaskChange.objects.record(task_id, deleted=task_deleted)
+
+
+@receiver(events_logged)
+def update_task_daily_stats(sender, events=(), **kwargs):
+    '''
+    Keep the analytics rollups up to date.
+    '''
+    for event in events:
+        TaskDailyStats.objects.record_event(event)
+
+
+@receiver(events_logged)
+def fan_out_activity(sender, events=(), **kwargs):
+    '''
+    Add new events to the activity feeds of the users of their task.
+    '''
+    ActivityFeedItem.objects.fan_out(events)
+
+
+@receiver(events_logged)
+def queue_notifications(sender, events=(), **kwargs):
+    '''
+    Queue new events for their watchers to be notified out of the request.
+    '''
+    NotificationOutboxItem.objects.queue(events)
+
+
+@receiver(events_logged)
+def count_task_events(sender, events=(), **kwargs):
+    '''
+    Keep the event count and last activity of tasks up to date.
+    '''
+    by_task = OrderedDict()
+    for event in events:
+        by_task.setdefault(event.task_id, []).append(event)
+    for task_id, task_events in by_task.items():
+        count_events(task_events[-1], len(task_events))
+
+
+@receiver(post_save, sender=TaskEventLog)
+def count_merged_events(sender, instance=None, created=False,
+                        update_fields=None, **kwargs):
+    '''
+    Count events merged into earlier ones too, and move their task to
+    the head of the change feed.
+    '''
+    if not created and 'count' in (update_fields or ()):
+        count_events(instance, 1)
+        TaskChange.objects.record(instance.task_id)
+
+
+def count_events(event, count):
+    '''
+    Add `count` events up to `event` to the counts of its task.
+    '''
+    Task.all_objects.filter(pk=event.task_id).add_events(
+        count, event.updated_on
+    )
+    # The view serializes the task it logged the event for next.
+    task = getattr(event, TaskEventLog.task.cache_name, None)
+    if task is not None:
+        task.event_count += count
+        task.last_event_at = event.updated_on
+
+
+@receiver(m2m_changed, sender=Task.labels.through)
+def index_task_labels(sender, instance=None, action=None, reverse=False,
+                      pk_set=None, **kwargs):
+    '''
+    Keep the label bitmaps in step with the labels of tasks, changed from
+    either side.
+    '''
+    if action == 'pre_clear':
+        pk_set = sender.objects.filter(
+            **{'label' if reverse else 'task': instance}
+        ).values_list('task_id' if reverse else 'label_id', flat=True)
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    present = action == 'post_add'
+    if reverse:
+        LabelBitmap.objects.set_tasks(instance.pk, pk_set, present)
+    else:
+        for label_id in pk_set:
+            LabelBitmap.objects.set_tasks(label_id, [instance.pk], present)
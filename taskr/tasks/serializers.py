@@ -1,25 +1,111 @@
 from rest_framework import serializers
 
-from .models import Task, TaskEventLog
+from config.identity_map import IdentityMapRelatedField
 
+from .models import (
+    ActivityFeedItem, Label, Notification, Task, TaskEventLog, TaskTreePath
+)
+
+
+def included_fields(request):
+    '''
+    Optional fields requested with the comma separated `include` query
+    parameter.
+    '''
+    return set(request.query_params.get('include', '').split(','))
+
+
+class TaskUpdateMixin(object):
+    '''
+    Updates save only the columns of the validated fields, see
+    `Task.save_fields`.
+    '''
+    def update(self, instance, validated_data):
+        labels = validated_data.pop('labels', None)
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.save_fields(validated_data)
+        if labels is not None:
+            instance.labels.set(labels)
+        return instance
+
+
+class TaskSerializer(TaskUpdateMixin, serializers.ModelSerializer):
+    '''
+    Optional fields are only serialized when listed in the `include`
+    context.
+    '''
+    serializer_related_field = IdentityMapRelatedField
+
+    optional_fields = ('event_count', 'last_event_at')
 
-class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = (
             'id', 'name', 'description', 'category',
-            'priority', 'status', 'reporter', 'assignee'
+            'priority', 'status', 'reporter', 'assignee', 'parent',
+            'labels', 'event_count', 'last_event_at'
         )
-        read_only_fields = ('id', 'status', 'reporter', 'assignee')
+        read_only_fields = (
+            'id', 'status', 'reporter', 'assignee',
+            'event_count', 'last_event_at'
+        )
+
+    def __init__(self, *args, **kwargs):
+        super(TaskSerializer, self).__init__(*args, **kwargs)
+        include = self.context.get('include', ())
+        for name in self.optional_fields:
+            if name not in include:
+                self.fields.pop(name)
+
+    def validate_parent(self, value):
+        if self.instance is not None and \
+                TaskTreePath.objects.creates_cycle(self.instance, value):
+            raise serializers.ValidationError(
+                'A task cannot be a subtask of itself or of its subtasks.'
+            )
+        return value
+
+
+class LabelSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Label
+        fields = ('id', 'name')
 
 
-class TaskStatusSerializer(serializers.ModelSerializer):
+class TaskStatusSerializer(TaskUpdateMixin, serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ('status',)
 
 
 class TaskEventLogSerializer(serializers.ModelSerializer):
+    description = serializers.SerializerMethodField()
+
     class Meta:
         model = TaskEventLog
-        fields = ('task', 'user', 'event', 'description')
+        fields = (
+            'task', 'user', 'event', 'field',
+            'old_value', 'new_value', 'description',
+            'count', 'updated_on'
+        )
+
+    def get_description(self, obj):
+        return obj.render_description(self.context.get('usernames'))
+
+
+class ActivityFeedItemSerializer(serializers.ModelSerializer):
+    created_on = serializers.DateTimeField(source='event.created_on')
+    event = TaskEventLogSerializer()
+
+    class Meta:
+        model = ActivityFeedItem
+        fields = ('id', 'created_on', 'event')
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    event = TaskEventLogSerializer()
+
+    class Meta:
+        model = Notification
+        fields = ('id', 'created_on', 'event')
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent with a list of new TaskEventLog `events` once they are saved,
+# bulk created ones included, which post_save is not sent for.
+events_logged = Signal(providing_args=['events'])
@@ -1,18 +1,54 @@
 import json
-
+import pickle
+from datetime import timedelta
+from importlib import import_module
+from unittest import skipUnless
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.conf import urls
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.core.urlresolvers import reverse
+from django.db import IntegrityError, connection
+from django.db.models.signals import pre_save
+from django.http import HttpResponse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.six import StringIO
+from django.utils.six.moves.urllib.parse import parse_qs, urlparse
 
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
+from rest_framework.views import APIView
 
 from . import enums
-from .models import Task, TaskCategory, TaskEventLog
+from .models import (
+    ActivityFeedItem, BITMAP_CHUNK_SIZE, Label, LabelBitmap, Notification,
+    NotificationOutboxItem, Task, TaskCategory, TaskChange, TaskEventLog,
+    TaskDependency, TaskVersion, VERSIONED_FIELDS
+)
+from .notifications import notification_pool, process_outbox
 from .serializers import TaskSerializer
+from .signals import events_logged
 
 User = get_user_model()
 
 
+class Failing(APIView):
+    def get(self, request):
+        raise RuntimeError('Failing on purpose.')
+
+
+# The project's urls and views batches cannot run, for test_batch_errors.
+urlpatterns = import_module(settings.ROOT_URLCONF).urlpatterns + [
+    urls.url(r'^failing/$', Failing.as_view()),
+    urls.url(r'^plain/$', lambda request: HttpResponse('plain')),
+]
+
+
 class TasksTest(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -208,6 +244,71 @@ class TasksTest(APITestCase):
         response = self.client.put(url, data)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_coalesce_edit_events(self):
+        '''
+        Test successive edits by the same user are logged as one event.
+        '''
+        task = self.create_some_task()
+        other_user = self.create_another_user()
+        url = reverse('task-detail', kwargs={'pk': task.pk})
+
+        def edit(user=self.user):
+            response = self.client.put(
+                url, {'name': 'edited'},
+                HTTP_AUTHORIZATION='Token {}'.format(user.auth_token.key)
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        def events():
+            return list(task.events.order_by('pk').values_list(
+                'event', 'user', 'count'
+            ))
+
+        edit()
+        cursor = TaskChange.objects.get(task_id=task.pk).pk
+        edit()
+        edit()
+        self.assertEqual(events(), [
+            (enums.EVENT_CREATED, self.user.pk, 1),
+            (enums.EVENT_EDITED, self.user.pk, 3),
+        ])
+        # ... merged edits still move the task in the change feed and
+        # count as activity, but are in the activity feed once.
+        self.assertGreater(
+            TaskChange.objects.get(task_id=task.pk).pk, cursor
+        )
+        task.refresh_from_db()
+        self.assertEqual(task.event_count, 4)
+        self.assertEqual(
+            self.user.activity.filter(event__event=enums.EVENT_EDITED).count(),
+            1
+        )
+
+        # Check edits are not merged across other events, users, or once
+        # the window is over.
+        self.client.post(
+            reverse('task-change-status', kwargs={'pk': task.pk}),
+            {'status': enums.STATUS_IN_PROGRESS}, **self.headers
+        )
+        edit()
+        edit(other_user)
+        edit(other_user)
+        task.events.filter(user=other_user).update(
+            updated_on=timezone.now() - timedelta(
+                seconds=settings.TASKS_EVENT_COALESCE_WINDOW + 1
+            )
+        )
+        edit(other_user)
+        with self.settings(TASKS_EVENT_COALESCE_WINDOW=0):
+            edit(other_user)
+        self.assertEqual(events()[2:], [
+            (enums.EVENT_STATUS_CHANGED, self.user.pk, 1),
+            (enums.EVENT_EDITED, self.user.pk, 1),
+            (enums.EVENT_EDITED, other_user.pk, 2),
+            (enums.EVENT_EDITED, other_user.pk, 1),
+            (enums.EVENT_EDITED, other_user.pk, 1),
+        ])
+
     def test_delete_task_detail(self):
         '''
         Test the DELETE method on TaskDetail view.
@@ -235,6 +336,65 @@ class TasksTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(Task.objects.filter(pk=task.pk).exists(), False)
 
+        # ... deleting it again is not possible
+        response = self.client.delete(url, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_save_deleted_task(self):
+        '''
+        Test saving a task loaded before it was deleted does not bring
+        it back.
+        '''
+        task = self.create_some_task()
+        stale = Task.objects.get(pk=task.pk)
+        task_serializer = TaskSerializer(
+            Task.objects.get(pk=task.pk), data={'name': 'renamed'},
+            partial=True
+        )
+        self.assertTrue(task_serializer.is_valid())
+
+        # Deleted by another request meanwhile.
+        Task.objects.filter(pk=task.pk).soft_delete()
+
+        stale.assignee = self.user
+        with self.assertRaises(Task.DoesNotExist):
+            stale.save_fields(['assignee'])
+        with self.assertRaises(Task.DoesNotExist):
+            task_serializer.save()
+
+        task = Task.all_objects.get(pk=task.pk)
+        self.assertIsNotNone(task.deleted_on)
+        self.assertEqual(task.name, 'some task')
+        self.assertIsNone(task.assignee)
+
+    def test_purge_deleted_task(self):
+        '''
+        Test that soft-deleted tasks and their event logs are purged
+        in batches by the purgetasks command.
+        '''
+        task = self.create_some_task()
+        other_task = self.create_some_task()
+        TaskEventLog.objects.bulk_create([
+            TaskEventLog(task=task, user=self.user, event=enums.EVENT_EDITED)
+            for _ in range(25)
+        ])
+
+        url = reverse('task-detail', kwargs={'pk': task.pk})
+        response = self.client.delete(url, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # ... the row is kept until purged
+        self.assertEqual(Task.all_objects.filter(pk=task.pk).exists(), True)
+
+        call_command('purgetasks', batch_size=10, stdout=StringIO())
+
+        self.assertEqual(Task.all_objects.filter(pk=task.pk).exists(), False)
+        self.assertEqual(TaskEventLog.objects.filter(task=task.pk).count(), 0)
+
+        # ... other tasks are untouched
+        self.assertEqual(Task.objects.filter(pk=other_task.pk).exists(), True)
+        self.assertEqual(other_task.events.count(), 1)
+
     def test_post_task_assign(self):
         '''
         Test the POST method on TaskAssign view.
@@ -481,3 +641,1511 @@ class TasksTest(APITestCase):
         Task.objects.get(pk=task.pk).delete()
         event_log_count = TaskEventLog.objects.filter(task__pk=task.pk).count()
         self.assertEqual(event_log_count, 0)
+
+    def test_get_task_changes(self):
+        '''
+        Test the GET method of TaskChangeFeed view.
+        Checks created, edited and deleted tasks since a cursor.
+        '''
+        url = reverse('task-changes')
+        task = self.create_some_task()
+        other_task = self.create_some_task()
+
+        # Check full sync from an empty cursor.
+        response = self.client.get(url, {'cursor': 0}, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t['id'] for t in response.data['tasks']],
+            [task.pk, other_task.pk]
+        )
+        self.assertEqual(response.data['deleted'], [])
+        self.assertEqual(response.data['has_more'], False)
+
+        # ... nothing changed since the returned cursor
+        cursor = response.data['cursor']
+        response = self.client.get(url, {'cursor': cursor}, **self.headers)
+        self.assertEqual(response.data['tasks'], [])
+        self.assertEqual(response.data['cursor'], cursor)
+
+        # Edit one task and delete the other one.
+        update_url = reverse('task-detail', kwargs={'pk': task.pk})
+        self.client.put(update_url, {'name': 'edited'}, **self.headers)
+        delete_url = reverse('task-detail', kwargs={'pk': other_task.pk})
+        self.client.delete(delete_url, **self.headers)
+
+        response = self.client.get(url, {'cursor': cursor}, **self.headers)
+        self.assertEqual(len(response.data['tasks']), 1)
+        self.assertEqual(response.data['tasks'][0]['name'], 'edited')
+        self.assertEqual(response.data['deleted'], [other_task.pk])
+
+        # ... tombstones outlive purged tasks
+        call_command('purgetasks', stdout=StringIO())
+        response = self.client.get(url, {'cursor': cursor}, **self.headers)
+        self.assertEqual(response.data['deleted'], [other_task.pk])
+
+        # Check paging through changes with a limit.
+        response = self.client.get(
+            url, {'cursor': 0, 'limit': 1}, **self.headers
+        )
+        self.assertEqual(response.data['has_more'], True)
+
+        # Check invalid cursor and unauthorized user.
+        response = self.client.get(url, {'cursor': 'x'}, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_get_multiple_tasks(self):
+        '''
+        Test the GET method of TaskMultiGet view.
+        '''
+        url = reverse('task-multi-get')
+        tasks = [self.create_some_task() for _ in range(3)]
+        ids = [tasks[2].pk, 9999, tasks[0].pk]
+
+        # Check tasks are returned in order with a one query lookup and
+        # one for their labels, plus one query for token authentication.
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                url, {'ids': ','.join(str(pk) for pk in ids)}, **self.headers
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data], ids)
+        self.assertEqual(response.data[0], TaskSerializer(tasks[2]).data)
+
+        # ... missing ids get a not found marker
+        self.assertEqual(
+            response.data[1], {'id': 9999, 'detail': 'Not found.'}
+        )
+
+        # Check invalid and too many ids.
+        response = self.client.get(url, {'ids': '1,a'}, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(
+            url, {'ids': ','.join(str(pk) for pk in range(1, 1000))},
+            **self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Check unauthorized user.
+        response = self.client.get(url, {'ids': tasks[0].pk})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_post_task_claim(self):
+        '''
+        Test the POST method of TaskClaim view.
+        '''
+        url = reverse('task-claim')
+        general = TaskCategory.objects.get(name='General')
+        bug = TaskCategory.objects.get(name='Bug')
+        other_user = self.create_another_user()
+
+        low = self.create_some_task(priority=enums.PRIORITY_LOW)
+        high = self.create_some_task(priority=enums.PRIORITY_HIGH)
+        high_later = self.create_some_task(priority=enums.PRIORITY_HIGH)
+        self.create_some_task(priority=enums.PRIORITY_HIGHEST, category=bug)
+        self.create_some_task(
+            priority=enums.PRIORITY_HIGHEST, assignee=other_user
+        )
+        self.create_some_task(
+            priority=enums.PRIORITY_HIGHEST, status=enums.STATUS_DONE
+        )
+
+        # Check tasks are claimed by priority, then age, once each.
+        claimed = []
+        logged = []
+
+        def log_events(sender, events=(), **kwargs):
+            logged.extend(events)
+
+        events_logged.connect(log_events)
+        self.addCleanup(events_logged.disconnect, log_events)
+        for _ in range(3):
+            response = self.client.post(
+                url, {'category': general.pk}, **self.headers
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['assignee'], self.user.pk)
+            self.assertEqual(response.data['status'], enums.STATUS_IN_PROGRESS)
+            claimed.append(response.data['id'])
+        self.assertEqual(claimed, [high.pk, high_later.pk, low.pk])
+
+        # ... claiming logs the assign and status change events
+        self.assertEqual(
+            list(high.events.values_list('event', flat=True)),
+            [
+                enums.EVENT_CREATED,
+                enums.EVENT_ASSIGNED,
+                enums.EVENT_STATUS_CHANGED
+            ]
+        )
+
+        # ... and sends them once, with their ids, to the receivers of
+        # events_logged that publish them.
+        claim_events = list(high.events.exclude(event=enums.EVENT_CREATED))
+        self.assertEqual(logged[:2], claim_events)
+        self.assertEqual(len(logged), 6)
+        self.assertEqual(
+            TaskChange.objects.filter(task_id=high.pk).count(), 1
+        )
+        self.assertEqual(
+            ActivityFeedItem.objects.filter(event__in=claim_events).count(),
+            2
+        )
+        self.assertEqual(
+            NotificationOutboxItem.objects.filter(
+                event__in=claim_events
+            ).count(),
+            2
+        )
+
+        # Check nothing left to claim.
+        response = self.client.post(
+            url, {'category': general.pk}, **self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        # Check invalid category and unauthorized user.
+        response = self.client.post(url, {'category': ''}, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {'category': general.pk})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_task_claim_query_plan(self):
+        '''
+        Test the next task to claim is read from the claim index alone,
+        which migrations rebuilding tasks_task drop on SQLite.
+        '''
+        sql, params = Task.objects.claimable(
+            self.get_task_category_pk('General')
+        ).claim_order()[:1].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        self.assertEqual(len(plan), 1)
+        self.assertIn('USING COVERING INDEX tasks_task_claim', plan[0])
+
+    def test_event_log_payloads(self):
+        '''
+        Test that events store structured fields and render their
+        description when serialized.
+        '''
+        task = self.create_some_task()
+        other_user = self.create_another_user()
+
+        self.client.post(
+            reverse('task-assign', kwargs={'pk': task.pk}),
+            {'user': other_user.pk}, **self.headers
+        )
+        self.client.post(
+            reverse('task-change-status', kwargs={'pk': task.pk}),
+            {'status': enums.STATUS_DONE}, **self.headers
+        )
+
+        assigned = task.events.get(event=enums.EVENT_ASSIGNED)
+        self.assertEqual(
+            (assigned.field, assigned.old_value, assigned.new_value),
+            ('assignee', None, other_user.pk)
+        )
+        self.assertEqual(assigned.description, '')
+
+        # Check status transitions can be queried from the fields.
+        done = TaskEventLog.objects.filter(
+            event=enums.EVENT_STATUS_CHANGED, new_value=enums.STATUS_DONE
+        )
+        self.assertEqual(
+            list(done.values_list('task', 'old_value')),
+            [(task.pk, enums.STATUS_TODO)]
+        )
+
+        # Check descriptions are rendered without a query per event.
+        url = reverse('task-event-log', kwargs={'pk': task.pk})
+        with self.assertNumQueries(4):
+            response = self.client.get(url, **self.headers)
+        self.assertEqual(
+            [log['description'] for log in response.data],
+            [
+                'Task created.',
+                'Task assigned to dummyuser.',
+                'Task status changed to "Done".'
+            ]
+        )
+
+    def test_backfill_event_log_payloads(self):
+        '''
+        Test the migration that parses existing event descriptions.
+        '''
+        migration = import_module('tasks.migrations.0006_taskeventlog_payload')
+        task = self.create_some_task()
+        other_user = self.create_another_user()
+
+        descriptions = [
+            (enums.EVENT_ASSIGNED, 'Task assigned to dummyuser.'),
+            (enums.EVENT_STATUS_CHANGED,
+             'Task status changed to "ReturnDict([(\'status\', 2)])".'),
+            (enums.EVENT_STATUS_CHANGED,
+             'Task status changed to "{\'status\': 3}".'),
+            (enums.EVENT_ASSIGNED, 'Task assigned to None.'),
+            (enums.EVENT_ASSIGNED, 'Task assigned to someone-gone.'),
+        ]
+        for event, description in descriptions:
+            TaskEventLog.objects.create(
+                task=task, user=self.user,
+                event=event, description=description
+            )
+
+        migration.backfill_event_payloads(django_apps, None)
+
+        self.assertEqual(
+            list(task.events.values_list(
+                'field', 'old_value', 'new_value', 'description'
+            )),
+            [
+                ('', None, None, ''),
+                ('assignee', None, other_user.pk, ''),
+                ('status', enums.STATUS_TODO, enums.STATUS_IN_PROGRESS, ''),
+                ('status', enums.STATUS_IN_PROGRESS, enums.STATUS_DONE, ''),
+                ('assignee', other_user.pk, None, ''),
+                ('', None, None, 'Task assigned to someone-gone.'),
+            ]
+        )
+
+    def test_backfill_event_attribution(self):
+        '''
+        Test the migration that stamps existing events for the rollups.
+        '''
+        migration = import_module('tasks.migrations.0016_event_attribution')
+        other_user = self.create_another_user()
+        task = self.create_some_task()
+        for event, field, old_value, new_value in [
+            (enums.EVENT_STATUS_CHANGED, 'status',
+             enums.STATUS_TODO, enums.STATUS_IN_PROGRESS),
+            (enums.EVENT_STATUS_CHANGED, 'status',
+             enums.STATUS_IN_PROGRESS, enums.STATUS_DONE),
+            (enums.EVENT_ASSIGNED, 'assignee', self.user.pk, other_user.pk),
+        ]:
+            TaskEventLog.objects.create(
+                task=task, user=self.user, event=event,
+                field=field, old_value=old_value, new_value=new_value
+            )
+        Task.objects.filter(pk=task.pk).update(assignee=other_user)
+        TaskEventLog.objects.update(
+            task_category=None, task_assignee=None,
+            lead_time=None, cycle_time=None
+        )
+
+        with connection.cursor() as cursor:
+            for sql in migration.Migration.operations[-2].sql:
+                cursor.execute(sql)
+        migration.backfill_event_attribution(django_apps, None)
+
+        created, started, done, assigned = task.events.order_by('pk')
+        self.assertEqual(created.task_category_id, task.category_id)
+        self.assertIsNone(created.task_assignee_id)
+        self.assertIsNone(started.task_category_id)
+        self.assertEqual(done.task_category_id, task.category_id)
+        self.assertEqual(done.task_assignee_id, self.user.pk)
+        self.assertGreaterEqual(done.lead_time, 0)
+        self.assertGreaterEqual(done.cycle_time, 0)
+        self.assertIsNone(assigned.task_category_id)
+
+    def test_backfill_activity_feed(self):
+        '''
+        Test the migration that fills the feeds with existing events.
+        '''
+        migration = import_module('tasks.migrations.0009_activityfeeditem')
+        other_user = self.create_another_user()
+        task = self.create_some_task(assignee=other_user)
+        self.create_some_task(reporter=other_user)
+        ActivityFeedItem.objects.all().delete()
+
+        with connection.cursor() as cursor:
+            for sql in migration.Migration.operations[-1].sql:
+                cursor.execute(sql)
+
+        self.assertEqual(
+            list(self.user.activity.values_list('event__task', flat=True)),
+            [task.pk]
+        )
+        self.assertEqual(other_user.activity.count(), 2)
+
+    def test_get_task_analytics(self):
+        '''
+        Test the GET method of TaskAnalytics view.
+        Checks rollups are kept up to date and match a rebuild.
+        '''
+        url = reverse('task-analytics')
+        bug = TaskCategory.objects.get(name='Bug')
+        task = self.create_some_task()
+        self.create_some_task(category=bug)
+        self.create_some_task(category=bug)
+
+        # Move a task through in progress to done, an hour after creation.
+        status_url = reverse('task-change-status', kwargs={'pk': task.pk})
+        self.client.post(
+            reverse('task-assign', kwargs={'pk': task.pk}),
+            {'user': self.user.pk}, **self.headers
+        )
+        self.client.post(
+            status_url, {'status': enums.STATUS_IN_PROGRESS}, **self.headers
+        )
+        Task.objects.filter(pk=task.pk).update(
+            created_on=task.created_on - timedelta(hours=1)
+        )
+        self.client.post(
+            status_url, {'status': enums.STATUS_DONE}, **self.headers
+        )
+
+        response = self.client.get(url, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        totals = {t['category']: t for t in response.data['totals']}
+        self.assertEqual(totals[bug.pk]['created'], 2)
+        self.assertEqual(totals[bug.pk]['throughput'], 0)
+        self.assertEqual(totals[bug.pk]['lead_time'], None)
+
+        general = totals[task.category_id]
+        self.assertEqual(general['created'], 1)
+        self.assertEqual(general['throughput'], 1)
+        self.assertGreaterEqual(general['lead_time'], 3600)
+        self.assertLess(general['cycle_time'], 60)
+
+        # Check throughput grouped by assignee.
+        response = self.client.get(
+            url, {'group_by': 'assignee'}, **self.headers
+        )
+        totals = {t['assignee']: t for t in response.data['totals']}
+        self.assertEqual(totals[self.user.pk]['throughput'], 1)
+        self.assertEqual(totals[None]['created'], 3)
+
+        # Check a rebuild from the event log gives the same answer.
+        before = self.client.get(url, **self.headers).data
+        call_command('rebuildtaskstats', stdout=StringIO())
+        after = self.client.get(url, **self.headers).data
+        self.assertEqual(after, before)
+
+        # ... even once the task was reassigned and moved to another
+        # category, completions stay credited as they were.
+        Task.objects.filter(pk=task.pk).update(
+            category=bug, assignee=self.create_another_user()
+        )
+        call_command('rebuildtaskstats', stdout=StringIO())
+        response = self.client.get(
+            url, {'group_by': 'assignee'}, **self.headers
+        )
+        totals = {t['assignee']: t for t in response.data['totals']}
+        self.assertEqual(totals[self.user.pk]['throughput'], 1)
+        self.assertEqual(self.client.get(url, **self.headers).data, before)
+
+        # Check invalid parameters and unauthorized user.
+        response = self.client.get(url, {'group_by': 'x'}, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(
+            url, {'since': '2016-13-01'}, **self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @skipUnless(
+        django_apps.is_installed('django.contrib.admin'),
+        'The admin is not installed in the API-only settings.'
+    )
+    def test_admin_changelists(self):
+        '''
+        Test that the admin changelists run a fixed number of queries
+        and change forms do not list every user.
+        '''
+        self.client.login(username='testuser', password='testuser')
+        task = self.create_some_task()
+
+        for url in [
+            reverse('admin:tasks_task_changelist'),
+            reverse('admin:tasks_taskeventlog_changelist'),
+        ]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            # ... more rows, same number of queries
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            for _ in range(5):
+                self.create_some_task()
+            cache.clear()
+            with self.assertNumQueries(len(queries)):
+                self.client.get(url)
+
+            # ... and the count is then served from the cache
+            with self.assertNumQueries(len(queries) - 1):
+                self.client.get(url)
+
+        # Check the reporter and assignee use raw id widgets.
+        response = self.client.get(
+            reverse('admin:tasks_task_change', args=[task.pk])
+        )
+        self.assertNotContains(response, '<select name="reporter"')
+        self.assertContains(response, 'vForeignKeyRawIdAdminField')
+
+    def test_get_tasks_pagination(self):
+        '''
+        Test page size and count modes of the TaskListCreate view.
+        '''
+        url = reverse('task-list')
+        for _ in range(5):
+            self.create_some_task()
+
+        # Check default and client selected page sizes.
+        response = self.client.get(url, **self.headers)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(response.data['count'], 5)
+
+        response = self.client.get(url, {'page_size': 4}, **self.headers)
+        self.assertEqual(len(response.data['results']), 4)
+
+        # ... capped by the server
+        for _ in range(100):
+            self.create_some_task()
+        response = self.client.get(url, {'page_size': 1000}, **self.headers)
+        self.assertEqual(len(response.data['results']), 100)
+
+        # Check pages without a count, no COUNT(*) query is made.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                url, {'count': 'none', 'page_size': 50, 'page': 2},
+                **self.headers
+            )
+        self.assertNotIn('COUNT', ' '.join(q['sql'] for q in queries))
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 50)
+        next_query = parse_qs(urlparse(response.data['next']).query)
+        self.assertEqual(next_query['page'], ['3'])
+        previous_query = parse_qs(urlparse(response.data['previous']).query)
+        self.assertNotIn('page', previous_query)
+
+        response = self.client.get(
+            url, {'count': 'none', 'page_size': 50, 'page': 3}, **self.headers
+        )
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(response.data['next'], None)
+
+        response = self.client.get(
+            url, {'count': 'none', 'page': 'last'}, **self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Check cached counts.
+        cache.clear()
+        response = self.client.get(url, {'count': 'cached'}, **self.headers)
+        self.assertEqual(response.data['count'], 105)
+
+        self.create_some_task()
+        response = self.client.get(url, {'count': 'cached'}, **self.headers)
+        self.assertEqual(response.data['count'], 105)
+
+    def test_batch(self):
+        '''
+        Test running task operations in one batch request.
+        Checks responses are returned in order and refer to each other.
+        '''
+        url = reverse('batch')
+        other_user = User.objects.create_user('dummyuser')
+        data = {
+            'operations': [
+                {
+                    'method': 'POST',
+                    'view': 'task-list',
+                    'body': {
+                        'name': 'batched task',
+                        'category': self.get_task_category_pk('General'),
+                        'priority': enums.PRIORITY_HIGH
+                    }
+                },
+                {
+                    'method': 'POST',
+                    'view': 'task-assign',
+                    'kwargs': {'pk': {'$ref': '0.id'}},
+                    'body': {'user': other_user.pk}
+                },
+                {
+                    'method': 'POST',
+                    'view': 'task-change-status',
+                    'kwargs': {'pk': {'$ref': '0.id'}},
+                    'body': {'status': enums.STATUS_IN_PROGRESS}
+                },
+                {
+                    'method': 'GET',
+                    'view': 'task-detail',
+                    'kwargs': {'pk': {'$ref': '0.id'}}
+                },
+            ]
+        }
+        response = self.client.post(
+            url, json.dumps(data), content_type='application/json',
+            HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['rolled_back'])
+        self.assertEqual(
+            [result['status'] for result in response.data['responses']],
+            [201, 200, 200, 200]
+        )
+        created, task = [
+            response.data['responses'][i]['body'] for i in (0, 3)
+        ]
+        self.assertEqual(task['id'], created['id'])
+        self.assertEqual(task['assignee'], other_user.pk)
+        self.assertEqual(task['status'], enums.STATUS_IN_PROGRESS)
+
+        # Check failed operations do not stop a batch that is not atomic.
+        data = {
+            'operations': [
+                {'method': 'GET', 'view': 'task-detail', 'kwargs': {'pk': 0}},
+                {'method': 'GET', 'view': 'task-detail',
+                 'kwargs': {'pk': {'$ref': '0.id'}}},
+                {'method': 'GET', 'url': '/nowhere/'},
+                {'method': 'POST', 'view': 'batch', 'body': data},
+                # Operations can be given by url as well.
+                {'method': 'GET', 'url': '/tasks/{}/'.format(task['id'])},
+            ]
+        }
+        response = self.client.post(
+            url, json.dumps(data), content_type='application/json',
+            HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+        )
+        self.assertEqual(
+            [result['status'] for result in response.data['responses']],
+            [404, 400, 404, 400, 200]
+        )
+
+        # Check unauthenticated batches are refused.
+        response = self.client.post(
+            url, json.dumps(data), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_batch_deleted_tasks(self):
+        '''
+        Test deleted tasks looked up by an operation of a batch stay
+        deleted for the operations after it.
+        '''
+        deleted = self.create_some_task()
+        task = self.create_some_task()
+        Task.objects.filter(pk=deleted.pk).soft_delete()
+        at = (timezone.now() + timedelta(days=1)).isoformat()
+
+        data = {
+            'operations': [
+                {'method': 'GET', 'view': 'task-as-of',
+                 'kwargs': {'pk': deleted.pk}, 'query': {'at': at}},
+                {'method': 'GET', 'view': 'task-detail',
+                 'kwargs': {'pk': deleted.pk}},
+                {'method': 'PUT', 'view': 'task-detail',
+                 'kwargs': {'pk': task.pk}, 'body': {'parent': deleted.pk}},
+                {'method': 'POST', 'view': 'task-blockers',
+                 'kwargs': {'pk': task.pk}, 'body': {'blocker': deleted.pk}},
+            ]
+        }
+        response = self.client.post(
+            reverse('batch'), json.dumps(data),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+        )
+        self.assertEqual(
+            [result['status'] for result in response.data['responses']],
+            [200, 404, 400, 400]
+        )
+        self.assertIsNone(Task.objects.get(pk=task.pk).parent_id)
+        self.assertFalse(TaskDependency.objects.exists())
+
+    @override_settings(ROOT_URLCONF='tasks.tests')
+    def test_batch_errors(self):
+        '''
+        Test references are explicit, and operations that cannot be
+        batched or raise an error fail on their own.
+        '''
+        data = {
+            'operations': [
+                {
+                    'method': 'POST',
+                    'view': 'task-list',
+                    'body': {
+                        'name': 'batched task',
+                        'description': '$100.50',
+                        'category': self.get_task_category_pk('General')
+                    }
+                },
+                {'method': 'GET', 'view': 'task-detail',
+                 'kwargs': {'pk': {'$ref': 'id'}}},
+                {'method': 'GET', 'url': '/plain/'},
+                {'method': 'GET', 'url': '/failing/'},
+                {'method': 'GET', 'view': 'task-detail',
+                 'kwargs': {'pk': {'$ref': '0.id'}}},
+            ]
+        }
+        response = self.client.post(
+            reverse('batch'), json.dumps(data),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['responses']
+        self.assertEqual(
+            [result['status'] for result in results],
+            [201, 400, 400, 500, 200]
+        )
+        self.assertEqual(results[-1]['body']['description'], '$100.50')
+
+    def test_atomic_batch(self):
+        '''
+        Test an atomic batch is rolled back when an operation fails.
+        '''
+        task = self.create_some_task()
+        data = {
+            'atomic': True,
+            'operations': [
+                {
+                    'method': 'POST',
+                    'view': 'task-change-status',
+                    'kwargs': {'pk': task.pk},
+                    'body': {'status': enums.STATUS_DONE}
+                },
+                {
+                    'method': 'POST',
+                    'view': 'task-change-status',
+                    'kwargs': {'pk': task.pk},
+                    'body': {'status': 42}
+                },
+                {
+                    'method': 'DELETE',
+                    'view': 'task-detail',
+                    'kwargs': {'pk': task.pk}
+                },
+            ]
+        }
+
+        response = self.client.post(
+            reverse('batch'), json.dumps(data),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['rolled_back'])
+        self.assertEqual(
+            [result['status'] for result in response.data['responses']],
+            [200, 400, 424]
+        )
+
+        task = Task.objects.get(pk=task.pk)
+        self.assertEqual(task.status, enums.STATUS_TODO)
+        self.assertEqual(
+            TaskEventLog.objects.filter(
+                task=task, event=enums.EVENT_STATUS_CHANGED
+            ).count(),
+            0
+        )
+
+    def test_identity_map_queries(self):
+        '''
+        Test the identity map saves queries in mutating views.
+        Runs the same requests with and without the identity map
+        middleware and compares their query counts.
+        '''
+        with override_settings(MIDDLEWARE=[
+            middleware for middleware in settings.MIDDLEWARE
+            if middleware != 'config.identity_map.IdentityMapMiddleware'
+        ]):
+            plain_client = APIClient()
+            plain_client.get(reverse('checkpoint'))
+
+        def request(client, url, data):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post(
+                    url, json.dumps(data), content_type='application/json',
+                    HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+                )
+            self.assertLess(response.status_code, 400)
+            return response, [query['sql'] for query in queries]
+
+        def run(client):
+            response, create = request(client, reverse('task-list'), {
+                'name': 'some task',
+                'category': self.get_task_category_pk('General')
+            })
+            pk = response.data['id']
+            assign_url = reverse('task-assign', kwargs={'pk': pk})
+            status_url = reverse('task-change-status', kwargs={'pk': pk})
+            return {
+                'create': create,
+                'assign': request(
+                    client, assign_url, {'user': self.user.pk}
+                )[1],
+                'reassign': request(
+                    client, assign_url, {'user': self.user.pk}
+                )[1],
+                'status': request(
+                    client, status_url, {'status': enums.STATUS_DONE}
+                )[1],
+            }
+
+        # The first run creates the analytics rollup rows.
+        run(self.client)
+        plain = run(plain_client)
+        mapped = run(self.client)
+
+        # The event receivers reuse the task the view saved.
+        self.assertLess(len(mapped['create']), len(plain['create']))
+        self.assertLess(len(mapped['status']), len(plain['status']))
+
+        # Neither the assigned user, who is the requesting user, nor the
+        # current assignee are fetched.
+        for sql in mapped['assign'] + mapped['reassign']:
+            self.assertNotIn('FROM "auth_user"', sql)
+        self.assertEqual(len(mapped['reassign']), 2)
+
+    def test_get_activity_feed(self):
+        '''
+        Test the GET method of ActivityFeed view.
+        Checks the events of the user's tasks are paginated newest
+        first, and events of other tasks are left out.
+        '''
+        url = reverse('activity-feed')
+        other_user = self.create_another_user()
+
+        reported = self.create_some_task()
+        assigned = self.create_some_task(reporter=other_user)
+        self.create_some_task(
+            reporter=other_user, category=TaskCategory.objects.get(name='Bug')
+        )
+        claimable = self.create_some_task(reporter=other_user)
+
+        assign_url = reverse('task-assign', kwargs={'pk': assigned.pk})
+        self.client.post(assign_url, {'user': self.user.pk}, **self.headers)
+        self.client.post(
+            reverse('task-change-status', kwargs={'pk': reported.pk}),
+            {'status': enums.STATUS_IN_PROGRESS}, **self.headers
+        )
+        self.client.post(
+            reverse('task-claim'), {'category': claimable.category_id},
+            **self.headers
+        )
+        # The previous assignee still hears of the reassignment.
+        self.client.post(assign_url, {'user': other_user.pk}, **self.headers)
+
+        events = []
+        next_url = url + '?page_size=2'
+        while next_url:
+            with self.assertNumQueries(3):
+                response = self.client.get(next_url, **self.headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            events.extend(item['event'] for item in response.data['results'])
+            next_url = response.data['next']
+
+        self.assertEqual(
+            [(event['task'], event['event']) for event in events],
+            [
+                (assigned.pk, enums.EVENT_ASSIGNED),
+                (claimable.pk, enums.EVENT_STATUS_CHANGED),
+                (claimable.pk, enums.EVENT_ASSIGNED),
+                (reported.pk, enums.EVENT_STATUS_CHANGED),
+                (assigned.pk, enums.EVENT_ASSIGNED),
+                (reported.pk, enums.EVENT_CREATED),
+            ]
+        )
+        self.assertEqual(
+            events[0]['description'],
+            'Task assigned to {}.'.format(other_user.username)
+        )
+
+        # Check the other user's feed, who reported the other tasks.
+        response = self.client.get(
+            url, HTTP_AUTHORIZATION='Token {}'.format(
+                other_user.auth_token.key
+            )
+        )
+        self.assertEqual(len(response.data['results']), 7)
+
+    def test_task_event_counts(self):
+        '''
+        Test the optional event count and last activity of tasks.
+        Checks they follow logged events and are served without extra
+        queries.
+        '''
+        task = self.create_some_task()
+        other = self.create_some_task()
+        self.client.post(
+            reverse('task-assign', kwargs={'pk': task.pk}),
+            {'user': self.user.pk}, **self.headers
+        )
+        response = self.client.post(
+            reverse('task-change-status', kwargs={'pk': task.pk}),
+            {'status': enums.STATUS_IN_PROGRESS}, **self.headers
+        )
+        self.assertNotIn('event_count', response.data)
+
+        url = reverse('task-list')
+        with self.assertNumQueries(4):
+            self.client.get(url, **self.headers)
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                url, {'include': 'event_count,last_event_at'},
+                **self.headers
+            )
+        last_event_at = TaskSerializer(
+            context={'include': ['last_event_at']}
+        ).fields['last_event_at'].to_representation
+        self.assertEqual(
+            [
+                (item['id'], item['event_count'], item['last_event_at'])
+                for item in response.data['results']
+            ],
+            [
+                (task.pk, 3, last_event_at(
+                    task.events.latest('pk').updated_on
+                )),
+                (other.pk, 1, last_event_at(
+                    other.events.latest('pk').updated_on
+                )),
+            ]
+        )
+
+        # Check the detail, claim and the task the view responds with.
+        response = self.client.get(
+            reverse('task-detail', kwargs={'pk': other.pk}),
+            {'include': 'event_count'}, **self.headers
+        )
+        self.assertEqual(response.data['event_count'], 1)
+        self.assertNotIn('last_event_at', response.data)
+
+        self.client.post(
+            reverse('task-claim'), {'category': other.category_id},
+            **self.headers
+        )
+        other.refresh_from_db()
+        self.assertEqual(other.event_count, 3)
+        self.assertEqual(
+            other.last_event_at, other.events.latest('pk').updated_on
+        )
+
+        response = self.client.put(
+            reverse('task-detail', kwargs={'pk': task.pk}) +
+            '?include=event_count',
+            json.dumps({'name': 'renamed'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+        )
+        task.refresh_from_db()
+        self.assertEqual(task.event_count, 4)
+
+    def test_stale_task_keeps_event_counts(self):
+        '''
+        Test saving a task loaded before an event was logged keeps the
+        event count of that event.
+        '''
+        task = self.create_some_task()
+        other_user = self.create_another_user()
+
+        def stale_task():
+            stale = Task.objects.get(pk=task.pk)
+            # Logged by another request meanwhile.
+            TaskEventLog.objects.create(
+                task=task, user=other_user, event=enums.EVENT_EDITED
+            )
+            return stale
+
+        stale = stale_task()
+        stale.assignee = other_user
+        stale.save_fields(['assignee'])
+
+        task_serializer = TaskSerializer(
+            stale_task(), data={'name': 'renamed'}, partial=True
+        )
+        self.assertTrue(task_serializer.is_valid())
+        task_serializer.save()
+
+        task.refresh_from_db()
+        self.assertEqual(task.event_count, 3)
+        self.assertEqual(
+            task.last_event_at, task.events.latest('pk').updated_on
+        )
+        self.assertEqual(task.name, 'renamed')
+        self.assertEqual(task.assignee, other_user)
+
+    def test_backfill_event_counts(self):
+        '''
+        Test the migration that counts existing events.
+        '''
+        migration = import_module('tasks.migrations.0010_task_event_count')
+        task = self.create_some_task()
+        untouched = self.create_some_task()
+        TaskEventLog.objects.create(
+            task=task, user=self.user, event=enums.EVENT_EDITED
+        )
+        untouched.events.all().delete()
+        Task.objects.update(event_count=0, last_event_at=None)
+
+        with connection.cursor() as cursor:
+            for sql in migration.Migration.operations[-1].sql:
+                cursor.execute(sql)
+
+        task.refresh_from_db()
+        untouched.refresh_from_db()
+        self.assertEqual(task.event_count, 2)
+        self.assertEqual(
+            task.last_event_at, task.events.latest('pk').created_on
+        )
+        self.assertEqual(untouched.event_count, 0)
+        self.assertIsNone(untouched.last_event_at)
+
+    @override_settings(TASKS_VERSION_SNAPSHOT_INTERVAL=3)
+    def test_get_task_as_of(self):
+        '''
+        Test the GET method of TaskAsOf view.
+        Checks tasks are rebuilt as of any time from their versions.
+        '''
+        other_user = self.create_another_user()
+        response = self.client.post(reverse('task-list'), {
+            'name': 'some task',
+            'category': self.get_task_category_pk('General')
+        }, **self.headers)
+        pk = response.data['id']
+        detail_url = reverse('task-detail', kwargs={'pk': pk})
+        url = reverse('task-as-of', kwargs={'pk': pk})
+
+        def as_of(at):
+            return self.client.get(
+                url, {'at': at.isoformat()}, **self.headers
+            )
+
+        def state():
+            return (
+                timezone.now(), TaskSerializer(Task.objects.get(pk=pk)).data
+            )
+
+        writes = [
+            (detail_url, {'name': 'renamed'}),
+            (reverse('task-assign', kwargs={'pk': pk}),
+             {'user': other_user.pk}),
+            (reverse('task-change-status', kwargs={'pk': pk}),
+             {'status': enums.STATUS_IN_PROGRESS}),
+            (detail_url, {'priority': enums.PRIORITY_HIGH}),
+            (detail_url, {'description': 'described'}),
+        ]
+        states = [state()]
+        for write_url, data in writes:
+            if write_url == detail_url:
+                self.client.put(write_url, data, **self.headers)
+            else:
+                self.client.post(write_url, data, **self.headers)
+            states.append(state())
+
+        # Check every version is rebuilt, from the snapshot before it.
+        self.assertEqual(
+            list(Task.objects.get(pk=pk).versions.values_list(
+                'number', 'snapshot'
+            )),
+            [(1, True), (2, False), (3, False), (4, True), (5, False),
+             (6, False)]
+        )
+        for number, (at, data) in enumerate(states, 1):
+            response = as_of(at)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['version'], number)
+            self.assertEqual(
+                {name: response.data[name] for name in VERSIONED_FIELDS},
+                {name: data[name] for name in VERSIONED_FIELDS}
+            )
+        task = Task.objects.get(pk=pk)
+        with self.assertNumQueries(2):
+            TaskVersion.objects.as_of(task, states[-1][0])
+
+        # ... before the task existed, and deleted tasks.
+        response = as_of(states[0][0] - timedelta(days=1))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.delete(detail_url, **self.headers)
+        response = self.client.get(
+            url, {'at': (states[-1][0] + timedelta(days=1)).date()},
+            **self.headers
+        )
+        self.assertEqual(response.data['version'], 6)
+
+        # Check tasks written before their history was kept.
+        task = self.create_some_task()
+        url = reverse('task-as-of', kwargs={'pk': task.pk})
+        before = timezone.now()
+        self.assertEqual(as_of(before).data['version'], None)
+
+        self.client.post(
+            reverse('task-claim'), {'category': task.category_id},
+            **self.headers
+        )
+        self.assertEqual(
+            list(task.versions.values_list('number', 'snapshot', 'user')),
+            [(1, True, None), (2, False, self.user.pk)]
+        )
+        response = as_of(before)
+        self.assertEqual(response.data['version'], 1)
+        self.assertEqual(response.data['status'], enums.STATUS_TODO)
+        response = as_of(timezone.now())
+        self.assertEqual(response.data['version'], 2)
+        self.assertEqual(response.data['assignee'], self.user.pk)
+
+        # Check invalid times and unauthorized users.
+        for at in ('', 'yesterday', '2016-02-30'):
+            response = self.client.get(url, {'at': at}, **self.headers)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+        response = self.client.get(url, {'at': before.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_task_version_conflicts(self):
+        '''
+        Test versions taken by concurrent writers are numbered again, and
+        tasks are not changed when their version cannot be recorded.
+        '''
+        task = self.create_some_task()
+        TaskVersion.objects.record(task)
+        conflicts = []
+
+        def collide(sender, instance=None, **kwargs):
+            # Another writer of the task inserted the same number first.
+            if conflicts:
+                conflicts.pop()
+                raise IntegrityError('UNIQUE constraint failed')
+
+        pre_save.connect(collide, sender=TaskVersion)
+        self.addCleanup(pre_save.disconnect, collide, sender=TaskVersion)
+
+        conflicts[:] = [True] * (settings.TASKS_VERSION_ATTEMPTS - 1)
+        with TaskVersion.objects.track(task, self.user):
+            task.name = 'renamed'
+            task.save_fields(['name'])
+        self.assertEqual(task.versions.get(user=self.user).number, 2)
+
+        conflicts[:] = [True] * settings.TASKS_VERSION_ATTEMPTS
+        with self.assertRaises(IntegrityError):
+            with TaskVersion.objects.track(task, self.user):
+                task.name = 'renamed again'
+                task.save_fields(['name'])
+        self.assertEqual(Task.objects.get(pk=task.pk).name, 'renamed')
+        self.assertEqual(task.versions.filter(user=self.user).count(), 1)
+
+    def test_get_task_tree(self):
+        '''
+        Test the GET method of TaskTree and TaskRollup views.
+        Checks subtasks are kept in the tree as they are moved around.
+        '''
+        def create(name, parent=None):
+            data = {
+                'name': name,
+                'category': self.get_task_category_pk('General')
+            }
+            if parent is not None:
+                data['parent'] = parent.pk
+            response = self.client.post(
+                reverse('task-list'), data, **self.headers
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return Task.objects.get(pk=response.data['id'])
+
+        def move(task, parent):
+            return self.client.put(
+                reverse('task-detail', kwargs={'pk': task.pk}),
+                json.dumps({'parent': parent and parent.pk}),
+                content_type='application/json',
+                HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+            )
+
+        def tree(task, queries, **query):
+            # One more query prefetches the labels when there are
+            # subtasks.
+            with self.assertNumQueries(queries):
+                response = self.client.get(
+                    reverse('task-tree', kwargs={'pk': task.pk}), query,
+                    **self.headers
+                )
+            return response.data['ancestors'], [
+                (subtask['id'], subtask['depth'])
+                for subtask in response.data['subtasks']
+            ]
+
+        epic = create('epic')
+        story = create('story', epic)
+        task = create('task', story)
+        subtask = create('subtask', task)
+        other = create('other')
+
+        self.assertEqual(tree(epic, 5), ([], [
+            (story.pk, 1), (task.pk, 2), (subtask.pk, 3)
+        ]))
+        self.assertEqual(tree(epic, 5, depth=2), ([], [
+            (story.pk, 1), (task.pk, 2)
+        ]))
+        self.assertEqual(
+            tree(subtask, 4), ([epic.pk, story.pk, task.pk], [])
+        )
+
+        # Check moving a subtree, to another tree and to the top level.
+        self.assertEqual(move(task, other).status_code, status.HTTP_200_OK)
+        self.assertEqual(tree(epic, 5), ([], [(story.pk, 1)]))
+        self.assertEqual(tree(subtask, 4), ([other.pk, task.pk], []))
+        move(task, None)
+        self.assertEqual(tree(other, 4), ([], []))
+        self.assertEqual(tree(subtask, 4), ([task.pk], []))
+        move(task, story)
+
+        # ... cycles are refused.
+        for parent in (task, subtask):
+            response = move(task, parent)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+            self.assertIn('parent', response.data)
+
+        # Check rollups of subtasks at any depth.
+        url = reverse('task-rollup', kwargs={'pk': epic.pk})
+        with self.assertNumQueries(4):
+            response = self.client.get(url, **self.headers)
+        self.assertEqual(response.data['subtasks'], 3)
+        self.assertEqual(response.data['by_status'], {enums.STATUS_TODO: 3})
+        self.assertFalse(response.data['all_done'])
+
+        for done in (story, task, subtask):
+            self.client.post(
+                reverse('task-change-status', kwargs={'pk': done.pk}),
+                {'status': enums.STATUS_DONE}, **self.headers
+            )
+        response = self.client.get(url, **self.headers)
+        self.assertEqual(response.data['by_status'], {enums.STATUS_DONE: 3})
+        self.assertTrue(response.data['all_done'])
+
+        # Check purged tasks leave their subtasks at the top level.
+        self.client.delete(
+            reverse('task-detail', kwargs={'pk': story.pk}), **self.headers
+        )
+        Task.all_objects.get(pk=story.pk).purge()
+        self.assertEqual(tree(task, 5), ([], [(subtask.pk, 1)]))
+        self.assertEqual(tree(epic, 4), ([], []))
+
+    def test_task_blockers(self):
+        '''
+        Test the TaskBlockers and TaskBlocker views.
+        '''
+        first, second, third = [
+            self.create_some_task(name=name)
+            for name in ('first', 'second', 'third')
+        ]
+
+        def block(blocker, blocked):
+            return self.client.post(
+                reverse('task-blockers', kwargs={'pk': blocked.pk}),
+                {'blocker': blocker.pk}, **self.headers
+            )
+
+        self.assertEqual(
+            block(first, second).status_code, status.HTTP_201_CREATED
+        )
+        self.assertEqual(
+            block(second, third).status_code, status.HTTP_201_CREATED
+        )
+        self.assertEqual(
+            block(second, third).status_code, status.HTTP_204_NO_CONTENT
+        )
+
+        # Check tasks cannot end up waiting for themselves.
+        for blocker, blocked in ((third, first), (second, first),
+                                 (first, first)):
+            response = block(blocker, blocked)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+        response = self.client.get(
+            reverse('task-blockers', kwargs={'pk': third.pk}), **self.headers
+        )
+        self.assertEqual([task['id'] for task in response.data], [second.pk])
+        response = self.client.get(
+            reverse('task-rollup', kwargs={'pk': third.pk}), **self.headers
+        )
+        self.assertEqual(response.data['open_blockers'], 1)
+        self.assertTrue(response.data['all_done'])
+
+        # Check removing a blocker allows the reverse dependency.
+        url = reverse(
+            'task-blocker', kwargs={'pk': second.pk, 'blocker_pk': first.pk}
+        )
+        response = self.client.delete(url, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.delete(url, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            block(second, first).status_code, status.HTTP_201_CREATED
+        )
+
+        response = block(Task(pk=297), first)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_tasks_by_labels(self):
+        '''
+        Test label filters of the GET method of TaskListCreate view.
+        Checks the label bitmaps follow labels changed from either side.
+        '''
+        bug, urgent, ui = [
+            self.client.post(
+                reverse('label-list'), {'name': name}, **self.headers
+            ).data['id']
+            for name in ('bug', 'urgent', 'ui')
+        ]
+
+        def create(labels):
+            response = self.client.post(
+                reverse('task-list'),
+                json.dumps({
+                    'name': 'some task',
+                    'category': self.get_task_category_pk('General'),
+                    'labels': labels
+                }),
+                content_type='application/json',
+                HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(sorted(response.data['labels']), labels)
+            return response.data['id']
+
+        def matching(**filters):
+            query = {
+                'labels_' + name: ','.join(str(pk) for pk in labels)
+                for name, labels in filters.items()
+            }
+            query['page_size'] = 2
+            ids = []
+            url = reverse('task-list')
+            while url:
+                response = self.client.get(url, query, **self.headers)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                ids.extend(task['id'] for task in response.data['results'])
+                url, query = response.data['next'], {}
+            self.assertEqual(response.data['count'], len(ids))
+            return ids
+
+        first = create([bug, urgent])
+        second = create([bug, urgent, ui])
+        third = create([bug])
+        fourth = create([ui])
+        unlabelled = create([])
+
+        self.assertEqual(matching(all=[bug, urgent]), [first, second])
+        self.assertEqual(matching(all=[bug, urgent, ui]), [second])
+        self.assertEqual(matching(any=[urgent, ui]), [first, second, fourth])
+        self.assertEqual(matching(all=[bug], none=[ui]), [first, third])
+        self.assertEqual(
+            matching(all=[bug], any=[urgent, ui], none=[ui]), [first]
+        )
+        self.assertEqual(matching(none=[bug]), [fourth, unlabelled])
+
+        # Check labels changed on updates, from labels and by purges.
+        self.client.put(
+            reverse('task-detail', kwargs={'pk': third}),
+            json.dumps({'labels': [urgent]}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.headers['HTTP_AUTHORIZATION']
+        )
+        Label.objects.get(pk=ui).tasks.add(first)
+        Label.objects.get(pk=urgent).tasks.remove(second)
+        Label.objects.get(pk=bug).tasks.clear()
+        self.assertEqual(matching(any=[bug]), [])
+        self.assertEqual(matching(all=[urgent]), [first, third])
+        self.assertEqual(matching(all=[ui]), [first, second, fourth])
+
+        self.client.delete(
+            reverse('task-detail', kwargs={'pk': first}), **self.headers
+        )
+        self.assertEqual(matching(all=[ui]), [second, fourth])
+        Task.all_objects.get(pk=first).purge()
+        self.assertEqual(
+            LabelBitmap.objects.matching(any_of=[ui, urgent]),
+            [second, third, fourth]
+        )
+
+        # ... and that the bitmaps match the labels they are rebuilt from.
+        bitmaps = sorted(
+            (bitmap.label_id, bitmap.chunk, bytes(bitmap.bits))
+            for bitmap in LabelBitmap.objects.all()
+        )
+        LabelBitmap.objects.rebuild()
+        self.assertEqual(sorted(
+            (bitmap.label_id, bitmap.chunk, bytes(bitmap.bits))
+            for bitmap in LabelBitmap.objects.all()
+        ), bitmaps)
+
+        response = self.client.get(
+            reverse('task-list'), {'labels_all': 'bug'}, **self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_label_bitmaps(self):
+        '''
+        Test label bitmaps spanning chunks of task ids.
+        '''
+        label = Label.objects.create(name='bug')
+        other = Label.objects.create(name='ui')
+        ids = [0, 7, 8, 1000, BITMAP_CHUNK_SIZE - 1, BITMAP_CHUNK_SIZE + 3]
+
+        LabelBitmap.objects.set_tasks(label.pk, ids)
+        LabelBitmap.objects.set_tasks(other.pk, ids[2:])
+        self.assertEqual(label.bitmaps.count(), 2)
+        self.assertEqual(LabelBitmap.objects.matching(any_of=[label.pk]), ids)
+        self.assertEqual(
+            LabelBitmap.objects.matching(
+                all_of=[label.pk], none_of=[other.pk]
+            ),
+            ids[:2]
+        )
+
+        LabelBitmap.objects.set_tasks(label.pk, ids[1:5], present=False)
+        self.assertEqual(
+            LabelBitmap.objects.matching(all_of=[label.pk, other.pk]),
+            ids[5:]
+        )
+        self.assertRaises(ValueError, LabelBitmap.objects.matching)
+
+    def test_task_notifications(self):
+        '''
+        Test watching tasks with the TaskWatch view, the
+        processnotifications command and the NotificationInbox view.
+        '''
+        other_user = self.create_another_user()
+        other_headers = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(
+                other_user.auth_token.key
+            )
+        }
+        watched = self.create_some_task()
+        claimable = self.create_some_task(
+            category=TaskCategory.objects.get(name='Bug')
+        )
+        unwatched = self.create_some_task()
+
+        def watch(task, headers):
+            return self.client.post(
+                reverse('task-watch', kwargs={'pk': task.pk}), **headers
+            )
+
+        self.assertEqual(
+            watch(watched, other_headers).status_code,
+            status.HTTP_201_CREATED
+        )
+        self.assertEqual(
+            watch(watched, other_headers).status_code,
+            status.HTTP_204_NO_CONTENT
+        )
+        watch(claimable, other_headers)
+        watch(watched, self.headers)
+        self.assertEqual(
+            watch(Task(pk=297), self.headers).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+        NotificationOutboxItem.objects.all().delete()
+
+        self.client.post(
+            reverse('task-change-status', kwargs={'pk': watched.pk}),
+            {'status': enums.STATUS_IN_PROGRESS}, **self.headers
+        )
+        self.client.post(
+            reverse('task-claim'), {'category': claimable.category_id},
+            **self.headers
+        )
+        self.client.post(
+            reverse('task-change-status', kwargs={'pk': watched.pk}),
+            {'status': enums.STATUS_DONE}, **other_headers
+        )
+        self.client.post(
+            reverse('task-change-status', kwargs={'pk': unwatched.pk}),
+            {'status': enums.STATUS_DONE}, **other_headers
+        )
+
+        # Events are only queued on the request path.
+        self.assertEqual(NotificationOutboxItem.objects.count(), 5)
+        self.assertFalse(Notification.objects.exists())
+
+        # Left over by an interrupted run, replaced when processed again.
+        Notification.objects.create(
+            user=other_user,
+            event=NotificationOutboxItem.objects.first().event
+        )
+
+        out = StringIO()
+        call_command(
+            'processnotifications', batch_size=2, chunk_size=1,
+            processes=1, stdout=out
+        )
+        self.assertIn('Processed 5 event(s) into 4 notification(s)',
+                      out.getvalue())
+        self.assertFalse(NotificationOutboxItem.objects.exists())
+
+        events = []
+        next_url = reverse('notification-inbox') + '?page_size=2'
+        while next_url:
+            with self.assertNumQueries(3):
+                response = self.client.get(next_url, **other_headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            events.extend(item['event'] for item in response.data['results'])
+            next_url = response.data['next']
+        self.assertEqual(
+            [(event['task'], event['event']) for event in events],
+            [
+                (claimable.pk, enums.EVENT_STATUS_CHANGED),
+                (claimable.pk, enums.EVENT_ASSIGNED),
+                (watched.pk, enums.EVENT_STATUS_CHANGED),
+            ]
+        )
+
+        # Users are not notified of their own events.
+        response = self.client.get(
+            reverse('notification-inbox'), **self.headers
+        )
+        self.assertEqual(
+            [item['event']['user'] for item in response.data['results']],
+            [other_user.pk]
+        )
+
+        # Check notifications are created across the processes of a pool,
+        # which get the function and chunks pickled.
+        class Pool(object):
+            chunks = []
+
+            def map(self, func, chunks):
+                func, chunks = pickle.loads(pickle.dumps((func, chunks)))
+                self.chunks.extend(chunks)
+                return [func(chunk) for chunk in chunks]
+
+        for _ in range(2):
+            TaskEventLog.objects.create(
+                task=watched, user=self.user, event=enums.EVENT_EDITED
+            )
+        with notification_pool(processes=2) as pool:
+            # The in-memory test database cannot be shared.
+            self.assertIsNone(pool)
+        pool = Pool()
+        self.assertEqual(
+            process_outbox(chunk_size=1, pool=pool)[:2], (2, 2)
+        )
+        self.assertEqual(len(pool.chunks), 2)
+        self.assertEqual(
+            other_user.notifications.filter(event__task=watched).count(), 3
+        )
+
+        url = reverse('task-watch', kwargs={'pk': watched.pk})
+        response = self.client.delete(url, **other_headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.delete(url, **other_headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -10,12 +10,54 @@ urlpatterns = [
         name='checkpoint'
     ),
 
+    url(
+        r'^activity/$',
+        views.ActivityFeed.as_view(),
+        name='activity-feed'
+    ),
+
+    url(
+        r'^notifications/$',
+        views.NotificationInbox.as_view(),
+        name='notification-inbox'
+    ),
+
+    url(
+        r'^labels/$',
+        views.LabelListCreate.as_view(),
+        name='label-list'
+    ),
+
     url(
         r'^tasks/$',
         views.TaskListCreate.as_view(),
         name='task-list'
     ),
 
+    url(
+        r'^tasks/analytics/$',
+        views.TaskAnalytics.as_view(),
+        name='task-analytics'
+    ),
+
+    url(
+        r'^tasks/changes/$',
+        views.TaskChangeFeed.as_view(),
+        name='task-changes'
+    ),
+
+    url(
+        r'^tasks/claim/$',
+        views.TaskClaim.as_view(),
+        name='task-claim'
+    ),
+
+    url(
+        r'^tasks/multi/$',
+        views.TaskMultiGet.as_view(),
+        name='task-multi-get'
+    ),
+
     url(
         r'^tasks/(?P<pk>\d+)/$',
         views.TaskDetail.as_view(),
@@ -39,4 +81,40 @@ urlpatterns = [
         views.TaskEventLogList.as_view(),
         name='task-event-log'
     ),
+
+    url(
+        r'^tasks/(?P<pk>\d+)/asof/$',
+        views.TaskAsOf.as_view(),
+        name='task-as-of'
+    ),
+
+    url(
+        r'^tasks/(?P<pk>\d+)/tree/$',
+        views.TaskTree.as_view(),
+        name='task-tree'
+    ),
+
+    url(
+        r'^tasks/(?P<pk>\d+)/rollup/$',
+        views.TaskRollup.as_view(),
+        name='task-rollup'
+    ),
+
+    url(
+        r'^tasks/(?P<pk>\d+)/blockers/$',
+        views.TaskBlockers.as_view(),
+        name='task-blockers'
+    ),
+
+    url(
+        r'^tasks/(?P<pk>\d+)/blockers/(?P<blocker_pk>\d+)/$',
+        views.TaskBlocker.as_view(),
+        name='task-blocker'
+    ),
+
+    url(
+        r'^tasks/(?P<pk>\d+)/watch/$',
+        views.TaskWatch.as_view(),
+        name='task-watch'
+    ),
 ]
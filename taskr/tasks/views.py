@@ -1,5 +1,13 @@
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
@@ -7,18 +15,53 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from . import enums
-from config.paginators import CustomPagination
-from .models import Task, TaskEventLog
+from config import identity_map
+from config.paginators import CustomPagination, FeedPagination
+from jobs.registry import enqueue
+from .models import (
+    ActivityFeedItem, Label, LabelBitmap, Notification, Task, TaskChange,
+    TaskDailyStats, TaskDependency, TaskEventLog, TaskTreePath, TaskVersion,
+    TaskWatcher
+)
 from .serializers import (
+    ActivityFeedItemSerializer,
+    LabelSerializer,
+    NotificationSerializer,
     TaskSerializer,
     TaskStatusSerializer,
-    TaskEventLogSerializer
+    TaskEventLogSerializer,
+    included_fields
 )
+from .signals import events_logged
 
 
 User = get_user_model()
 
 
+def label_filters(request):
+    '''
+    Label ids of the comma separated `labels_all`, `labels_any` and
+    `labels_none` query parameters, as arguments of
+    `LabelBitmapManager.matching`.
+    '''
+    return {
+        name + '_of': [
+            int(pk) for pk in request.query_params.get(
+                'labels_' + name, ''
+            ).split(',') if pk
+        ]
+        for name in ('all', 'any', 'none')
+    }
+
+
+def in_order(tasks, ids):
+    '''
+    Tasks of `ids` from the `tasks` queryset, in the order of `ids`.
+    '''
+    found = tasks.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
+
+
 class Checkpoint(APIView):
 
     def get(self, request, format=None):
@@ -43,15 +86,43 @@ class TaskListCreate(generics.GenericAPIView):
     def get(self, request, format=None):
         '''
         Returns paginated list of all tasks.
+
+        `include=event_count,last_event_at` adds the number of events
+        of each task and when the last one was logged.
+
+        `labels_all`, `labels_any` and `labels_none` keep the tasks
+        with all, at least one, and none of the given label ids. Tasks
+        matched by `labels_all` or `labels_any` are found in the label
+        bitmaps, see `LabelBitmap`, and listed by id.
         '''
-        tasks = Task.objects.all()
+        tasks = Task.objects.prefetch_related('labels')
+        context = {'include': included_fields(request)}
+
+        try:
+            labels = label_filters(request)
+        except ValueError:
+            return Response(
+                {'detail': 'Labels must be comma separated label ids.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ids = None
+        if labels['all_of'] or labels['any_of']:
+            # Only the tasks of the requested page are fetched.
+            ids = LabelBitmap.objects.matching(**labels)
+        elif labels['none_of']:
+            tasks = tasks.exclude(labels__in=labels['none_of'])
 
-        page = self.paginate_queryset(tasks)
+        page = self.paginate_queryset(tasks if ids is None else ids)
         if page is not None:
-            serializer = TaskSerializer(page, many=True)
+            if ids is not None:
+                page = in_order(tasks, page)
+            serializer = TaskSerializer(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
 
-        serializer = TaskSerializer(tasks, many=True)
+        if ids is not None:
+            tasks = in_order(tasks, ids)
+        serializer = TaskSerializer(tasks, many=True, context=context)
         return Response(serializer.data)
 
     def post(self, request):
@@ -61,16 +132,21 @@ class TaskListCreate(generics.GenericAPIView):
         task_serializer = TaskSerializer(data=request.data)
 
         if task_serializer.is_valid():
+            labels = task_serializer.validated_data.pop('labels', [])
             task = Task(**task_serializer.validated_data)
             task.reporter = request.user
             task.save()
+            task.labels.set(labels)
+            identity_map.current().add(task)
+            TaskVersion.objects.record(task, user=request.user)
+            if task.parent_id is not None:
+                TaskTreePath.objects.move(task)
 
             # Create TaskEventLog instance for create event.
             log = TaskEventLog(
                 task=task,
                 user=request.user,
-                event=enums.EVENT_CREATED,
-                description='Task created.'
+                event=enums.EVENT_CREATED
             )
             log.save()
 
@@ -85,6 +161,19 @@ class TaskListCreate(generics.GenericAPIView):
         )
 
 
+class LabelListCreate(generics.ListCreateAPIView):
+    '''
+    View to list all labels if method is GET,
+    or create a label if method is POST.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+    queryset = Label.objects.all()
+    serializer_class = LabelSerializer
+    pagination_class = None
+
+
 class TaskDetail(APIView):
     '''
     Get, update or delete a task.
@@ -96,18 +185,26 @@ class TaskDetail(APIView):
     def get(self, request, pk):
         '''
         Get task detail.
+
+        Takes the `include` query parameter of the task list.
         '''
-        task = get_object_or_404(Task, pk=pk)
-        task_serializer = TaskSerializer(task)
+        task = identity_map.current().get_object_or_404(
+            Task, pk, Task.objects.all()
+        )
+        task_serializer = TaskSerializer(
+            task, context={'include': included_fields(request)}
+        )
 
         return Response(task_serializer.data)
 
     def put(self, request, pk):
         '''
         Update a task's
-        name, description, category, priority.
+        name, description, category, priority, parent.
         '''
-        task = get_object_or_404(Task, pk=pk)
+        task = identity_map.current().get_object_or_404(
+            Task, pk, Task.objects.all()
+        )
         task_serializer = TaskSerializer(
             instance=task,
             data=request.data,
@@ -115,16 +212,23 @@ class TaskDetail(APIView):
         )
 
         if task_serializer.is_valid():
-            task_serializer.save()
-
-            # Create TaskEventLog instance for update event.
-            log = TaskEventLog(
+            parent_id = task.parent_id
+            try:
+                with TaskVersion.objects.track(task, request.user):
+                    task_serializer.save()
+            except Task.DoesNotExist:
+                # Deleted since it was looked up.
+                raise Http404
+            if task.parent_id != parent_id:
+                TaskTreePath.objects.move(task)
+
+            # Log the update event, merged with the user's previous
+            # edits of the task when they were moments ago.
+            TaskEventLog.objects.log(
                 task=task,
                 user=request.user,
-                event=enums.EVENT_EDITED,
-                description='Task edited.'
+                event=enums.EVENT_EDITED
             )
-            log.save()
 
             return Response(task_serializer.data)
 
@@ -136,9 +240,32 @@ class TaskDetail(APIView):
     def delete(self, request, pk):
         '''
         Delete task.
+
+        The task is soft-deleted with a single UPDATE so the response
+        does not depend on the size of its event history. It is purged
+        by a background job TASKS_PURGE_DELAY seconds later, or with the
+        `purgetasks` management command.
         '''
-        task = get_object_or_404(Task, pk=pk)
-        task.delete()
+        if not Task.objects.filter(pk=pk).soft_delete():
+            raise Http404
+        identity_map.current().discard(Task, pk)
+
+        # Create TaskEventLog instance for delete event.
+        log = TaskEventLog(
+            task_id=pk,
+            user=request.user,
+            event=enums.EVENT_DELETED
+        )
+        log.save()
+
+        if settings.TASKS_PURGE_DELAY is not None:
+            enqueue(
+                'tasks.purge_task', {'task_id': int(pk)},
+                owner=request.user,
+                run_after=timezone.now() + timedelta(
+                    seconds=settings.TASKS_PURGE_DELAY
+                )
+            )
 
         return Response(
             {'id': '{}'.format(pk)},
@@ -146,6 +273,57 @@ class TaskDetail(APIView):
         )
 
 
+class TaskMultiGet(APIView):
+    '''
+    Get many tasks by id in one request.
+
+    Takes a comma separated `ids` query parameter and returns the tasks
+    in the requested order, with a not found marker for missing ids.
+    Takes the `include` query parameter of the task list.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        try:
+            ids = [
+                int(pk)
+                for pk in request.query_params.get('ids', '').split(',')
+                if pk
+            ]
+        except ValueError:
+            return Response(
+                {'detail': 'ids must be a comma separated list of integers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(ids) > settings.TASKS_MULTI_GET_MAX_IDS:
+            return Response(
+                {'detail': 'At most {} ids can be requested.'.format(
+                    settings.TASKS_MULTI_GET_MAX_IDS
+                )},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        tasks = Task.objects.filter(pk__in=set(ids)).order_by(
+        ).prefetch_related('labels')
+        tasks_data = {
+            task['id']: task
+            for task in TaskSerializer(
+                tasks, many=True,
+                context={'include': included_fields(request)}
+            ).data
+        }
+
+        results = [
+            tasks_data.get(pk, {'id': pk, 'detail': 'Not found.'})
+            for pk in ids
+        ]
+
+        return Response(results)
+
+
 class TaskAssign(APIView):
     '''
     Assign a task to a User.
@@ -155,28 +333,39 @@ class TaskAssign(APIView):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, pk):
-        task = get_object_or_404(Task, pk=pk)
+        instances = identity_map.current()
+        # Users often assign tasks to themselves.
+        instances.add(request.user)
+        task = instances.get_object_or_404(Task, pk, Task.objects.all())
         user = request.data.get('user')
 
         # Check if user is an empty string.
         try:
-            user = get_object_or_404(User, pk=user)
+            user = instances.get_object_or_404(User, user)
         except ValueError:
             user = None
 
         # Check if user same as existing assignee.
-        if task.assignee == user:
+        if instances.get_related(task, 'assignee') == user:
             return Response(status=status.HTTP_204_NO_CONTENT)
         else:
-            task.assignee = user
-            task.save()
+            old_assignee_id = task.assignee_id
+            try:
+                with TaskVersion.objects.track(task, request.user):
+                    task.assignee = user
+                    task.save_fields(['assignee'])
+            except Task.DoesNotExist:
+                # Deleted since it was looked up.
+                raise Http404
 
             # Create TaskEventLog instance for assign event.
             log = TaskEventLog(
                 task=task,
                 user=request.user,
                 event=enums.EVENT_ASSIGNED,
-                description='Task assigned to {}.'.format(user)
+                field='assignee',
+                old_value=old_assignee_id,
+                new_value=task.assignee_id
             )
             log.save()
 
@@ -185,6 +374,100 @@ class TaskAssign(APIView):
             )
 
 
+class TaskClaim(APIView):
+    '''
+    Claim the next task of a category.
+
+    Atomically assigns the highest priority, oldest, unassigned todo
+    task of the given category to the current user and moves it to
+    in progress. Returns no content when there is nothing to claim.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        try:
+            category = int(request.data.get('category'))
+        except (TypeError, ValueError):
+            return Response(
+                {'category': ['A valid category id is required.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        claimable = Task.objects.claimable(category)
+        # Only the first row is read, its modified_on starts the version
+        # history of tasks that have none.
+        next_task = claimable.claim_order()
+
+        for _ in range(settings.TASKS_CLAIM_ATTEMPTS):
+            row = next_task.first()
+            if row is None:
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            pk, modified_on = row
+
+            with transaction.atomic():
+                # Only succeeds if no other worker claimed the task since
+                # it was selected, otherwise try the next one.
+                claimed = claimable.filter(pk=pk).update(
+                    assignee=request.user,
+                    status=enums.STATUS_IN_PROGRESS,
+                    modified_on=timezone.now()
+                )
+                if not claimed:
+                    continue
+
+                # Create TaskEventLog instances for assign and
+                # status change events.
+                events = TaskEventLog.objects.bulk_create([
+                    TaskEventLog(
+                        task_id=pk,
+                        user=request.user,
+                        event=enums.EVENT_ASSIGNED,
+                        field='assignee',
+                        old_value=None,
+                        new_value=request.user.pk
+                    ),
+                    TaskEventLog(
+                        task_id=pk,
+                        user=request.user,
+                        event=enums.EVENT_STATUS_CHANGED,
+                        field='status',
+                        old_value=enums.STATUS_TODO,
+                        new_value=enums.STATUS_IN_PROGRESS
+                    ),
+                ])
+                task = Task.objects.get(pk=pk)
+                # Replaces the instance looked up before the claim, if any,
+                # for the receivers of events_logged.
+                identity_map.current().add(task)
+
+                # bulk_create does not send post_save, nor set the ids the
+                # receivers need.
+                claim_events = list(
+                    reversed(task.events.order_by('-pk')[:len(events)])
+                )
+                events_logged.send(sender=TaskEventLog, events=claim_events)
+
+                TaskVersion.objects.record(
+                    task,
+                    dict(
+                        TaskVersion.objects.state(task),
+                        assignee=None,
+                        status=enums.STATUS_TODO
+                    ),
+                    since=modified_on,
+                    user=request.user
+                )
+
+            return Response(TaskSerializer(task).data)
+
+        return Response(
+            {'detail': 'Too much contention, try again.'},
+            status=status.HTTP_409_CONFLICT
+        )
+
+
 class TaskChangeStatus(APIView):
     '''
     Change the status of a Task.
@@ -194,7 +477,9 @@ class TaskChangeStatus(APIView):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, pk):
-        task = get_object_or_404(Task, pk=pk)
+        task = identity_map.current().get_object_or_404(
+            Task, pk, Task.objects.all()
+        )
         task_serializer = TaskStatusSerializer(
             task,
             data=request.data,
@@ -207,16 +492,22 @@ class TaskChangeStatus(APIView):
             if task_serializer.validated_data.get('status') == task.status:
                 return Response(status=status.HTTP_204_NO_CONTENT)
             else:
-                task = task_serializer.save()
+                old_status = task.status
+                try:
+                    with TaskVersion.objects.track(task, request.user):
+                        task = task_serializer.save()
+                except Task.DoesNotExist:
+                    # Deleted since it was looked up.
+                    raise Http404
 
                 # Create TaskEventLog instance for status change event.
                 log = TaskEventLog(
                     task=task,
                     user=request.user,
                     event=enums.EVENT_STATUS_CHANGED,
-                    description='Task status changed to "{}".'.format(
-                        task_serializer.data
-                    )
+                    field='status',
+                    old_value=old_status,
+                    new_value=task.status
                 )
                 log.save()
 
@@ -237,10 +528,484 @@ class TaskEventLogList(APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request, pk):
-        task = get_object_or_404(Task, pk=pk)
+        task = identity_map.current().get_object_or_404(
+            Task, pk, Task.objects.all()
+        )
 
-        logs = TaskEventLog.objects.select_related().filter(task=task)
+        logs = TaskEventLog.objects.filter(task=task)
 
-        logs_serializer = TaskEventLogSerializer(logs, many=True)
+        logs_serializer = TaskEventLogSerializer(
+            logs,
+            many=True,
+            context={'usernames': TaskEventLog.objects.usernames(logs)}
+        )
 
         return Response(logs_serializer.data)
+
+
+class TaskAsOf(APIView):
+    '''
+    Get a task as it was at a point in time, deleted tasks included.
+
+    Query parameters:
+      - at: datetime (ISO 8601), or date (YYYY-MM-DD) for the end of
+        that day, in the current time zone unless one is given
+
+    The task is rebuilt from its last version snapshot before `at` and
+    the versions after it, see `TaskVersion`.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, pk):
+        value = request.query_params.get('at', '')
+        try:
+            at = parse_datetime(value)
+            if at is None:
+                day = parse_date(value)
+                at = day and datetime.combine(day, datetime.max.time())
+        except ValueError:
+            at = None
+        if at is None:
+            return Response(
+                {'detail': 'at must be a valid datetime or date.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(at):
+            at = timezone.make_aware(at)
+
+        task = identity_map.current().get_object_or_404(
+            Task, pk, Task.all_objects.all()
+        )
+        version = TaskVersion.objects.as_of(task, at)
+        if version is None:
+            return Response(
+                {'detail': 'The task is not known as of {}.'.format(
+                    at.isoformat()
+                )},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        number, state = version
+        return Response(dict(state, id=task.pk, version=number, at=at))
+
+
+class TaskTree(APIView):
+    '''
+    Get the ancestors and subtasks of a task.
+
+    Query parameters:
+      - depth: only subtasks at most this many levels down
+
+    Ancestors are listed from the top level task down, subtasks by
+    level, each with its `depth` below the task. Both are read from
+    `TaskTreePath` with a single query each.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, pk):
+        task = identity_map.current().get_object_or_404(
+            Task, pk, Task.objects.all()
+        )
+
+        filters = {'ancestor_paths__ancestor': task}
+        if 'depth' in request.query_params:
+            try:
+                filters['ancestor_paths__depth__lte'] = int(
+                    request.query_params['depth']
+                )
+            except ValueError:
+                return Response(
+                    {'detail': 'depth must be an integer.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        subtasks = Task.objects.filter(**filters).annotate(
+            depth=F('ancestor_paths__depth')
+        ).order_by('depth', 'pk').prefetch_related('labels')
+
+        ancestors = TaskTreePath.objects.filter(
+            descendant=task
+        ).order_by('-depth').values_list('ancestor_id', flat=True)
+
+        # Create response object.
+        response = {}
+        response['id'] = task.pk
+        response['ancestors'] = list(ancestors)
+        response['subtasks'] = [
+            dict(data, depth=subtask.depth)
+            for subtask, data in zip(
+                subtasks, TaskSerializer(subtasks, many=True).data
+            )
+        ]
+
+        return Response(response)
+
+
+class TaskRollup(APIView):
+    '''
+    Get the progress of the subtasks of a task, at any depth.
+
+    Returns the number of `subtasks`, their counts `by_status`, whether
+    they are `all_done`, and the number of `open_blockers` of the task,
+    its blockers that are not done.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, pk):
+        task = identity_map.current().get_object_or_404(
+            Task, pk, Task.objects.all()
+        )
+
+        by_status = dict(TaskTreePath.objects.filter(
+            ancestor=task,
+            descendant__deleted_on__isnull=True
+        ).order_by().values_list('descendant__status').annotate(
+            count=Count('pk')
+        ))
+        subtasks = sum(by_status.values())
+
+        # Create response object.
+        response = {}
+        response['id'] = task.pk
+        response['subtasks'] = subtasks
+        response['by_status'] = by_status
+        response['all_done'] = \
+            by_status.get(enums.STATUS_DONE, 0) == subtasks
+        response['open_blockers'] = Task.objects.filter(
+            blocking__blocked=task
+        ).exclude(status=enums.STATUS_DONE).count()
+
+        return Response(response)
+
+
+class TaskBlockers(APIView):
+    '''
+    List the tasks blocking a task if method is GET, or add a blocker
+    given as `blocker` if method is POST.
+
+    Blockers that would make a task wait for itself are refused.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, pk):
+        task = identity_map.current().get_object_or_404(
+            Task, pk, Task.objects.all()
+        )
+        blockers = Task.objects.filter(
+            blocking__blocked=task
+        ).order_by('pk').prefetch_related('labels')
+
+        return Response(TaskSerializer(blockers, many=True).data)
+
+    def post(self, request, pk):
+        instances = identity_map.current()
+        task = instances.get_object_or_404(Task, pk, Task.objects.all())
+        try:
+            blocker = instances.get(
+                Task, request.data.get('blocker'), Task.objects.all()
+            )
+        except (Task.DoesNotExist, TypeError, ValueError):
+            return Response(
+                {'blocker': ['A valid task id is required.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if TaskDependency.objects.filter(
+            blocker=blocker, blocked=task
+        ).exists():
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if TaskDependency.objects.creates_cycle(blocker, task):
+            return Response(
+                {'blocker': ['A task cannot wait for itself.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        TaskDependency.objects.create(blocker=blocker, blocked=task)
+
+        return Response(
+            TaskSerializer(blocker).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class TaskBlocker(APIView):
+    '''
+    Remove a blocker of a task.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def delete(self, request, pk, blocker_pk):
+        deleted, _ = TaskDependency.objects.filter(
+            blocker=blocker_pk, blocked=pk
+        ).delete()
+        if not deleted:
+            raise Http404
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TaskWatch(APIView):
+    '''
+    Watch a task if method is POST, or stop watching it if method is
+    DELETE.
+
+    Watchers are notified of the events of the task in their inbox.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, pk):
+        task = identity_map.current().get_object_or_404(
+            Task, pk, Task.objects.all()
+        )
+        _, created = TaskWatcher.objects.get_or_create(
+            task=task, user=request.user
+        )
+        if not created:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        return Response(status=status.HTTP_201_CREATED)
+
+    def delete(self, request, pk):
+        deleted, _ = TaskWatcher.objects.filter(
+            task=pk, user=request.user
+        ).delete()
+        if not deleted:
+            raise Http404
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TaskChangeFeed(APIView):
+    '''
+    Get the tasks created, modified or deleted since a cursor.
+
+    Query parameters:
+      - cursor: value returned by the previous call, 0 for a full sync
+      - limit: maximum number of changes returned
+      - timeout: seconds to wait for changes when there are none
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        try:
+            cursor = int(request.query_params.get('cursor', 0))
+            limit = int(request.query_params.get(
+                'limit', settings.TASKS_CHANGES_PAGE_SIZE
+            ))
+            timeout = float(request.query_params.get('timeout', 0))
+        except ValueError:
+            return Response(
+                {'detail': 'cursor, limit and timeout must be numbers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limit = max(1, min(limit, settings.TASKS_CHANGES_MAX_PAGE_SIZE))
+        deadline = time.time() + min(
+            max(timeout, 0), settings.TASKS_CHANGES_MAX_WAIT
+        )
+
+        # Long poll until something changed or the timeout expires.
+        while True:
+            changes = list(
+                TaskChange.objects.filter(pk__gt=cursor)[:limit + 1]
+            )
+            if changes or time.time() >= deadline:
+                break
+            time.sleep(settings.TASKS_CHANGES_POLL_INTERVAL)
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        live_ids = [c.task_id for c in changes if not c.deleted]
+        tasks = Task.objects.filter(pk__in=live_ids).order_by(
+        ).prefetch_related('labels')
+        tasks_by_id = {task.pk: task for task in tasks}
+
+        # Tasks deleted after their change was read are tombstones too.
+        deleted = [
+            c.task_id for c in changes if c.task_id not in tasks_by_id
+        ]
+        tasks = [
+            tasks_by_id[c.task_id] for c in changes if c.task_id in tasks_by_id
+        ]
+
+        return Response({
+            'cursor': changes[-1].pk if changes else cursor,
+            'has_more': has_more,
+            'tasks': TaskSerializer(tasks, many=True).data,
+            'deleted': deleted,
+        })
+
+
+class TaskAnalytics(APIView):
+    '''
+    Get lead time, cycle time and weekly throughput of tasks.
+
+    Query parameters:
+      - since, until: dates (YYYY-MM-DD), defaults to the last 12 weeks
+      - group_by: category (default) or assignee
+
+    Times are averages in seconds. Served from the daily rollups kept
+    by `TaskDailyStats`, so the cost depends on the number of days and
+    groups, not on the size of the event log.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+
+    totals = (
+        'created', 'completed', 'started_completed', 'lead_time', 'cycle_time'
+    )
+
+    def get(self, request):
+        group_by = request.query_params.get('group_by', 'category')
+        if group_by not in ('category', 'assignee'):
+            return Response(
+                {'detail': 'group_by must be category or assignee.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            until = parse_date(request.query_params.get('until', '')) or (
+                timezone.localtime(timezone.now()).date()
+            )
+            since = parse_date(request.query_params.get('since', '')) or (
+                until - timedelta(weeks=12) + timedelta(days=1)
+            )
+        except ValueError:
+            return Response(
+                {'detail': 'since and until must be valid dates.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = TaskDailyStats.objects.filter(
+            day__range=(since, until)
+        ).values('day', group_by).annotate(**{
+            name: Sum(name) for name in self.totals
+        }).order_by()
+
+        weeks = {}
+        groups = {}
+        for row in rows:
+            week = row['day'] - timedelta(days=row['day'].weekday())
+            for key, summary in [
+                ((week, row[group_by]), weeks),
+                (row[group_by], groups),
+            ]:
+                sums = summary.setdefault(key, dict.fromkeys(self.totals, 0))
+                for name in self.totals:
+                    sums[name] += row[name]
+
+        return Response({
+            'since': since,
+            'until': until,
+            'group_by': group_by,
+            'weeks': [
+                dict(self.summarize(sums), week=week, **{group_by: group})
+                for (week, group), sums in sorted(
+                    weeks.items(), key=lambda item: (
+                        item[0][0], item[0][1] is None, item[0][1]
+                    )
+                )
+            ],
+            'totals': [
+                dict(self.summarize(sums), **{group_by: group})
+                for group, sums in sorted(
+                    groups.items(), key=lambda item: (
+                        item[0] is None, item[0]
+                    )
+                )
+            ],
+        })
+
+    def summarize(self, sums):
+        def average(total, count):
+            return float(total) / count if count else None
+
+        return {
+            'created': sums['created'],
+            'throughput': sums['completed'],
+            'lead_time': average(sums['lead_time'], sums['completed']),
+            'cycle_time': average(
+                sums['cycle_time'], sums['started_completed']
+            ),
+        }
+
+
+class ActivityFeed(generics.GenericAPIView):
+    '''
+    Get the events on the tasks the user reported or is assigned to,
+    newest first.
+
+    Paginated with a cursor, follow the `next` link for older events.
+    Query parameters:
+      - page_size: number of events per page
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+    pagination_class = FeedPagination
+
+    def get(self, request):
+        items = ActivityFeedItem.objects.filter(
+            user=request.user
+        ).select_related('event')
+
+        page = self.paginate_queryset(items)
+        events = TaskEventLog.objects.filter(
+            pk__in=[item.event_id for item in page]
+        )
+        serializer = ActivityFeedItemSerializer(
+            page,
+            many=True,
+            context={'usernames': TaskEventLog.objects.usernames(events)}
+        )
+
+        return self.get_paginated_response(serializer.data)
+
+
+class NotificationInbox(generics.GenericAPIView):
+    '''
+    Get the notifications of the user for the events of the tasks they
+    watch, newest first.
+
+    Notifications are made by the `processnotifications` worker, shortly
+    after the events. Paginated with a cursor, follow the `next` link
+    for older notifications.
+    Query parameters:
+      - page_size: number of notifications per page
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+    pagination_class = FeedPagination
+
+    def get(self, request):
+        notifications = Notification.objects.filter(
+            user=request.user
+        ).select_related('event')
+
+        page = self.paginate_queryset(notifications)
+        events = TaskEventLog.objects.filter(
+            pk__in=[notification.event_id for notification in page]
+        )
+        serializer = NotificationSerializer(
+            page,
+            many=True,
+            context={'usernames': TaskEventLog.objects.usernames(events)}
+        )
+
+        return self.get_paginated_response(serializer.data)
@@ -1,3 +1,13 @@
 from django.contrib import admin
 
-# Register your models here.
+from rest_framework.authtoken.admin import TokenAdmin
+from rest_framework.authtoken.models import Token
+
+
+class RawIdTokenAdmin(TokenAdmin):
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+
+
+admin.site.unregister(Token)
+admin.site.register(Token, RawIdTokenAdmin)
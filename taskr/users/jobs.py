@@ -0,0 +1,17 @@
+from __future__ import absolute_import
+
+from django.contrib.auth import get_user_model
+
+from jobs.registry import job
+
+from .reports import user_report
+
+User = get_user_model()
+
+
+@job('users.report')
+def report(user_id):
+    '''
+    The task report of a user, see `users.reports.user_report`.
+    '''
+    return user_report(User.objects.get(pk=user_id))
@@ -0,0 +1,91 @@
+import csv
+import multiprocessing
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.provisioning import USER_FIELDS, provision_users
+from users.serializers import ProvisionUserSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users and their auth tokens in bulk from a CSV file with a '
+        'header of username and optionally email, first_name, last_name '
+        'and password.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='CSV file of users, - for standard input.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of users created per transaction.'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=None,
+            help='Processes hashing passwords, one per CPU by default.'
+        )
+        parser.add_argument(
+            '--no-passwords', action='store_true',
+            help='Give every user an unusable password, for SSO-only '
+                 'accounts.'
+        )
+        parser.add_argument(
+            '--tokens',
+            help='Write the username and token of created users to this '
+                 'CSV file.'
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            users = self.read_users(sys.stdin, options['no_passwords'])
+        else:
+            with open(options['path']) as f:
+                users = self.read_users(f, options['no_passwords'])
+
+        serializer = ProvisionUserSerializer(data=users, many=True)
+        if not serializer.is_valid():
+            raise CommandError('\n'.join(
+                'Row {}: {}'.format(row, errors)
+                for row, errors in enumerate(serializer.errors, 2)
+                if errors
+            ))
+
+        # Hashing dominates, spread it over processes when there is enough.
+        pool = None
+        if options['processes'] != 1 and len(users) > 1:
+            pool = multiprocessing.Pool(options['processes'])
+        try:
+            created, skipped = provision_users(
+                serializer.validated_data,
+                batch_size=options['batch_size'],
+                pool=pool
+            )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if options['tokens']:
+            with open(options['tokens'], 'w') as f:
+                writer = csv.writer(f)
+                writer.writerow(['username', 'token'])
+                for user in created:
+                    writer.writerow([user.username, user.auth_token.key])
+
+        self.stdout.write('Provisioned {} user(s), skipped {}.'.format(
+            len(created), len(skipped)
+        ))
+
+    def read_users(self, f, no_passwords):
+        users = []
+        for row in csv.DictReader(f):
+            user = {
+                field: row[field] for field in USER_FIELDS if row.get(field)
+            }
+            if not no_passwords and row.get('password'):
+                user['password'] = row['password']
+            users.append(user)
+        return users
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+# Fields that can be given for each provisioned user.
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+def hash_passwords(passwords, pool=None):
+    '''
+    Hash passwords across the processes of `pool`, if any.
+
+    A password of None gets an unusable hash, for accounts that only sign
+    in through SSO.
+    '''
+    if pool is None:
+        return [make_password(password) for password in passwords]
+    return pool.map(make_password, passwords)
+
+
+def provision_users(users, batch_size=500, pool=None):
+    '''
+    Create users and their auth tokens in batches, hashing passwords
+    across the processes of `pool` if given.
+
+    `users` are dicts of USER_FIELDS and an optional `password`,
+    validated beforehand as `bulk_create` does not. Usernames that
+    already exist, or repeat, are skipped, as are those created by a
+    concurrent provisioning before their batch. Each batch is created in
+    its own transaction with one insert for the users and one for their
+    tokens, as `bulk_create` does not send the `post_save` signal
+    `users.receivers.create_auth_token` relies on.
+
+    Returns the created users and the skipped usernames.
+    '''
+    usernames = set(User.objects.filter(
+        username__in=[user['username'] for user in users]
+    ).values_list('username', flat=True))
+
+    skipped = []
+    new_users = []
+    for user in users:
+        if user['username'] in usernames:
+            skipped.append(user['username'])
+        else:
+            usernames.add(user['username'])
+            new_users.append(user)
+
+    created = []
+    for i in range(0, len(new_users), batch_size):
+        batch = new_users[i:i + batch_size]
+        passwords = hash_passwords(
+            [user.get('password') for user in batch], pool
+        )
+        while batch:
+            try:
+                created.extend(create_batch(batch, passwords))
+                break
+            except IntegrityError:
+                # Usernames taken since they were checked, the batch was
+                # rolled back and is retried without them.
+                taken = set(User.objects.filter(
+                    username__in=[user['username'] for user in batch]
+                ).values_list('username', flat=True))
+                if not taken:
+                    raise
+                kept = [
+                    (user, password)
+                    for user, password in zip(batch, passwords)
+                    if user['username'] not in taken
+                ]
+                skipped.extend(
+                    user['username'] for user in batch
+                    if user['username'] in taken
+                )
+                batch = [user for user, _ in kept]
+                passwords = [password for _, password in kept]
+
+    return created, skipped
+
+
+@transaction.atomic
+def create_batch(users, passwords):
+    User.objects.bulk_create([
+        User(password=password, **{
+            field: user[field] for field in USER_FIELDS if field in user
+        })
+        for user, password in zip(users, passwords)
+    ])
+
+    # Primary keys are not set by bulk_create on every backend.
+    created = list(User.objects.filter(
+        username__in=[user['username'] for user in users]
+    ).order_by('pk'))
+
+    tokens = []
+    for user in created:
+        token = Token(user=user)
+        token.key = token.generate_key()
+        tokens.append(token)
+    Token.objects.bulk_create(tokens)
+
+    for user, token in zip(created, tokens):
+        user.auth_token = token
+    return created
@@ -0,0 +1,37 @@
+from tasks import enums
+from tasks.models import Task
+
+
+def user_report(user):
+    '''
+    Count the tasks of `user` that are
+      - created
+      - assigned
+      - completed
+      - incompleted
+    '''
+    # Get queryset of tasks that user has created or assigned to.
+    tasks = Task.objects.all()
+
+    # Count the created tasks for a user.
+    created_count = tasks.filter(reporter=user).count()
+
+    # Count the assigned, completed, incompleted tasks for a user.
+    # Derived from queryset of assigned tasks.
+    assigned_tasks = tasks.filter(assignee=user)
+    assigned_count = assigned_tasks.count()
+    completed_count = assigned_tasks.filter(
+        status=enums.STATUS_DONE
+    ).count()
+    incompleted_count = assigned_tasks.filter(
+        status__in=[enums.STATUS_TODO, enums.STATUS_IN_PROGRESS]
+    ).count()
+
+    # Create response object.
+    response = {}
+    response['created'] = created_count
+    response['assigned'] = assigned_count
+    response['completed'] = completed_count
+    response['incompleted'] = incompleted_count
+
+    return response
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+
+from rest_framework import serializers
+
+User = get_user_model()
+
+
+class ProvisionUserSerializer(serializers.Serializer):
+    '''
+    A user to provision, without a password for SSO-only accounts.
+
+    Users are created with `bulk_create`, which skips model validation,
+    so the username is checked by the validators of the model field.
+    '''
+    username = serializers.CharField(
+        validators=User._meta.get_field('username').validators
+    )
+    email = serializers.EmailField(required=False, allow_blank=True)
+    first_name = serializers.CharField(
+        max_length=30, required=False, allow_blank=True
+    )
+    last_name = serializers.CharField(
+        max_length=30, required=False, allow_blank=True
+    )
+    password = serializers.CharField(required=False, allow_null=True)
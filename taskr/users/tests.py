@@ -1,7 +1,13 @@
 import json
+import os
+import tempfile
 
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
 
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -9,6 +15,8 @@ from rest_framework.test import APITestCase
 from tasks import enums
 from tasks.models import Task, TaskCategory, TaskEventLog
 
+from .provisioning import provision_users
+
 User = get_user_model()
 
 
@@ -154,3 +162,134 @@ class UsersTest(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response_object, expected_response)
+
+    def test_bulk_create_users(self):
+        '''
+        Test the POST method of UserBulkCreate view.
+        Checks users and tokens are created in one insert each, and
+        existing usernames are skipped.
+        '''
+        url = reverse('user-bulk-create')
+        data = [
+            {
+                'username': 'user{}'.format(i),
+                'password': 'password{}'.format(i)
+            }
+            for i in range(5)
+        ]
+        data.append({'username': 'sso', 'email': 'sso@email.com'})
+        data.append({'username': 'testuser', 'password': 'testuser'})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                url, json.dumps(data),
+                content_type='application/json', **self.headers
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [user['username'] for user in response.data['created']],
+            ['user0', 'user1', 'user2', 'user3', 'user4', 'sso']
+        )
+        self.assertEqual(response.data['skipped'], ['testuser'])
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT')
+        ]), 2)
+
+        # Check passwords, including the unusable one of the SSO user.
+        self.assertTrue(
+            User.objects.get(username='user3').check_password('password3')
+        )
+        sso = User.objects.get(username='sso')
+        self.assertFalse(sso.has_usable_password())
+        self.assertEqual(sso.email, 'sso@email.com')
+
+        # Check the returned tokens authenticate.
+        response = self.client.get(
+            self.url,
+            HTTP_AUTHORIZATION='Token {}'.format(
+                response.data['created'][-1]['token']
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Check usernames are validated as by the User model.
+        response = self.client.post(
+            url, json.dumps([{'username': 'not valid!'}]),
+            content_type='application/json', **self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.filter(username='not valid!').exists())
+
+        # Check only staff users can provision users.
+        response = self.client.post(
+            url, json.dumps([{'username': 'other'}]),
+            content_type='application/json',
+            HTTP_AUTHORIZATION='Token {}'.format(sso.auth_token.key)
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_provision_taken_usernames(self):
+        '''
+        Test usernames created by a concurrent provisioning meanwhile are
+        skipped.
+        '''
+        class ConcurrentPool(object):
+            # Another request creates user1 while passwords are hashed.
+            def map(self, func, items):
+                User.objects.create_user('user1')
+                return [func(item) for item in items]
+
+        created, skipped = provision_users(
+            [{'username': 'user{}'.format(i)} for i in range(3)],
+            pool=ConcurrentPool()
+        )
+        self.assertEqual(
+            [user.username for user in created], ['user0', 'user2']
+        )
+        self.assertEqual(skipped, ['user1'])
+        self.assertTrue(
+            all(user.auth_token.key for user in created)
+        )
+
+    def test_provision_users_command(self):
+        '''
+        Test the provisionusers management command.
+        '''
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as f:
+            f.write(
+                'username,email,password\n'
+                'harry,harry@hogwarts.com,harrypassword\n'
+                'draco,draco@hogwarts.com,\n'
+                'testuser,,\n'
+            )
+        tokens_path = path + '.tokens'
+        self.addCleanup(os.remove, tokens_path)
+
+        stdout = StringIO()
+        call_command(
+            'provisionusers', path, batch_size=1, processes=1,
+            tokens=tokens_path, stdout=stdout
+        )
+        self.assertIn('Provisioned 2 user(s), skipped 1.', stdout.getvalue())
+
+        harry = User.objects.get(username='harry')
+        self.assertTrue(harry.check_password('harrypassword'))
+        self.assertFalse(
+            User.objects.get(username='draco').has_usable_password()
+        )
+        with open(tokens_path) as f:
+            self.assertIn(
+                'harry,{}'.format(harry.auth_token.key), f.read()
+            )
+
+        # Check invalid rows are reported before any user is created.
+        with open(path, 'w') as f:
+            f.write('username\nron\nnot valid!\n')
+        with self.assertRaises(CommandError) as raised:
+            call_command('provisionusers', path, processes=1, stdout=stdout)
+        self.assertIn('Row 3: ', '{}'.format(raised.exception))
+        self.assertFalse(User.objects.filter(username='ron').exists())
@@ -16,4 +16,10 @@ urlpatterns = [
         views.UserReports.as_view(),
         name='user-reports'
     ),
+
+    url(
+        r'^users/bulk/$',
+        views.UserBulkCreate.as_view(),
+        name='user-bulk-create'
+    ),
 ]
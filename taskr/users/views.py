@@ -1,10 +1,17 @@
+from django.conf import settings
+
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.views import APIView
 
-from tasks.models import Task
-from tasks import enums
+from jobs.registry import enqueue
+
+from .provisioning import provision_users
+from .reports import user_report
+from .serializers import ProvisionUserSerializer
 
 
 class UserReports(APIView):
@@ -17,6 +24,10 @@ class UserReports(APIView):
       - completed
       - incompleted
 
+    With the `defer` query parameter the report is computed by a
+    background job instead, whose status URL is returned; the report
+    is the result of the job.
+
     * Requires token authentication.
     '''
     permission_classes = (IsAuthenticated,)
@@ -24,28 +35,57 @@ class UserReports(APIView):
     def get(self, request):
         user = request.user
 
-        # Get queryset of tasks that user has created or assigned to.
-        tasks = Task.objects.all()
+        if request.query_params.get('defer'):
+            job = enqueue('users.report', {'user_id': user.pk}, owner=user)
+
+            # Create response object.
+            response = {}
+            response['job'] = job.pk
+            response['url'] = reverse(
+                'job-detail', kwargs={'pk': job.pk}, request=request
+            )
+
+            return Response(response, status=status.HTTP_202_ACCEPTED)
+
+        return Response(user_report(user), status=status.HTTP_200_OK)
+
+
+class UserBulkCreate(APIView):
+    '''
+    Provision users and their auth tokens.
+
+    Takes a list of users with `username` and optionally `email`,
+    `first_name`, `last_name` and `password`. Users without a password
+    get an unusable one, for SSO-only accounts. Existing usernames are
+    skipped.
+
+    Returns the created users with their tokens and the skipped
+    usernames.
+
+    * Requires token authentication of a staff user.
+    '''
+    permission_classes = (IsAdminUser,)
 
-        # Count the created tasks for a user.
-        created_count = tasks.filter(reporter=user).count()
+    def post(self, request):
+        serializer = ProvisionUserSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        if len(serializer.validated_data) > settings.USERS_BULK_MAX_USERS:
+            raise ValidationError(
+                'At most {} users can be provisioned at once.'.format(
+                    settings.USERS_BULK_MAX_USERS
+                )
+            )
 
-        # Count the assigned, completed, incompleted tasks for a user.
-        # Derived from queryset of assigned tasks.
-        assigned_tasks = tasks.filter(assignee=user)
-        assigned_count = assigned_tasks.count()
-        completed_count = assigned_tasks.filter(
-            status=enums.STATUS_DONE
-        ).count()
-        incompleted_count = assigned_tasks.filter(
-            status__in=[enums.STATUS_TODO, enums.STATUS_IN_PROGRESS]
-        ).count()
+        # Passwords are hashed in this process, large imports are left
+        # to the provisionusers command and its pool of processes.
+        created, skipped = provision_users(serializer.validated_data)
 
-        # Create response object.
         response = {}
-        response['created'] = created_count
-        response['assigned'] = assigned_count
-        response['completed'] = completed_count
-        response['incompleted'] = incompleted_count
+        response['created'] = [
+            {'id': user.pk, 'username': user.username,
+             'token': user.auth_token.key}
+            for user in created
+        ]
+        response['skipped'] = skipped
 
-        return Response(response, status=status.HTTP_200_OK)
+        return Response(response, status=status.HTTP_201_CREATED)
@@ -0,0 +1 @@
+default_app_config = 'webhooks.apps.WebhooksConfig'
\ No newline at end of file
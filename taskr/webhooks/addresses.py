@@ -0,0 +1,57 @@
+'''
+Keeps webhooks from reaching hosts of the internal network.
+
+Webhook URLs are given by users, and the outcome of deliveries is
+reported back to them, so the worker only connects to public addresses
+unless WEBHOOKS_ALLOW_PRIVATE_ADDRESSES.
+'''
+import ipaddress
+import socket
+
+from django.conf import settings
+from django.utils import six
+
+
+class ForbiddenAddress(socket.error):
+    pass
+
+
+def resolve(host, port):
+    '''
+    The getaddrinfo() addresses of `host` to connect to on `port`.
+
+    Raises ForbiddenAddress if one of them is not public, and
+    socket.error if the host is not found.
+    '''
+    addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    if not settings.WEBHOOKS_ALLOW_PRIVATE_ADDRESSES:
+        for _, _, _, _, sockaddr in addresses:
+            # Without the scope of link-local IPv6 addresses.
+            address = ipaddress.ip_address(
+                six.text_type(sockaddr[0].split('%')[0])
+            )
+            if not address.is_global:
+                raise ForbiddenAddress(
+                    '{} resolves to the non-public address {}.'.format(
+                        host, address
+                    )
+                )
+    return addresses
+
+
+def create_connection(host, port, timeout):
+    '''
+    A socket connected to `host` on `port`, on one of the addresses
+    checked by `resolve` so DNS cannot answer differently in between.
+    '''
+    error = socket.error('{} has no address.'.format(host))
+    for family, socktype, proto, _, sockaddr in resolve(host, port):
+        sock = socket.socket(family, socktype, proto)
+        try:
+            sock.settimeout(timeout)
+            sock.connect(sockaddr)
+            return sock
+        except socket.error as e:
+            sock.close()
+            error = e
+    raise error
@@ -0,0 +1,32 @@
+from django.contrib import admin
+
+from config.paginators import CachedCountPaginator
+from .models import Webhook, WebhookDelivery
+
+
+class WebhookAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'url', 'owner', 'events', 'batch_size', 'max_in_flight',
+        'is_active', 'created_on'
+    )
+    list_select_related = ('owner',)
+    list_filter = ('is_active',)
+    raw_id_fields = ('owner',)
+
+
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'webhook', 'event', 'status', 'attempts', 'next_attempt_on',
+        'delivered_on', 'last_error'
+    )
+    list_select_related = ('webhook', 'event__task')
+    list_filter = ('status',)
+    raw_id_fields = ('webhook', 'event')
+    date_hierarchy = 'created_on'
+
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+
+admin.site.register(Webhook, WebhookAdmin)
+admin.site.register(WebhookDelivery, WebhookDeliveryAdmin)
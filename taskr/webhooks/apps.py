@@ -0,0 +1,10 @@
+from __future__ import unicode_literals
+
+from django.apps import AppConfig
+
+
+class WebhooksConfig(AppConfig):
+    name = 'webhooks'
+
+    def ready(self):
+        from . import receivers
@@ -0,0 +1,284 @@
+import errno
+import hashlib
+import hmac
+import json
+import socket
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.six.moves import http_client, queue
+from django.utils.six.moves.urllib.parse import urlsplit
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from ops import metrics
+from tasks.models import TaskEventLog
+
+from . import enums
+from .addresses import create_connection
+from .models import WebhookDelivery
+from .serializers import EventPayloadSerializer
+
+
+def backoff(attempts):
+    '''
+    Seconds to wait before the next attempt after `attempts` failed ones,
+    doubled each time up to WEBHOOKS_RETRY_MAX_BACKOFF.
+    '''
+    return min(
+        settings.WEBHOOKS_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.WEBHOOKS_RETRY_MAX_BACKOFF
+    )
+
+
+def sign(secret, body):
+    return 'sha256=' + hmac.new(
+        secret.encode('utf-8'), body, hashlib.sha256
+    ).hexdigest()
+
+
+def stale(error):
+    '''
+    Whether a request failed with `error` as it does on a keep-alive
+    connection the server closed while it was idle: reset, or closed
+    without a status line. The server did not process the request then,
+    unlike after a timeout.
+    '''
+    # Python 3 raises RemoteDisconnected, Python 2 an empty BadStatusLine.
+    if isinstance(error, getattr(http_client, 'RemoteDisconnected', ())):
+        return True
+    if isinstance(error, http_client.BadStatusLine):
+        return error.line in ('', "''")
+    return isinstance(error, socket.error) and \
+        not isinstance(error, socket.timeout) and \
+        error.errno in (errno.ECONNRESET, errno.EPIPE, errno.ECONNABORTED)
+
+
+class HTTPConnection(http_client.HTTPConnection):
+    '''
+    A connection to public addresses only, see `addresses`.
+    '''
+    def connect(self):
+        self.sock = create_connection(self.host, self.port, self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class HTTPSConnection(http_client.HTTPSConnection, HTTPConnection):
+    '''
+    A TLS connection to public addresses only, wrapping the socket
+    connected by `HTTPConnection.connect`.
+    '''
+
+
+class ConnectionPool(object):
+    '''
+    Idle keep-alive connections by destination, reused across requests
+    and rounds of deliveries so each does not pay for a TCP (and TLS)
+    handshake.
+    '''
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def get(self, destination):
+        '''
+        An idle connection to the (scheme, netloc) `destination` or a new
+        one, and whether it was idle.
+        '''
+        with self.lock:
+            connections = self.idle.get(destination)
+            if connections:
+                return connections.pop(), True
+
+        scheme, netloc = destination
+        if scheme == 'https':
+            connection_class = HTTPSConnection
+        else:
+            connection_class = HTTPConnection
+        return connection_class(netloc, timeout=self.timeout), False
+
+    def put(self, destination, connection):
+        with self.lock:
+            self.idle.setdefault(destination, []).append(connection)
+
+    def close(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle = {}
+
+
+class Deliverer(object):
+    '''
+    Sends due webhook deliveries.
+
+    The deliveries of a webhook are sent `batch_size` events per request,
+    with at most `max_in_flight` requests at a time, each on a keep-alive
+    connection of `pool`. Keep a Deliverer around for its connections to
+    be reused.
+    '''
+    def __init__(self, timeout=None):
+        self.pool = ConnectionPool(timeout or settings.WEBHOOKS_TIMEOUT)
+
+    def close(self):
+        self.pool.close()
+
+    def post(self, url, body, headers):
+        '''
+        POST `body` to `url`, returns the response status, or None and
+        the error.
+        '''
+        url = urlsplit(url)
+        destination = (url.scheme, url.netloc)
+        path = url.path or '/'
+        if url.query:
+            path += '?' + url.query
+
+        while True:
+            connection, reused = self.pool.get(destination)
+            try:
+                connection.request('POST', path, body, headers)
+                response = connection.getresponse()
+                # Read to the end, or the connection cannot be reused.
+                response.read()
+            except (http_client.HTTPException, socket.error) as e:
+                connection.close()
+                # The server closed the idle connection, try again on
+                # another one. Other errors are not retried here, as the
+                # request may have been processed.
+                if reused and stale(e):
+                    continue
+                return None, '{}: {}'.format(type(e).__name__, e)
+
+            if response.will_close:
+                connection.close()
+            else:
+                self.pool.put(destination, connection)
+            return response.status, ''
+
+    def deliver_due(self, limit=1000):
+        '''
+        Claim and send up to `limit` due deliveries of active webhooks,
+        oldest first. Deliveries of inactive webhooks wait until they
+        are active again.
+
+        Returns the number of requests sent, of deliveries delivered and
+        of failed attempts.
+        '''
+        deliveries = WebhookDelivery.objects.claim(limit)
+        if not deliveries:
+            return 0, 0, 0
+
+        events = TaskEventLog.objects.filter(
+            pk__in={delivery.event_id for delivery in deliveries}
+        )
+        payloads = {
+            payload['id']: payload
+            for payload in EventPayloadSerializer(
+                events,
+                many=True,
+                context={'usernames': TaskEventLog.objects.usernames(events)}
+            ).data
+        }
+
+        batches = OrderedDict()
+        for delivery in deliveries:
+            batches.setdefault(delivery.webhook, []).append(delivery)
+
+        results = []
+        threads = []
+        for webhook, webhook_deliveries in batches.items():
+            requests = queue.Queue()
+            for i in range(0, len(webhook_deliveries), webhook.batch_size):
+                requests.put(webhook_deliveries[i:i + webhook.batch_size])
+            for _ in range(min(webhook.max_in_flight, requests.qsize())):
+                thread = threading.Thread(
+                    target=self.send,
+                    args=(webhook, requests, payloads, results)
+                )
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        return self.record(deliveries[0].lease, results)
+
+    def send(self, webhook, requests, payloads, results):
+        '''
+        Send the batches of deliveries in `requests` to `webhook` one
+        after the other, adding (deliveries, status, error) to `results`.
+        '''
+        while True:
+            try:
+                batch = requests.get_nowait()
+            except queue.Empty:
+                return
+
+            body = json.dumps(
+                {'events': [payloads[item.event_id] for item in batch]},
+                cls=JSONEncoder
+            ).encode('utf-8')
+            start = time.time()
+            status, error = self.post(webhook.url, body, {
+                'Content-Type': 'application/json',
+                'User-Agent': 'taskr-webhooks',
+                'X-Taskr-Signature': sign(webhook.secret, body),
+            })
+            metrics.observe(
+                'taskr_webhook_request_duration_seconds', time.time() - start
+            )
+
+            if status is not None and not 200 <= status < 300:
+                error = 'HTTP {}'.format(status)
+            metrics.inc(
+                'taskr_webhook_requests_total',
+                result='failure' if error else 'success'
+            )
+            results.append((batch, error))
+
+    def record(self, lease, results):
+        '''
+        Record the outcome of the deliveries claimed with `lease`, unless
+        another deliverer took them over since.
+        '''
+        now = timezone.now()
+        claimed = WebhookDelivery.objects.filter(lease=lease)
+        delivered = []
+        failed = OrderedDict()
+        for batch, error in results:
+            if not error:
+                delivered.extend(delivery.pk for delivery in batch)
+                continue
+            for delivery in batch:
+                failed.setdefault(
+                    (delivery.attempts + 1, error), []
+                ).append(delivery.pk)
+
+        claimed.filter(pk__in=delivered).update(
+            status=enums.DELIVERY_DELIVERED,
+            attempts=F('attempts') + 1,
+            delivered_on=now,
+            last_error=''
+        )
+        for (attempts, error), pks in failed.items():
+            if attempts >= settings.WEBHOOKS_MAX_ATTEMPTS:
+                fields = {'status': enums.DELIVERY_FAILED}
+            else:
+                fields = {'next_attempt_on': now + timedelta(
+                    seconds=backoff(attempts)
+                )}
+            claimed.filter(pk__in=pks).update(
+                attempts=attempts, last_error=error[:200], **fields
+            )
+
+        return (
+            len(results), len(delivered),
+            sum(len(pks) for pks in failed.values())
+        )
@@ -0,0 +1,12 @@
+
+# Delivery Status
+
+DELIVERY_PENDING = 1
+DELIVERY_DELIVERED = 2
+DELIVERY_FAILED = 3
+
+DELIVERY_STATUS_CHOICES = (
+    (DELIVERY_PENDING, 'Pending'),
+    (DELIVERY_DELIVERED, 'Delivered'),
+    (DELIVERY_FAILED, 'Failed'),
+)
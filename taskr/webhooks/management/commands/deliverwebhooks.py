@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ops import metrics
+from webhooks.delivery import Deliverer
+
+
+class Command(BaseCommand):
+    help = 'Send the due webhook deliveries of task events.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=1000,
+            help='Most deliveries sent per round.'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=0,
+            help='Keep running, checking for due deliveries this many '
+                 'seconds after the last ones were sent. Stops once none '
+                 'are due by default.'
+        )
+
+    def handle(self, *args, **options):
+        if options['poll']:
+            # A worker, its metrics are exposed by the web workers.
+            metrics.enable()
+
+        deliverer = Deliverer()
+        try:
+            while True:
+                totals = self.drain(deliverer, options['limit'])
+                if totals[0] or not options['poll']:
+                    self.stdout.write(
+                        'Sent {} request(s), delivered {} event(s), {} '
+                        'failed attempt(s).'.format(*totals)
+                    )
+                if not options['poll']:
+                    break
+                metrics.maybe_flush()
+                time.sleep(options['poll'])
+        finally:
+            deliverer.close()
+
+    def drain(self, deliverer, limit):
+        totals = [0, 0, 0]
+        while True:
+            counts = deliverer.deliver_due(limit=limit)
+            if not counts[0]:
+                return totals
+            totals = [total + count for total, count in zip(totals, counts)]
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.1 on 2026-10-18 22:52
+from __future__ import unicode_literals
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import webhooks.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0015_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Webhook',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('url', models.URLField(help_text='Where events are POSTed', max_length=500, verbose_name='URL')),
+                ('secret', models.CharField(default=webhooks.models.generate_secret, help_text='Key of the request signatures', max_length=40, verbose_name='Secret')),
+                ('events', models.CharField(blank=True, help_text='Comma separated event types sent, all when blank', max_length=50, verbose_name='Events')),
+                ('batch_size', models.PositiveIntegerField(default=1, help_text='Most events sent per request', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)], verbose_name='Batch size')),
+                ('max_in_flight', models.PositiveIntegerField(default=2, help_text='Most requests sent to the URL at the same time, 1 keeps events in order', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(10)], verbose_name='Max in flight')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether events are sent', verbose_name='Active')),
+                ('owner', models.ForeignKey(help_text='The user who registered the webhook', on_delete=django.db.models.deletion.CASCADE, related_name='webhooks', to=settings.AUTH_USER_MODEL, verbose_name='Owner')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('status', models.PositiveIntegerField(choices=[(1, 'Pending'), (2, 'Delivered'), (3, 'Failed')], default=1, help_text='The delivery status', verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of times the event was sent', verbose_name='Attempts')),
+                ('next_attempt_on', models.DateTimeField(default=django.utils.timezone.now, help_text='When the event is sent next, while pending', verbose_name='Next attempt on')),
+                ('delivered_on', models.DateTimeField(blank=True, help_text='When the webhook accepted the event', null=True, verbose_name='Delivered on')),
+                ('last_error', models.CharField(blank=True, help_text='Why the last attempt failed', max_length=200, verbose_name='Last error')),
+                ('event', models.ForeignKey(help_text='The event sent', on_delete=django.db.models.deletion.CASCADE, related_name='webhook_deliveries', to='tasks.TaskEventLog', verbose_name='Event')),
+                ('webhook', models.ForeignKey(help_text='The webhook the event is sent to', on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='webhooks.Webhook', verbose_name='Webhook')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='webhookdelivery',
+            index_together=set([('status', 'next_attempt_on')]),
+        ),
+    ]
@@ -0,0 +1,228 @@
+from __future__ import unicode_literals
+
+import binascii
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+from django.utils import timezone
+
+from .enums import DELIVERY_STATUS_CHOICES, DELIVERY_PENDING
+
+
+def generate_secret():
+    return binascii.hexlify(os.urandom(20)).decode()
+
+
+def parse_event_types(events):
+    '''
+    The event types of a comma separated `Webhook.events`.
+    '''
+    return {int(event) for event in events.split(',') if event}
+
+
+class Webhook(models.Model):
+    '''
+    A URL task events are POSTed to, as JSON {"events": [...]}.
+
+    Requests are signed with an HMAC-SHA256 of the body keyed with
+    `secret`, in the X-Taskr-Signature header.
+    '''
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='webhooks',
+        on_delete=models.CASCADE,
+        verbose_name='Owner',
+        help_text='The user who registered the webhook'
+    )
+
+    url = models.URLField(
+        max_length=500,
+        verbose_name='URL',
+        help_text='Where events are POSTed'
+    )
+
+    secret = models.CharField(
+        max_length=40,
+        default=generate_secret,
+        verbose_name='Secret',
+        help_text='Key of the request signatures'
+    )
+
+    events = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name='Events',
+        help_text='Comma separated event types sent, all when blank'
+    )
+
+    batch_size = models.PositiveIntegerField(
+        default=1,
+        validators=[MinValueValidator(1), MaxValueValidator(100)],
+        verbose_name='Batch size',
+        help_text='Most events sent per request'
+    )
+
+    max_in_flight = models.PositiveIntegerField(
+        default=2,
+        validators=[MinValueValidator(1), MaxValueValidator(10)],
+        verbose_name='Max in flight',
+        help_text='Most requests sent to the URL at the same time, 1 keeps '
+                  'events in order'
+    )
+
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name='Active',
+        help_text='Whether events are sent'
+    )
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.url
+
+
+class WebhookDeliveryManager(models.Manager):
+
+    def queue(self, events):
+        '''
+        Queue deliveries of events to the active webhooks subscribed to
+        them, for `webhooks.delivery.Deliverer` to send.
+        '''
+        webhooks = [
+            (pk, parse_event_types(types))
+            for pk, types in Webhook.objects.filter(
+                is_active=True
+            ).values_list('pk', 'events')
+        ]
+        if not webhooks:
+            return
+
+        self.bulk_create(
+            WebhookDelivery(webhook_id=pk, event=event)
+            for event in events
+            for pk, types in webhooks
+            if not types or event.event in types
+        )
+
+    def due(self, now=None):
+        '''
+        Deliveries to send: pending ones of active webhooks whose next
+        attempt has come, including those whose lease expired as their
+        deliverer presumably died.
+        '''
+        return self.filter(
+            webhook__is_active=True,
+            status=DELIVERY_PENDING,
+            next_attempt_on__lte=now or timezone.now()
+        )
+
+    def claim(self, limit, lease=None):
+        '''
+        Lease up to `limit` due deliveries for `lease` seconds
+        (WEBHOOKS_LEASE by default), oldest first.
+
+        The deliveries are taken with one UPDATE conditioned on them
+        still being due, which pushes their next attempt past the lease,
+        so of several deliverers claiming the same delivery only one
+        sends it. Each claim gets a new lease token, only the deliverer
+        holding it records the outcome.
+        '''
+        now = timezone.now()
+        candidates = list(self.due(now).order_by('pk').values_list(
+            'pk', flat=True
+        )[:limit])
+        if not candidates:
+            return []
+
+        token = uuid.uuid4().hex
+        self.due(now).filter(pk__in=candidates).update(
+            lease=token,
+            next_attempt_on=now + timedelta(
+                seconds=lease or settings.WEBHOOKS_LEASE
+            )
+        )
+        return list(
+            self.filter(lease=token).select_related('webhook').order_by('pk')
+        )
+
+
+class WebhookDelivery(models.Model):
+    '''
+    An event to send to a webhook, retried with backoff until it is
+    delivered or WEBHOOKS_MAX_ATTEMPTS attempts failed.
+    '''
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    webhook = models.ForeignKey(
+        'Webhook',
+        related_name='deliveries',
+        on_delete=models.CASCADE,
+        verbose_name='Webhook',
+        help_text='The webhook the event is sent to'
+    )
+
+    event = models.ForeignKey(
+        'tasks.TaskEventLog',
+        related_name='webhook_deliveries',
+        on_delete=models.CASCADE,
+        verbose_name='Event',
+        help_text='The event sent'
+    )
+
+    status = models.PositiveIntegerField(
+        choices=DELIVERY_STATUS_CHOICES,
+        default=DELIVERY_PENDING,
+        verbose_name='Status',
+        help_text='The delivery status'
+    )
+
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Attempts',
+        help_text='Number of times the event was sent'
+    )
+
+    next_attempt_on = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Next attempt on',
+        help_text='When the event is sent next, while pending'
+    )
+
+    delivered_on = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Delivered on',
+        help_text='When the webhook accepted the event'
+    )
+
+    last_error = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Last error',
+        help_text='Why the last attempt failed'
+    )
+
+    lease = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Lease',
+        help_text='Token of the last claim of the delivery'
+    )
+
+    objects = WebhookDeliveryManager()
+
+    class Meta:
+        ordering = ['id']
+        # Due deliveries are found with a range scan.
+        index_together = [('status', 'next_attempt_on')]
+
+    def __str__(self):
+        return '{}-{}'.format(self.webhook_id, self.event_id)
@@ -0,0 +1,13 @@
+from django.dispatch import receiver
+
+from tasks.signals import events_logged
+
+from .models import WebhookDelivery
+
+
+@receiver(events_logged)
+def queue_webhook_deliveries(sender, events=(), **kwargs):
+    '''
+    Queue new events for the webhooks subscribed to them.
+    '''
+    WebhookDelivery.objects.queue(events)
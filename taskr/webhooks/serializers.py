@@ -0,0 +1,77 @@
+import socket
+
+from django.utils.six.moves.urllib.parse import urlsplit
+
+from rest_framework import serializers
+
+from tasks.enums import EVENT_CHOICES
+from tasks.serializers import TaskEventLogSerializer
+
+from .addresses import ForbiddenAddress, resolve
+from .models import Webhook, WebhookDelivery, parse_event_types
+
+
+class EventPayloadSerializer(TaskEventLogSerializer):
+    '''
+    An event as sent to webhooks.
+    '''
+    class Meta(TaskEventLogSerializer.Meta):
+        fields = ('id', 'created_on') + TaskEventLogSerializer.Meta.fields
+
+
+class EventTypesField(serializers.ListField):
+    '''
+    The event types of `Webhook.events` as a list.
+    '''
+    child = serializers.ChoiceField(choices=EVENT_CHOICES)
+
+    def to_representation(self, value):
+        return sorted(parse_event_types(value))
+
+    def to_internal_value(self, data):
+        return ','.join('{}'.format(event) for event in sorted(
+            set(super(EventTypesField, self).to_internal_value(data))
+        ))
+
+
+class WebhookSerializer(serializers.ModelSerializer):
+    events = EventTypesField(required=False)
+
+    class Meta:
+        model = Webhook
+        fields = (
+            'id', 'created_on', 'url', 'secret', 'events', 'batch_size',
+            'max_in_flight', 'is_active'
+        )
+        read_only_fields = ('secret',)
+
+    def validate_url(self, value):
+        '''
+        Only http(s) URLs of public hosts are delivered to.
+        '''
+        url = urlsplit(value)
+        if url.scheme not in ('http', 'https'):
+            raise serializers.ValidationError(
+                'Only http and https URLs are supported.'
+            )
+        try:
+            resolve(
+                url.hostname,
+                url.port or (443 if url.scheme == 'https' else 80)
+            )
+        except ForbiddenAddress:
+            raise serializers.ValidationError(
+                'The host must have a public address.'
+            )
+        except socket.error:
+            raise serializers.ValidationError('The host was not found.')
+        return value
+
+
+class WebhookDeliverySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookDelivery
+        fields = (
+            'id', 'created_on', 'event', 'status', 'attempts',
+            'next_attempt_on', 'delivered_on', 'last_error'
+        )
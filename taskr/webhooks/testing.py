@@ -0,0 +1,96 @@
+import threading
+import time
+
+from django.utils.six.moves import BaseHTTPServer, socketserver
+
+
+class StandInServer(object):
+    '''
+    A local HTTP/1.1 server standing in for the receivers of webhooks,
+    for tests and benchmarks.
+
+    Answers `statuses` in turn, then 200, after `latency` seconds, and
+    closes connections after each response unless `keep_alive`. With
+    `drop_idle` they are closed anyway, as servers do with connections
+    idle for longer than their keep-alive timeout. Records
+    the `requests` it got as (client address, path, headers, body), and
+    the most requests it served at the same time.
+
+        with StandInServer() as server:
+            webhook = Webhook.objects.create(url=server.url, ...)
+    '''
+    def __init__(self, statuses=(), latency=0, keep_alive=True,
+                 drop_idle=False):
+        self.statuses = list(statuses)
+        self.latency = latency
+        self.keep_alive = keep_alive
+        self.drop_idle = drop_idle
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        stand_in = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                status = stand_in.receive(
+                    self.client_address, self.path, self.headers, body
+                )
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                if not stand_in.keep_alive:
+                    self.send_header('Connection', 'close')
+                self.end_headers()
+                if stand_in.drop_idle:
+                    self.close_connection = True
+                with stand_in.lock:
+                    stand_in.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/hook'.format(self.server.server_address[1])
+
+    @property
+    def connections(self):
+        '''
+        Number of connections requests came on.
+        '''
+        return len({request[0] for request in self.requests})
+
+    def receive(self, client_address, path, headers, body):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.requests.append((client_address, path, headers, body))
+            status = self.statuses.pop(0) if self.statuses else 200
+        if self.latency:
+            time.sleep(self.latency)
+        return status
+
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
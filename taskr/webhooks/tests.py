@@ -0,0 +1,371 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from tasks import enums as task_enums
+from tasks.models import TaskCategory
+
+from . import enums
+from .delivery import Deliverer, sign
+from .models import Webhook, WebhookDelivery
+from .testing import StandInServer
+
+User = get_user_model()
+
+
+# The stand-in servers listen on the loopback address.
+@override_settings(WEBHOOKS_ALLOW_PRIVATE_ADDRESSES=True)
+class WebhooksTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'testuser',
+            'testuser@email.com',
+            'testuser'
+        )
+
+        # Define headers.
+        self.headers = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(self.user.auth_token.key)
+        }
+
+    def create_task(self, name='some task'):
+        response = self.client.post(reverse('task-list'), {
+            'name': name,
+            'category': TaskCategory.objects.get(name='General').pk,
+        }, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def deliver(self):
+        out = StringIO()
+        call_command('deliverwebhooks', stdout=out)
+        return out.getvalue()
+
+    def test_webhooks(self):
+        '''
+        Test the WebhookListCreate, WebhookDetail and WebhookDeliveryList
+        views.
+        '''
+        url = reverse('webhook-list')
+        response = self.client.post(url, {
+            'url': 'http://127.0.0.1:8080/hook',
+            'events': [task_enums.EVENT_ASSIGNED, task_enums.EVENT_CREATED],
+        }, format='json', **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data['events'],
+            [task_enums.EVENT_CREATED, task_enums.EVENT_ASSIGNED]
+        )
+        self.assertEqual(len(response.data['secret']), 40)
+        pk = response.data['id']
+        detail_url = reverse('webhook-detail', kwargs={'pk': pk})
+
+        for data in ({'url': 'not a url'},
+                     {'url': 'http://127.0.0.1/hook', 'events': [9]},
+                     {'url': 'http://127.0.0.1/hook', 'batch_size': 0}):
+            response = self.client.post(
+                url, data, format='json', **self.headers
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+        # Check webhooks cannot point at the internal network.
+        with override_settings(WEBHOOKS_ALLOW_PRIVATE_ADDRESSES=False):
+            for hook_url in ('http://127.0.0.1:8080/hook',
+                             'http://169.254.169.254/latest/',
+                             'https://[::1]/hook',
+                             'http://10.0.0.1/hook',
+                             'ftp://8.8.8.8/hook'):
+                response = self.client.post(
+                    url, {'url': hook_url}, format='json', **self.headers
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn('url', response.data)
+            response = self.client.patch(
+                detail_url, {'url': 'http://localhost/hook'},
+                format='json', **self.headers
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+        # Check webhooks are only shown to their owner.
+        other_user = User.objects.create_user('dummyuser', password='dummy')
+        other_headers = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(
+                other_user.auth_token.key
+            )
+        }
+        response = self.client.get(url, **other_headers)
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get(detail_url, **other_headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Only subscribed events are queued.
+        task_pk = self.create_task()
+        self.client.post(
+            reverse('task-change-status', kwargs={'pk': task_pk}),
+            {'status': task_enums.STATUS_DONE}, **self.headers
+        )
+        response = self.client.get(
+            reverse('webhook-deliveries', kwargs={'pk': pk}), **self.headers
+        )
+        self.assertEqual(
+            [delivery['status'] for delivery in response.data['results']],
+            [enums.DELIVERY_PENDING]
+        )
+
+        response = self.client.patch(
+            detail_url, {'is_active': False}, format='json', **self.headers
+        )
+        self.assertFalse(response.data['is_active'])
+        self.create_task()
+        self.assertEqual(WebhookDelivery.objects.count(), 1)
+
+        response = self.client.delete(detail_url, **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(WebhookDelivery.objects.exists())
+
+    def test_deliver_webhooks(self):
+        '''
+        Test the deliverwebhooks command sends batches of events on a
+        keep-alive connection.
+        '''
+        with StandInServer() as server:
+            webhook = Webhook.objects.create(
+                owner=self.user, url=server.url, batch_size=2,
+                max_in_flight=1
+            )
+            status_webhook = Webhook.objects.create(
+                owner=self.user, url=server.url,
+                events='{}'.format(task_enums.EVENT_STATUS_CHANGED)
+            )
+            tasks = [self.create_task(name) for name in ('a', 'b', 'c')]
+            self.client.post(
+                reverse('task-claim'),
+                {'category': TaskCategory.objects.get(name='General').pk},
+                **self.headers
+            )
+
+            # Nothing is sent on the request path.
+            self.assertEqual(server.requests, [])
+            self.assertEqual(webhook.deliveries.count(), 5)
+
+            self.assertIn(
+                'Sent 4 request(s), delivered 6 event(s)', self.deliver()
+            )
+            self.assertIn('Sent 0 request(s)', self.deliver())
+
+        # Both webhooks share the keep-alive connections to the server.
+        self.assertLessEqual(server.connections, 2)
+        received = {webhook.pk: [], status_webhook.pk: []}
+        for _, path, headers, body in server.requests:
+            self.assertEqual(path, '/hook')
+            signed_by = [
+                hook.pk for hook in (webhook, status_webhook)
+                if headers['X-Taskr-Signature'] == sign(hook.secret, body)
+            ]
+            self.assertEqual(len(signed_by), 1)
+            received[signed_by[0]].append([
+                (event['task'], event['event'])
+                for event in json.loads(body.decode('utf-8'))['events']
+            ])
+
+        self.assertEqual(received[webhook.pk], [
+            [(tasks[0], task_enums.EVENT_CREATED),
+             (tasks[1], task_enums.EVENT_CREATED)],
+            [(tasks[2], task_enums.EVENT_CREATED),
+             (tasks[0], task_enums.EVENT_ASSIGNED)],
+            [(tasks[0], task_enums.EVENT_STATUS_CHANGED)],
+        ])
+        self.assertEqual(received[status_webhook.pk], [
+            [(tasks[0], task_enums.EVENT_STATUS_CHANGED)],
+        ])
+        body = json.loads(server.requests[0][3].decode('utf-8'))
+        self.assertEqual(
+            sorted(body['events'][0]),
+            ['count', 'created_on', 'description', 'event', 'field', 'id',
+             'new_value', 'old_value', 'task', 'updated_on', 'user']
+        )
+        self.assertFalse(WebhookDelivery.objects.exclude(
+            status=enums.DELIVERY_DELIVERED
+        ).exists())
+
+    @override_settings(WEBHOOKS_MAX_ATTEMPTS=3, WEBHOOKS_RETRY_BACKOFF=60)
+    def test_retry_webhooks(self):
+        '''
+        Test failed deliveries are retried with backoff until they run
+        out of attempts.
+        '''
+        with StandInServer(statuses=[500, 503]) as server:
+            webhook = Webhook.objects.create(
+                owner=self.user, url=server.url, batch_size=10
+            )
+            self.create_task()
+            delivery = webhook.deliveries.get()
+
+            self.assertIn('1 failed attempt(s)', self.deliver())
+            delivery.refresh_from_db()
+            self.assertEqual(delivery.attempts, 1)
+            self.assertEqual(delivery.last_error, 'HTTP 500')
+            self.assertAlmostEqual(
+                (delivery.next_attempt_on - timezone.now()).total_seconds(),
+                60, delta=5
+            )
+
+            # Not due yet.
+            self.assertIn('Sent 0 request(s)', self.deliver())
+
+            # Nor sent while the webhook is inactive.
+            webhook.deliveries.update(next_attempt_on=timezone.now())
+            Webhook.objects.update(is_active=False)
+            self.assertIn('Sent 0 request(s)', self.deliver())
+            Webhook.objects.update(is_active=True)
+
+            webhook.deliveries.update(next_attempt_on=timezone.now())
+            self.deliver()
+            delivery.refresh_from_db()
+            self.assertEqual(delivery.last_error, 'HTTP 503')
+            self.assertAlmostEqual(
+                (delivery.next_attempt_on - timezone.now()).total_seconds(),
+                120, delta=5
+            )
+
+            webhook.deliveries.update(next_attempt_on=timezone.now())
+            self.assertIn('delivered 1 event(s)', self.deliver())
+            delivery.refresh_from_db()
+            self.assertEqual(delivery.status, enums.DELIVERY_DELIVERED)
+            self.assertEqual(delivery.attempts, 3)
+            self.assertEqual(len(server.requests), 3)
+
+        # The server is gone, the last attempt fails the delivery.
+        self.create_task()
+        webhook.deliveries.filter(
+            status=enums.DELIVERY_PENDING
+        ).update(attempts=2)
+        self.deliver()
+        delivery = webhook.deliveries.latest('pk')
+        self.assertEqual(delivery.status, enums.DELIVERY_FAILED)
+        self.assertTrue(delivery.last_error)
+
+    def test_webhook_in_flight_cap(self):
+        '''
+        Test no more than max_in_flight requests are sent to a webhook at
+        the same time.
+        '''
+        with StandInServer(latency=0.05) as server:
+            Webhook.objects.create(
+                owner=self.user, url=server.url, max_in_flight=2
+            )
+            for i in range(6):
+                self.create_task()
+
+            deliverer = Deliverer()
+            try:
+                self.assertEqual(deliverer.deliver_due(), (6, 6, 0))
+            finally:
+                deliverer.close()
+
+        self.assertEqual(server.max_in_flight, 2)
+        self.assertEqual(server.connections, 2)
+
+    def test_webhook_leases(self):
+        '''
+        Test a delivery due for two deliverers is sent by one of them, and
+        only recorded by the deliverer holding its lease.
+        '''
+        other = Deliverer()
+        self.addCleanup(other.close)
+        polled = []
+
+        class First(Deliverer):
+            def record(self, lease, results):
+                # The other deliverer polls once the request was sent.
+                polled.append(other.deliver_due())
+                return super(First, self).record(lease, results)
+
+        first = First()
+        self.addCleanup(first.close)
+        with StandInServer() as server:
+            webhook = Webhook.objects.create(owner=self.user, url=server.url)
+            self.create_task()
+
+            self.assertEqual(first.deliver_due(), (1, 1, 0))
+            self.assertEqual(polled, [(0, 0, 0)])
+            self.assertEqual(len(server.requests), 1)
+            self.assertEqual(
+                webhook.deliveries.get().status, enums.DELIVERY_DELIVERED
+            )
+
+        # Check deliveries whose lease expired are taken over, and the
+        # deliverer that lost them does not record their outcome.
+        self.create_task()
+        [claimed] = WebhookDelivery.objects.claim(10)
+        self.assertEqual(WebhookDelivery.objects.claim(10), [])
+        WebhookDelivery.objects.filter(pk=claimed.pk).update(
+            next_attempt_on=timezone.now()
+        )
+        [taken_over] = WebhookDelivery.objects.claim(10)
+        self.assertNotEqual(taken_over.lease, claimed.lease)
+
+        first.record(claimed.lease, [([claimed], '')])
+        taken_over.refresh_from_db()
+        self.assertEqual(taken_over.status, enums.DELIVERY_PENDING)
+        self.assertEqual(taken_over.attempts, 0)
+
+    def test_webhook_connection_errors(self):
+        '''
+        Test requests are sent again on a new connection when the server
+        closed the idle one, but not after a timeout.
+        '''
+        webhook = Webhook.objects.create(owner=self.user, url='')
+        deliverer = Deliverer(timeout=0.2)
+        self.addCleanup(deliverer.close)
+
+        with StandInServer(drop_idle=True) as server:
+            webhook.url = server.url
+            webhook.save()
+            for _ in range(2):
+                self.create_task()
+                self.assertEqual(deliverer.deliver_due(), (1, 1, 0))
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(server.connections, 2)
+
+        with StandInServer() as server:
+            webhook.url = server.url
+            webhook.save()
+            self.create_task()
+            self.assertEqual(deliverer.deliver_due(), (1, 1, 0))
+
+            server.latency = 0.5
+            self.create_task()
+            self.assertEqual(deliverer.deliver_due(), (1, 0, 1))
+        self.assertEqual(len(server.requests), 2)
+        self.assertIn(
+            'timeout', webhook.deliveries.latest('pk').last_error
+        )
+
+    def test_webhook_private_addresses(self):
+        '''
+        Test deliveries to non-public addresses fail without connecting.
+        '''
+        with StandInServer() as server:
+            webhook = Webhook.objects.create(owner=self.user, url=server.url)
+            self.create_task()
+            with override_settings(WEBHOOKS_ALLOW_PRIVATE_ADDRESSES=False):
+                self.assertIn('1 failed attempt(s)', self.deliver())
+        self.assertEqual(server.requests, [])
+        self.assertIn(
+            'ForbiddenAddress', webhook.deliveries.get().last_error
+        )
@@ -0,0 +1,24 @@
+from django.conf.urls import url
+
+from . import views
+
+
+urlpatterns = [
+    url(
+        r'^webhooks/$',
+        views.WebhookListCreate.as_view(),
+        name='webhook-list'
+    ),
+
+    url(
+        r'^webhooks/(?P<pk>\d+)/$',
+        views.WebhookDetail.as_view(),
+        name='webhook-detail'
+    ),
+
+    url(
+        r'^webhooks/(?P<pk>\d+)/deliveries/$',
+        views.WebhookDeliveryList.as_view(),
+        name='webhook-deliveries'
+    ),
+]
@@ -0,0 +1,66 @@
+from django.http import Http404
+
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+
+from config.paginators import FeedPagination
+
+from .models import Webhook, WebhookDelivery
+from .serializers import WebhookDeliverySerializer, WebhookSerializer
+
+
+class WebhookListCreate(generics.ListCreateAPIView):
+    '''
+    View to list the webhooks of the user if method is GET,
+    or register a webhook if method is POST.
+
+    Events of the `events` types (all when left out) are POSTed to
+    `url` by the deliverwebhooks worker, `batch_size` per request with
+    at most `max_in_flight` requests at a time.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+    serializer_class = WebhookSerializer
+
+    def get_queryset(self):
+        return Webhook.objects.filter(owner=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+
+class WebhookDetail(generics.RetrieveUpdateDestroyAPIView):
+    '''
+    View to get, update or delete a webhook of the user.
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+    serializer_class = WebhookSerializer
+
+    def get_queryset(self):
+        return Webhook.objects.filter(owner=self.request.user)
+
+
+class WebhookDeliveryList(generics.ListAPIView):
+    '''
+    Get the deliveries of a webhook of the user, newest first.
+
+    Paginated with a cursor, follow the `next` link for older
+    deliveries.
+    Query parameters:
+      - page_size: number of deliveries per page
+
+    * Requires token authentication.
+    '''
+    permission_classes = (IsAuthenticated,)
+    serializer_class = WebhookDeliverySerializer
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        if not Webhook.objects.filter(
+            pk=self.kwargs['pk'], owner=self.request.user
+        ).exists():
+            raise Http404
+        return WebhookDelivery.objects.filter(webhook=self.kwargs['pk'])